@@ -1,15 +1,33 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import cv2  # opencv-python library for image processing
-import json
-from PIL import Image  # pillow library for image processing
+from planner import data_store, memory, timing
+from planner.exercise_images import get_exercise_cards, get_thumbnail_cache
+from planner.export import EXPORT_FORMATS, ExportBusy, exporter
+from planner.generator import DEFAULT_BUDGET
+from planner.heatmap_cache import IncrementalHeatmap
+from planner.hero_images import get_hero_variants, picture_html
+from planner.search import PAGE_SIZE
+from planner.svg_overlay import get_svg_overlay, get_template_url
+from planner.weekly import DAYS, get_thumbnails, render_week
+from planner.workout_store import get_workout_store
 
 # Function to display the front page
 def front_page():
     st.markdown("<h1 style='text-align: center;'>🏋️ Workout Planner</h1>", unsafe_allow_html=True)
 
-    st.image("images/gym_art.jpg", use_container_width=True)
+    # Serve pre-generated, downscaled copies of the 16 MP hero image and let the
+    # browser pick one, see planner/hero_images.py
+    hero_html = None
+    with timing.span("front.hero"):
+        if st.get_option("server.enableStaticServing"):
+            try:
+                hero_html = picture_html(get_hero_variants(), alt="Gym art")
+            except OSError:
+                # e.g. a read-only checkout, fall back to the original image
+                pass
+        if hero_html:
+            st.markdown(hero_html, unsafe_allow_html=True)
+        else:
+            st.image("images/gym_art.jpg", use_container_width=True)
 
     st.write("""
     ## Welcome to Workout Planner! 💪
@@ -29,91 +47,183 @@ def front_page():
     - **Diogo Duarte** (20240525)
     """)
 
-# Load exercise data
-def load_exercise_data():
-    df = pd.read_csv("data/prep_data.csv")
-    df["muscle_gp"] = df["muscle_gp"].str.replace(" ", "")
-    return df
-
-# Load muscle annotations
-def load_muscle_data():
-    with open("annotations.json", "r") as f:
-        data = json.load(f)
-        # Access the muscle regions directly from the "template.jpg" key
-        return data.get("template.jpg", {}).get("regions", {})
-
 # Load and prepare template image
 def load_template_image():
-    image = cv2.imread("images/template.jpg")
-    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-
-
-    # color_1 = (255, 185, 50)
-    # color_2 = (230, 150, 60)
-    # color_3 = (180, 110, 50)
-    # color_4 = (120, 80, 40)
-    # color_5 = (60, 50, 30)
-
-    # color_1 = (255, 245, 100)
-    # color_2 = (255, 210, 80)
-    # color_3 = (255, 165, 59)
-    # color_4 = (220, 100, 43)
-    # color_5 = (183, 28, 28)
-
-    # color_1 = (240, 200, 60)
-    # color_2 = (225, 150, 50)
-    # color_3 = (210, 100, 40)
-    # color_4 = (195, 50, 35)
-    # color_5 = (160, 20, 20)
-
-
-
-# Function to get the color based on the number of exercises targeting the muscle
-def get_gradient_color(count):
-
-    color_1 = (255, 245, 100)
-    color_2 = (255, 210, 80)
-    color_3 = (255, 165, 59)
-    color_4 = (220, 100, 43)
-    color_5 = (183, 28, 28)
-
-    if count == 1:
-        return color_1
-    elif count == 2:
-        return color_2
-    elif count == 3:
-        return color_3
-    elif count == 4:
-        return color_4
-    else:
-        return color_5
-
-
-
-# Function to highlight selected muscles
-def highlight_muscles(selected_exercises, exercise_data, muscle_data, template_image):
-    highlighted_image = template_image.copy()
-    muscle_counts = {}
-
-    # Count the number of exercises targeting each muscle
-    for exercise in selected_exercises:
-        muscles = exercise_data[exercise_data["Exercise_Name"] == exercise]["muscle_gp"].values
-        for muscle in muscles:
-            muscle_counts[muscle] = muscle_counts.get(muscle, 0) + 1
-
-    for region in muscle_data.values():
-        muscle_label = region["region_attributes"].get("label", "")
-        count = muscle_counts.get(muscle_label, 0)
-        
-        if count > 0:
-            # Get the appropriate color based on the muscle count
-            highlight_color = get_gradient_color(count)
-            points = np.array(list(zip(region["shape_attributes"]["all_points_x"],
-                                       region["shape_attributes"]["all_points_y"])), np.int32)
-            points = points.reshape((-1, 1, 2))
-            cv2.fillPoly(highlighted_image, [points], highlight_color)
+    return data_store.get_template_image()
+
+# Replace the selection with the exercises of the chosen premade workout
+def load_workout(premade_workouts):
+    st.session_state.selected_exercises = list(premade_workouts.get(st.session_state.workout, []))
+
+# Replace the selection with a generated workout
+def generate_workout(generator):
+    st.session_state.selected_exercises = generator.generate(
+        st.session_state.generate_muscles,
+        st.session_state.generate_equipment,
+        st.session_state.generate_budget,
+    )
 
-    return Image.fromarray(highlighted_image)
+# The user and workout names typed in the sidebar without surrounding
+# spaces, the same values for listing, saving, loading and deleting
+def saved_names():
+    return (st.session_state.get("saved_user", "").strip(),
+            st.session_state.get("save_name", "").strip())
+
+# Save, load and delete the workouts of the name given in the sidebar (see
+# planner/workout_store.py)
+def save_workout(store):
+    user, name = saved_names()
+    store.save(user, name, st.session_state.selected_exercises)
+    st.session_state.saved_workout = name
+    st.toast(f"Saved {name!r}")
+
+def load_saved_workout(store):
+    user, _ = saved_names()
+    exercises = store.load(user, st.session_state.saved_workout)
+    if exercises is not None:
+        st.session_state.selected_exercises = exercises
+
+def delete_saved_workout(store):
+    user, _ = saved_names()
+    store.delete(user, st.session_state.saved_workout)
+
+# Sidebar panel to keep routines across sessions and devices under a name
+def saved_workouts():
+    with st.sidebar.expander("Saved Workouts"):
+        st.text_input("Your Name:", key="saved_user")
+        user, name = saved_names()
+        if not user:
+            st.caption("Enter a name to save and load your workouts")
+            return
+        store = get_workout_store()
+        with timing.span("planner.saved_workouts"):
+            names = store.list(user)
+        st.text_input("Workout Name:", key="save_name")
+        st.button("Save Selection", on_click=save_workout, args=(store,), use_container_width=True,
+                  disabled=not (name and st.session_state.get("selected_exercises")))
+        if names:
+            st.selectbox("Saved:", names, key="saved_workout")
+            load_column, delete_column = st.columns(2)
+            load_column.button("Load", on_click=load_saved_workout, args=(store,), use_container_width=True)
+            delete_column.button("Delete", on_click=delete_saved_workout, args=(store,), use_container_width=True)
+        popular = store.popular_exercises(5)
+        if popular:
+            st.caption("Most saved: " + ", ".join(f"{name} ({count})" for name, count in popular))
+
+def reset_search_page():
+    st.session_state.search_page = 0
+
+def turn_search_page(step):
+    st.session_state.search_page = st.session_state.get("search_page", 0) + step
+
+# Search box with muscle group and equipment filters over the shared search
+# index (see planner/search.py). Returns the current page of results, ranked
+# by rating.
+def exercise_search(search_index):
+    query = st.session_state.get("search_query", "")
+    muscles = st.session_state.get("search_muscles", [])
+    equipment = st.session_state.get("search_equipment", [])
+    results = search_index.search(query, muscles, equipment, st.session_state.get("search_page", 0))
+    st.session_state.search_page = results["page"]
+
+    search_column, muscle_column, equipment_column = st.columns([2, 1, 1])
+    search_column.text_input("Search Exercises:", key="search_query", on_change=reset_search_page,
+                             placeholder="e.g. bench press")
+    muscle_column.multiselect("Muscle Group:", search_index.muscle_names, key="search_muscles",
+                              format_func=lambda name: f"{name} ({results['muscle_counts'][name]})",
+                              on_change=reset_search_page)
+    equipment_column.multiselect("Equipment:", search_index.equipment_names, key="search_equipment",
+                                 format_func=lambda name: f"{name} ({results['equipment_counts'][name]})",
+                                 on_change=reset_search_page)
+
+    first = results["page"] * PAGE_SIZE
+    info_column, previous_column, next_column = st.columns([4, 1, 1])
+    if results["total"]:
+        info_column.caption(f"Showing {first + 1}-{first + len(results['names'])} of {results['total']} "
+                            "matching exercises, best rated first")
+    else:
+        info_column.caption("No matching exercises")
+    previous_column.button("Previous", on_click=turn_search_page, args=(-1,),
+                           disabled=results["page"] == 0, use_container_width=True)
+    next_column.button("Next", on_click=turn_search_page, args=(1,),
+                       disabled=results["page"] >= results["pages"] - 1, use_container_width=True)
+    return results
+
+
+# Wait for the thumbnails being downloaded without rerunning the page, then
+# rerun it once to show them
+@st.fragment(run_every=1)
+def thumbnail_progress(urls):
+    if any(get_thumbnail_cache().status(url) == "pending" for url in urls):
+        st.caption("Loading images...")
+    else:
+        st.rerun()
+
+# Cards with a thumbnail and the catalog details of the selected exercises.
+# Thumbnails come from the disk cache of planner/exercise_images.py; the
+# missing ones, and those of the current search page, are downloaded in
+# the background.
+def exercise_details(selected_exercises, result_names):
+    cards = get_exercise_cards()
+    thumbnails = get_thumbnail_cache()
+    with st.expander(f"Exercise Details ({len(selected_exercises)})"):
+        urls = [cards[name]["image"] for name in selected_exercises if name in cards]
+        thumbnails.prefetch(urls + [cards[name]["image"] for name in result_names if name in cards])
+        columns = st.columns(3)
+        for i, name in enumerate(name for name in selected_exercises if name in cards):
+            card = cards[name]
+            with columns[i % 3]:
+                image = thumbnails.get(card["image"]) if card["image"] else None
+                if image is not None:
+                    st.image(image, use_container_width=True)
+                elif card["image"] and thumbnails.status(card["image"]) == "pending":
+                    st.caption("Image loading...")
+                else:
+                    st.caption("No image")
+                rating = "no rating" if card["rating"] is None else f"rated {card['rating']:.1f}"
+                st.markdown(f"**{name}**  \n{card['muscle']} · {card['equipment']} · {rating}"
+                            + (f"  \n[How to]({card['url']})" if card["url"] else ""))
+        if any(thumbnails.status(url) == "pending" for url in urls):
+            thumbnail_progress(urls)
+
+def submit_export(selected_exercises):
+    format = st.session_state.export_format
+    try:
+        st.session_state.export_job = (exporter.submit(selected_exercises, format), format)
+    except ExportBusy as error:
+        st.session_state.export_job = None
+        st.toast(str(error))
+
+# Progress of a running export, refreshed every second on its own. The whole
+# page reruns once the export is finished to show the download button.
+@st.fragment(run_every=1)
+def export_progress(key):
+    status = exporter.status(key)
+    if status["state"] == "pending":
+        st.progress(status["progress"], text="Preparing the sheet...")
+    else:
+        st.rerun()
+
+# Printable sheet of the selection (heatmap, legend and exercise table),
+# built in the background by planner/export.py so the page stays responsive
+def printable_sheet(selected_exercises):
+    with st.expander("Printable Sheet"):
+        format_column, button_column = st.columns([3, 1])
+        format_column.radio("Format:", list(EXPORT_FORMATS), key="export_format", horizontal=True)
+        button_column.button("Prepare", on_click=submit_export, args=(selected_exercises,),
+                             use_container_width=True)
+
+        if st.session_state.get("export_job") is None:
+            return
+        key, format = st.session_state.export_job
+        status = exporter.status(key)
+        if status["state"] == "pending":
+            export_progress(key)
+        elif status["state"] == "done":
+            st.download_button(f"Download {format}", status["data"], f"workout_plan.{format.lower()}",
+                               mime=EXPORT_FORMATS[format], use_container_width=True)
+        elif status["state"] == "error":
+            st.error(f"Export failed: {status['error']}")
 
 def planner_page():
     # Streamlit UI
@@ -121,58 +231,100 @@ def planner_page():
     # st.markdown("<h1 style='text-align: center;'>Gym Exercise Muscle Visualization</h1>", unsafe_allow_html=True)
 
     # Load data
-    exercise_data = load_exercise_data()
-    muscle_data = load_muscle_data()
-    template_image = load_template_image()
-
-    # Load premade workouts
-    premade_workouts = {
-        "MCDD Workout": [
-            "Treadmill running", "Leg Press", "Leg Extensions", "Lying Leg Curls", "Leverage Decline Chest Press",
-            "Rocky Pull-Ups/Pulldowns", "Standing dumbbell shoulder press", "Dumbbell Bicep Curl",
-            "Single-arm cable triceps extension", "Elbow plank", "Rower"
-        ],
-        "Intensity Test": [
-            "Tire flip", "Standing Hip Circles", "Clam", "Suspended ab fall-out", "Ab bicycle", "Ab Roller",
-            "Incline cable chest press", "Leverage Chest Press", "Cable Chest Press", "Chest dip",
-            "Seated barbell shoulder press", "Smith machine shoulder press", "Seated cable shoulder press",
-            "Machine shoulder press", "Barbell Shoulder Press"
-        ],
-        "Home Alone": [
-            "Elbow plank", "Pushups", "Bottoms Up", "Spider crawl", "Cocoons", "Back extension", "Forward lunge", 
-            "Superman", "Scissors Jump", "Triceps dip"
-        ]
-    }
-
-    # Sidebar for selecting premade workouts
+    with timing.span("planner.load_exercise_index"):
+        exercise_index = data_store.get_exercise_index()
+    with timing.span("planner.load_muscle_data"):
+        region_map = data_store.get_region_map()
+    with timing.span("planner.load_template_image"):
+        template_image = load_template_image()
+
+    # Load premade workouts (data/premade_workouts.json, checked against the
+    # catalog when loaded)
+    with timing.span("planner.load_premade_workouts"):
+        premade_workouts = data_store.get_premade_workouts()
+
+    # Sidebar for selecting premade workouts, picking one replaces the selection
     st.sidebar.title("Workout Options")
-    selected_workout = st.sidebar.selectbox(
+    st.sidebar.selectbox(
         "Choose a Workout Plan:",
         ["None"] + list(premade_workouts.keys()),
+        key="workout",
+        on_change=load_workout,
+        args=(premade_workouts,),
     )
 
+    # Build a workout for the chosen muscles with the equipment at hand
+    with st.sidebar.expander("Generate a Workout"):
+        generator = data_store.get_workout_generator()
+        st.multiselect("Target Muscles:", list(generator.index.muscle_names), key="generate_muscles")
+        st.multiselect("Available Equipment:", generator.equipment_names, key="generate_equipment",
+                       placeholder="Any equipment")
+        st.slider("Number of Exercises:", 1, 20, DEFAULT_BUDGET, key="generate_budget")
+        st.button("Generate", on_click=generate_workout, args=(generator,),
+                  disabled=not st.session_state.get("generate_muscles"), use_container_width=True)
+
     # Initialize selected exercises
-    selected_exercises = []
+    if "selected_exercises" not in st.session_state:
+        st.session_state.selected_exercises = []
+
+    saved_workouts()
 
-    # Populate exercises based on selected workout
-    if selected_workout != "None":
-        selected_exercises = premade_workouts[selected_workout]
+    # Search the catalog on the server, only the current page of results is
+    # sent to the browser along with the exercises already selected
+    with timing.span("planner.search"):
+        results = exercise_search(data_store.get_search_index())
+    selected = st.session_state.selected_exercises
+    options = list(selected) + [name for name in results["names"] if name not in set(selected)]
 
     # Multiselect dropdown for selecting exercises
     selected_exercises = st.multiselect(
         "Select Exercises:",
-        exercise_data["Exercise_Name"].unique(),
-        default=selected_exercises,  # Preselect exercises
+        options,
+        key="selected_exercises",
+    )
+
+    if selected_exercises:
+        with timing.span("planner.exercise_details"):
+            exercise_details(selected_exercises, results["names"])
+
+    # Lighter output: the static template plus an SVG overlay per rerun
+    # instead of a new PNG, needs static file serving
+    svg_overlay = st.get_option("server.enableStaticServing") and st.sidebar.toggle(
+        "SVG overlay output", key="svg_overlay",
+        help="Send the template once and only the highlighted muscles on every change",
     )
+    if svg_overlay:
+        try:
+            template_url = get_template_url()
+        except OSError:
+            # The template could not be published as a static file, e.g. a
+            # read-only checkout, fall back to the raster heatmap
+            svg_overlay = False
+            st.sidebar.caption("SVG overlay unavailable, showing the image instead")
 
     # Display the selected workout's visualization
     # st.subheader("Workout Visualization")
     st.markdown("<h2 style='text-align: center;'>Workout Preview</h2>", unsafe_allow_html=True)
+    heatmap = st.session_state.get("heatmap")
+    if heatmap is None or not heatmap.matches(exercise_index, region_map, template_image):
+        heatmap = st.session_state.heatmap = IncrementalHeatmap(exercise_index, region_map, template_image)
+
+    if svg_overlay:
+        # The template is a static file the browser keeps, each rerun only
+        # sends the colored polygons, see planner/svg_overlay.py
+        with timing.span("planner.svg_overlay"):
+            heatmap.update_intensity(selected_exercises)
+            overlay_html = get_svg_overlay().html(heatmap.levels(), template_url, alt="Muscle template")
+        st.markdown(overlay_html, unsafe_allow_html=True)
+        st.caption("Highlighted Muscles Activation" if selected_exercises else "No exercises selected")
     if selected_exercises:
-        result_image = highlight_muscles(
-            selected_exercises, exercise_data, muscle_data, template_image
-        )
-        st.image(result_image, caption="Highlighted Muscles Activation", use_container_width=True)
+        if not svg_overlay:
+            # Encoded image bytes, shared by every selection with the same
+            # colors. The session's renderer only keeps the selection and its
+            # intensity vector, and only recounts what the last change touched.
+            result_image = heatmap.render(selected_exercises)
+            with timing.span("planner.st_image"):
+                st.image(result_image, caption="Highlighted Muscles Activation", use_container_width=True)
 
         # Add the gradient label directly below the image
         st.markdown("""
@@ -200,15 +352,114 @@ def planner_page():
             </div>
         </div>
         """, unsafe_allow_html=True)
-    else:
-        st.image(template_image, caption="No exercises selected", use_container_width=True)
+
+        printable_sheet(selected_exercises)
+    elif not svg_overlay:
+        # The encoded template from the shared cache rather than the array,
+        # which Streamlit would encode again for every session and rerun
+        with timing.span("planner.st_image"):
+            st.image(heatmap.render([]), caption="No exercises selected", use_container_width=True)
+
+# Plan a week with one exercise list per day. The weekly heatmap and the
+# strip of day thumbnails come from one batched render, see planner/weekly.py.
+def weekly_page():
+    st.title("Weekly Plan")
+
+    with timing.span("weekly.load"):
+        exercise_index = data_store.get_exercise_index()
+        region_map = data_store.get_region_map()
+        template_image = load_template_image()
+        thumbnails = get_thumbnails()
+
+    # One search for every day, each day's list offers the current page of
+    # results next to the exercises it already has
+    with timing.span("weekly.search"):
+        results = exercise_search(data_store.get_search_index())
+    for day, tab in zip(DAYS, st.tabs(DAYS)):
+        selected = st.session_state.get(f"week_{day}", [])
+        options = list(selected) + [name for name in results["names"] if name not in set(selected)]
+        tab.multiselect(f"{day} Exercises:", options, key=f"week_{day}")
+
+    day_selections = [st.session_state.get(f"week_{day}", []) for day in DAYS]
+    if not any(day_selections):
+        st.caption("Add exercises to the days of the week to see the weekly volume")
+        return
+    with timing.span("weekly.render"):
+        week_image, day_strip = render_week(day_selections, exercise_index, region_map, template_image, thumbnails)
+    st.markdown("<h2 style='text-align: center;'>Weekly Volume</h2>", unsafe_allow_html=True)
+    st.image(week_image, caption="Highlighted muscles over the whole week", use_container_width=True)
+    st.image(day_strip, caption=" · ".join(f"{day[:3]}: {len(selection)}"
+                                           for day, selection in zip(DAYS, day_selections)),
+             use_container_width=True)
+
+# Where the memory of this process goes: the shared assets every session
+# reads, and what each connected session keeps on top of them
+def memory_page():
+    st.title("Memory")
+
+    with timing.span("memory.measure"):
+        shared, shared_seen = memory.shared_bytes()
+        sessions = memory.active_sessions()
+        session_count = "unknown" if sessions is None else len(sessions)
+        if not sessions:
+            sessions = {"this session": st.session_state.to_dict()}
+        session_sizes = {session_id: memory.session_bytes(state, shared_seen)
+                         for session_id, state in sessions.items()}
+    per_session = [sum(sizes.values()) for sizes in session_sizes.values()]
+
+    mb = 2 ** 20
+    rss_column, shared_column, sessions_column = st.columns(3)
+    rss_column.metric("Process RSS", f"{memory.rss_bytes() / mb:.1f} MB")
+    shared_column.metric("Shared", f"{sum(shared.values()) / mb:.1f} MB")
+    sessions_column.metric(f"Sessions ({session_count})", f"{sum(per_session) / 1024:.1f} KB",
+                           f"{max(per_session) / 1024:.1f} KB largest", delta_color="off")
+
+    st.subheader("Shared by every session")
+    st.dataframe([{"asset": name, "KB": round(size / 1024, 1)}
+                  for name, size in sorted(shared.items(), key=lambda item: -item[1])], hide_index=True)
+    st.caption(f"Thumbnail cache on disk: {memory.disk_bytes()['thumbnail_cache'] / mb:.1f} MB")
+
+    st.subheader("Per session")
+    if session_count == "unknown":
+        st.caption("The other sessions of this server cannot be read here, only this session is shown.")
+    st.dataframe([{"session": session_id, "KB": round(sum(sizes.values()) / 1024, 2),
+                   "largest keys": ", ".join(f"{key} ({size / 1024:.1f} KB)" for key, size in
+                                             sorted(sizes.items(), key=lambda item: -item[1])[:3])}
+                  for session_id, sizes in session_sizes.items()], hide_index=True)
+
+# Sidebar panel with the rolling stage timings of this process
+def debug_panel():
+    with st.sidebar.expander("Debug: stage timings"):
+        metrics = timing.summary()
+        st.dataframe(
+            [{"stage": name, "count": stage["count"], "p50 ms": round(stage["p50_ms"], 2),
+              "p95 ms": round(stage["p95_ms"], 2), "p99 ms": round(stage["p99_ms"], 2)}
+             for name, stage in metrics.items()],
+            hide_index=True,
+        )
+        st.download_button("Prometheus metrics", timing.prometheus_text(metrics), "planner_metrics.txt")
+        if st.button("Reset timings"):
+            timing.reset()
 
 # Navigation
 PAGES = {
     "Front Page": front_page,
-    "Planner Page": planner_page
+    "Planner Page": planner_page,
+    "Weekly Planner": weekly_page,
 }
+# Opt-in diagnostics page, shown when the app runs with PLANNER_DIAGNOSTICS=1
+if memory.ENABLED:
+    PAGES["Memory"] = memory_page
+
+# Load the data and pre-render the premade workouts while the front page shows
+data_store.warm_up()
 
 st.sidebar.title("Navigation")
 choice = st.sidebar.radio("Go to", list(PAGES.keys()))
-PAGES[choice]()
\ No newline at end of file
+with timing.span(f"rerun.{choice}"):
+    PAGES[choice]()
+
+# Opt-in timing panel, shown when the app runs with PLANNER_TIMING=1
+if timing.ENABLED:
+    debug_panel()
+timing.maybe_export()
\ No newline at end of file
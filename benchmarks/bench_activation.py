@@ -0,0 +1,66 @@
+# Muscle intensity of a selection as one sparse mat-vec over the activation
+# matrix, against summing the activations exercise by exercise from a dict,
+# on synthetic catalogs and muscle taxonomies of growing size. Every
+# exercise gets its primary muscle plus ACTIVATIONS_PER_EXERCISE random
+# secondary ones.
+#
+#   python -m benchmarks.bench_activation
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_exercise_index import best_of
+from planner.exercise_index import ExerciseIndex
+from planner.render import intensity_levels
+
+SIZES = [(420, 17), (10_000, 100), (100_000, 500), (250_000, 2_000)]
+SELECTION_SIZES = [10, 50, 200]
+ACTIVATIONS_PER_EXERCISE = 3
+
+
+def make_catalog(exercises, muscles, rng):
+    names = np.array([f"Exercise {i}" for i in range(exercises)], dtype=object)
+    muscle_names = np.array([f"Muscle {i}" for i in range(muscles)], dtype=object)
+    catalog = pd.DataFrame({"Exercise_Name": names, "muscle_gp": muscle_names[rng.integers(0, muscles, exercises)]})
+    activations = pd.DataFrame({
+        "Exercise_Name": np.repeat(names, ACTIVATIONS_PER_EXERCISE),
+        "muscle_gp": muscle_names[rng.integers(0, muscles, exercises * ACTIVATIONS_PER_EXERCISE)],
+        "weight": rng.choice([0.25, 0.5, 0.75], exercises * ACTIVATIONS_PER_EXERCISE),
+    })
+    return catalog, activations
+
+
+# {Exercise_Name: [(muscle, weight), ...]} summed exercise by exercise
+def dict_intensity(selected_exercises, activations):
+    intensity = {}
+    for name in selected_exercises:
+        for muscle, weight in activations[name]:
+            intensity[muscle] = intensity.get(muscle, 0) + weight
+    return intensity
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'catalog':>9} {'muscles':>8} {'selected':>9} {'build ms':>9} {'dict ms':>9} "
+          f"{'mat-vec ms':>11} {'colormap ms':>12}")
+    for exercises, muscles in SIZES:
+        catalog, activations = make_catalog(exercises, muscles, rng)
+        build, index = best_of(lambda: ExerciseIndex(catalog, activations), repeat=1)
+        by_name = {}
+        for name, muscle in zip(catalog["Exercise_Name"], catalog["muscle_gp"]):
+            by_name.setdefault(name, []).append((muscle, 1.0))
+        for name, muscle, weight in activations.itertuples(index=False):
+            by_name[name].append((muscle, weight))
+
+        for n in SELECTION_SIZES:
+            selection = list(rng.choice(catalog["Exercise_Name"].to_numpy(), n, replace=False))
+            loop, expected = best_of(lambda: dict_intensity(selection, by_name))
+            matvec, intensity = best_of(lambda: index.intensity_vector(selection))
+            colormap, _ = best_of(lambda: intensity_levels(intensity))
+            got = {index.muscle_names[i]: intensity[i] for i in np.flatnonzero(intensity)}
+            assert got.keys() == expected.keys() and all(np.isclose(got[m], expected[m]) for m in got)
+            print(f"{exercises:>9} {muscles:>8} {n:>9} {build * 1e3:>9.1f} {loop * 1e3:>9.3f} "
+                  f"{matvec * 1e3:>11.3f} {colormap * 1e3:>12.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# Cold start of the render path with each backend: a fresh interpreter
+# imports the render modules (not pandas or the data store), decodes the
+# template and rasterizes the annotation regions, reporting time and RSS
+# after the imports and after the first region map. Also checks that every
+# backend produces the same pixels.
+#
+#   python -m benchmarks.bench_backends
+import json
+import subprocess
+import sys
+
+from planner.backends import BACKENDS
+from planner.data_store import BASE_DIR
+
+REPEAT = 5
+
+STARTUP_SCRIPT = """
+import hashlib, json, os, resource, sys, time
+
+def rss_kb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() // 1024
+
+os.environ["PLANNER_RENDER_BACKEND"] = sys.argv[1]
+start = time.perf_counter()
+from planner import annotations, backends, render
+backend = backends.get_backend()
+imported = time.perf_counter()
+import_rss = rss_kb()
+template_image = backend.read_image(os.path.join("images", "template.jpg"))
+with open("annotations.json", "rb") as f:
+    source = f.read()
+compiled = annotations.read_compiled(os.path.join("data", "annotations.npz"), hashlib.sha256(source).hexdigest())
+if compiled is None:
+    compiled = annotations.compile_annotations(json.loads(source)["template.jpg"]["regions"], template_image.shape)
+region_map = render.RegionMap(compiled, template_image.shape)
+done = time.perf_counter()
+digest = hashlib.sha256(template_image.tobytes() + region_map.label_image.tobytes()).hexdigest()
+print(json.dumps({"backend": backend.name, "import_s": imported - start, "first_map_s": done - imported,
+                  "import_rss_kb": import_rss, "rss_kb": rss_kb(),
+                  "cv2_loaded": "cv2" in sys.modules, "digest": digest}))
+"""
+
+
+def run(backend):
+    output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT, backend],
+                            cwd=BASE_DIR, check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def main():
+    print(f"{'backend':>8} {'import ms':>10} {'first map ms':>13} {'import RSS KB':>14} "
+          f"{'RSS KB':>9} {'cv2':>5}")
+    digests = {}
+    for name in BACKENDS:
+        runs = [run(name) for _ in range(REPEAT)]
+        result = min(runs, key=lambda r: r["import_s"] + r["first_map_s"])
+        digests[result["backend"]] = result["digest"]
+        print(f"{result['backend']:>8} {result['import_s'] * 1e3:>10.1f} {result['first_map_s'] * 1e3:>13.1f} "
+              f"{result['import_rss_kb']:>14} {result['rss_kb']:>9} "
+              f"{str(result['cv2_loaded']):>5}")
+    if len(set(digests.values())) > 1:
+        print("Backends disagree:", digests)
+        sys.exit(1)
+    print("Template and region map identical across backends:", ", ".join(digests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# Compares loading the exercise catalog from the CSV against the binary
+# catalog written by planner.prep_data, on the real catalog and on synthetic
+# copies grown to larger sizes. Each load runs in a fresh interpreter so the
+# RSS numbers are not polluted by earlier loads.
+#
+#   python -m benchmarks.bench_catalog_load
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from planner import catalog
+from planner.data_store import BASE_DIR, EXERCISE_PATH, file_digest
+
+CATALOG_SIZES = [420, 100_000, 1_000_000]
+
+LOAD_SCRIPT = """
+import json, resource, sys, time
+import pandas as pd
+from planner.data_store import read_exercise_data
+from planner import catalog
+
+def rss_kb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() // 1024
+
+csv_path, arrow_path, mode = sys.argv[1:]
+before = rss_kb()
+start = time.perf_counter()
+if mode == "csv":
+    # What app.py did before the binary catalog existed
+    df = pd.read_csv(csv_path)
+    df["muscle_gp"] = df["muscle_gp"].str.replace(" ", "")
+else:
+    df = read_exercise_data(csv_path, arrow_path)
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "rss_kb": rss_kb() - before,
+                  "frame_kb": int(df.memory_usage(deep=True).sum()) // 1024}))
+"""
+
+
+def run(csv_path, arrow_path, mode):
+    output = subprocess.run([sys.executable, "-c", LOAD_SCRIPT, csv_path, arrow_path, mode],
+                            cwd=BASE_DIR, check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def main():
+    base = pd.read_csv(EXERCISE_PATH)
+    print(f"{'catalog':>9} {'format':>7} {'file KB':>9} {'load ms':>9} {'RSS KB':>9} {'frame KB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in CATALOG_SIZES:
+            rows = base.iloc[np.arange(size) % len(base)].reset_index(drop=True)
+            if size != len(base):
+                rows["Exercise_Name"] = [f"{name} #{i}" for i, name in enumerate(rows["Exercise_Name"])]
+            csv_path = os.path.join(tmp, f"catalog_{size}.csv")
+            arrow_path = os.path.join(tmp, f"catalog_{size}.arrow")
+            rows.to_csv(csv_path, index=False)
+            catalog.write_table(catalog.clean_catalog(rows), arrow_path, file_digest(csv_path))
+
+            for mode, path in (("csv", csv_path), ("arrow", arrow_path)):
+                result = run(csv_path, arrow_path, mode)
+                print(f"{size:>9} {mode:>7} {os.path.getsize(path) // 1024:>9} "
+                      f"{result['seconds'] * 1e3:>9.1f} {result['rss_kb']:>9} {result['frame_kb']:>9}")
+
+
+if __name__ == "__main__":
+    main()
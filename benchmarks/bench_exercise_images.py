@@ -0,0 +1,114 @@
+# Exercise thumbnail cache against a local stand-in for the image host, no
+# network needed: every catalog image URL is served by a local HTTP server
+# as a generated 800x600 JPEG, different for every path, after a simulated
+# latency. Measures a cold
+# prefetch of a search page of images at several concurrency limits, reads
+# of cached thumbnails, and eviction under a small size limit.
+#
+#   python -m benchmarks.bench_exercise_images
+import hashlib
+import io
+import statistics
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote
+
+import numpy as np
+from PIL import Image
+
+from planner import data_store
+from planner.exercise_images import ThumbnailCache, http_fetch
+from planner.search import PAGE_SIZE
+
+LATENCY = 0.1
+CONCURRENCY = [1, 4, 8, 16]
+
+
+# Serves a JPEG for any path: the same noise with a block whose color
+# depends on the path, so that the cache (keyed by content) sees different
+# images
+class StandInHandler(BaseHTTPRequestHandler):
+    pixels = None
+    bodies = {}
+    lock = threading.Lock()
+
+    def body(self):
+        with self.lock:
+            if self.path not in self.bodies:
+                pixels = self.pixels.copy()
+                pixels[:200, :200] = list(hashlib.sha256(self.path.encode()).digest()[:3])
+                buffer = io.BytesIO()
+                Image.fromarray(pixels).save(buffer, format="JPEG")
+                self.bodies[self.path] = buffer.getvalue()
+            return self.bodies[self.path]
+
+    def do_GET(self):
+        time.sleep(LATENCY)
+        body = self.body()
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stand_in():
+    rng = np.random.default_rng(0)
+    StandInHandler.pixels = rng.integers(0, 255, (600, 800, 3), dtype=np.uint8)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# Fetcher sending every URL to the stand-in server instead of its host
+def stand_in_fetcher(server):
+    base = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    async def fetch(url):
+        return await http_fetch(base + quote(url, safe=""))
+    return fetch
+
+
+def main():
+    urls = data_store.get_exercise_urls()["Exercise_Image"].dropna().tolist()
+    page = urls[:PAGE_SIZE]
+    server = start_stand_in()
+    fetcher = stand_in_fetcher(server)
+
+    print(f"Cold prefetch of {len(page)} images, {LATENCY * 1e3:.0f} ms simulated latency each")
+    print(f"{'concurrency':>12} {'seconds':>8} {'fetched':>8}")
+    for concurrency in CONCURRENCY:
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ThumbnailCache(directory, fetcher=fetcher, concurrency=concurrency)
+            start = time.perf_counter()
+            cache.prefetch(page).result()
+            print(f"{concurrency:>12} {time.perf_counter() - start:>8.2f} {cache.stats()['fetched']:>8}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ThumbnailCache(directory, fetcher=fetcher)
+        cache.prefetch(page).result()
+        times = []
+        for _ in range(20):
+            for url in page:
+                start = time.perf_counter()
+                assert cache.get(url) is not None
+                times.append(time.perf_counter() - start)
+        thumbnail_bytes = cache.stats()["bytes"] / len(page)
+        print(f"Cached read: p50 {statistics.median(times) * 1e3:.3f} ms, "
+              f"{thumbnail_bytes / 1024:.1f} KB per thumbnail "
+              f"(source {statistics.mean(map(len, StandInHandler.bodies.values())) / 1024:.0f} KB)")
+
+        # Reopened with room for half of them: the least recently read go
+        small = ThumbnailCache(directory, max_bytes=int(thumbnail_bytes * len(page) / 2), fetcher=fetcher)
+        small.prefetch(urls[PAGE_SIZE:PAGE_SIZE + 5]).result()
+        print(f"Reopened with half the limit, fetched 5 more: {small.stats()}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# Compares counting muscles with the old per-exercise DataFrame scan against
+# the precomputed ExerciseIndex on synthetic catalogs of growing size.
+#
+#   python -m benchmarks.bench_exercise_index
+import time
+
+import numpy as np
+
+from planner.data_store import read_exercise_data
+from planner.exercise_index import ExerciseIndex
+
+CATALOG_SIZES = [420, 10_000, 100_000, 250_000]
+SELECTION_SIZES = [1, 10, 50]
+
+
+# The counting loop highlight_muscles() used before the index existed
+def scan_muscle_counts(selected_exercises, exercise_data):
+    muscle_counts = {}
+    for exercise in selected_exercises:
+        muscles = exercise_data[exercise_data["Exercise_Name"] == exercise]["muscle_gp"].values
+        for muscle in muscles:
+            muscle_counts[muscle] = muscle_counts.get(muscle, 0) + 1
+    return muscle_counts
+
+
+# Grow the real catalog to the requested size by renaming copies of its rows
+def make_catalog(size, base):
+    rows = base.iloc[np.arange(size) % len(base)].reset_index(drop=True)
+    rows["Exercise_Name"] = [f"{name} #{i}" for i, name in enumerate(rows["Exercise_Name"])]
+    return rows
+
+
+def best_of(func, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    base = read_exercise_data()
+    rng = np.random.default_rng(0)
+    print(f"{'catalog':>9} {'selected':>9} {'build ms':>9} {'scan ms':>10} {'index ms':>9} {'speedup':>8}")
+    for size in CATALOG_SIZES:
+        catalog = base if size == len(base) else make_catalog(size, base)
+        build, index = best_of(lambda: ExerciseIndex(catalog), repeat=1)
+        for n in SELECTION_SIZES:
+            selection = list(rng.choice(catalog["Exercise_Name"].to_numpy(), n, replace=False))
+            scan, expected = best_of(lambda: scan_muscle_counts(selection, catalog), repeat=1)
+            indexed, counts = best_of(lambda: index.muscle_counts(selection))
+            assert counts == expected, (counts, expected)
+            print(f"{size:>9} {n:>9} {build * 1e3:>9.1f} {scan * 1e3:>10.2f} "
+                  f"{indexed * 1e3:>9.3f} {scan / indexed:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
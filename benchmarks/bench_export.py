@@ -0,0 +1,62 @@
+# Printable sheet exports: time of a first and a repeated export of the same
+# plan, and the latency of interactive renders (render_heatmap without a
+# cache) while a burst of different exports is queued on the export pool.
+#
+#   python -m benchmarks.bench_export
+import random
+import statistics
+import time
+
+from planner import data_store
+from planner.export import MAX_PENDING, PlanExporter
+from planner.heatmap_cache import HeatmapCache, render_heatmap
+
+
+def wait(exporter, key):
+    while exporter.status(key)["state"] == "pending":
+        time.sleep(0.005)
+    return exporter.status(key)
+
+
+def render_latencies(selections):
+    exercise_index = data_store.get_exercise_index()
+    region_map = data_store.get_region_map()
+    template_image = data_store.get_template_image()
+    cache = HeatmapCache(max_bytes=0)
+    times = []
+    for selection in selections:
+        start = time.perf_counter()
+        render_heatmap(selection, exercise_index, region_map, template_image, cache=cache)
+        times.append(time.perf_counter() - start)
+    return sorted(times)
+
+
+def main():
+    names = list(data_store.get_exercise_index().names)
+    random.seed(0)
+    plans = [random.sample(names, 12) for _ in range(MAX_PENDING)]
+    selections = [random.sample(names, 8) for _ in range(40)]
+
+    for format in ("PDF", "PNG"):
+        exporter = PlanExporter()
+        start = time.perf_counter()
+        status = wait(exporter, exporter.submit(plans[0], format))
+        first = time.perf_counter() - start
+        start = time.perf_counter()
+        wait(exporter, exporter.submit(plans[0], format))
+        again = time.perf_counter() - start
+        print(f"{format}: {len(status['data'])} bytes, first export {first * 1e3:.0f} ms, "
+              f"repeated {again * 1e3:.2f} ms")
+
+    idle = render_latencies(selections)
+    exporter = PlanExporter()
+    keys = [exporter.submit(plan, "PDF") for plan in plans]
+    busy = render_latencies(selections)
+    for key in keys:
+        wait(exporter, key)
+    print(f"render_heatmap p50/p95 ms, idle: {statistics.median(idle) * 1e3:.1f}/{idle[-2] * 1e3:.1f}, "
+          f"with {len(plans)} exports queued: {statistics.median(busy) * 1e3:.1f}/{busy[-2] * 1e3:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+# Times WorkoutGenerator on synthetic catalogs of growing size, from a few
+# targets with an equipment filter up to every muscle group at once.
+#
+#   python -m benchmarks.bench_generator
+from benchmarks.bench_exercise_index import best_of, make_catalog
+from planner.data_store import read_exercise_data
+from planner.exercise_index import ExerciseIndex
+from planner.generator import WorkoutGenerator
+
+CATALOG_SIZES = [420, 10_000, 100_000, 250_000]
+
+
+def main():
+    base = read_exercise_data()
+    requests = [
+        ("legs, machine", ["Quadriceps", "Hamstrings", "Glutes", "Calves"], ["Machine"], 8),
+        ("push, free weights", ["Chest", "Shoulders", "Triceps"], ["Dumbbell", "Barbell"], 12),
+        ("every muscle", None, [], 20),
+    ]
+    print(f"{'catalog':>9} {'build ms':>9} {'request':>20} {'picked':>7} {'generate ms':>12}")
+    for size in CATALOG_SIZES:
+        catalog = base if size == len(base) else make_catalog(size, base)
+        index = ExerciseIndex(catalog)
+        build, generator = best_of(lambda: WorkoutGenerator(catalog, index), repeat=1)
+        for label, muscles, equipment, budget in requests:
+            muscles = list(index.muscle_names) if muscles is None else muscles
+            elapsed, workout = best_of(lambda: generator.generate(muscles, equipment, budget))
+            print(f"{size:>9} {build * 1e3:>9.1f} {label:>20} {len(workout):>7} {elapsed * 1e3:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
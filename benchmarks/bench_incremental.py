@@ -0,0 +1,81 @@
+# Per-interaction latency when a session adds or removes one exercise at a
+# time: the full render (count, paint, encode) against IncrementalHeatmap,
+# both without a heatmap cache, plus the count on its own since painting and
+# encoding are the same for both. Every incremental frame is checked against
+# the full render.
+#
+#   python -m benchmarks.bench_incremental
+import random
+import statistics
+import time
+
+from planner import data_store
+from planner.heatmap_cache import HeatmapCache, IncrementalHeatmap, encode_image
+
+STEPS = 200
+
+
+# Add or remove one exercise per step, keeping the selection around 5-25 long
+def interactions(names, steps, seed=0):
+    rng = random.Random(seed)
+    selection = rng.sample(names, 10)
+    sequence = []
+    for _ in range(steps):
+        if len(selection) > 25 or (len(selection) > 5 and rng.random() < 0.5):
+            selection = [name for name in selection if name != rng.choice(selection)]
+        else:
+            selection = selection + [rng.choice([name for name in names if name not in selection])]
+        sequence.append(selection)
+    return sequence
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def report(label, times):
+    times = sorted(times)
+    print(f"{label:>28} {statistics.median(times) * 1e3:>9.3f} {times[int(len(times) * 0.95)] * 1e3:>9.3f}")
+
+
+def main():
+    exercise_index = data_store.get_exercise_index()
+    region_map = data_store.get_region_map()
+    template_image = data_store.get_template_image()
+    sequence = interactions(list(exercise_index.names), STEPS)
+
+    # A cache that keeps nothing, so every step renders
+    incremental = IncrementalHeatmap(exercise_index, region_map, template_image, cache=HeatmapCache(max_bytes=0))
+    times = {name: [] for name in ("full count", "full paint", "full render",
+                                   "incremental count", "incremental render")}
+    previous = sequence[0]
+    for selection in sequence:
+        elapsed, levels = timed(lambda: region_map.levels(exercise_index.muscle_intensity(selection)))
+        times["full count"].append(elapsed)
+        elapsed, frame = timed(region_map.paint, levels, template_image)
+        times["full paint"].append(elapsed)
+        elapsed, data = timed(encode_image, frame)
+        times["full render"].append(times["full count"][-1] + times["full paint"][-1] + elapsed)
+
+        elapsed, _ = timed(incremental.render, selection)
+        times["incremental render"].append(elapsed)
+        assert incremental.render(selection) == data
+        assert (incremental.levels() == levels).all()
+
+        # Count of the same step in isolation
+        counter = IncrementalHeatmap(exercise_index, region_map, template_image)
+        counter.update_intensity(previous)
+        elapsed, _ = timed(counter.update_intensity, selection)
+        times["incremental count"].append(elapsed)
+        previous = selection
+
+    print(f"{STEPS} single-exercise changes, no heatmap cache")
+    print(f"{'':>28} {'p50 ms':>9} {'p95 ms':>9}")
+    for name, values in times.items():
+        report(name, values)
+
+
+if __name__ == "__main__":
+    main()
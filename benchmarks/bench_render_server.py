@@ -0,0 +1,103 @@
+# Load test for planner.render_server: starts the server, then keeps a number
+# of concurrent keep-alive clients requesting random workouts and reports
+# throughput and latency percentiles, for cold renders, cache hits and
+# conditional requests answered with 304.
+#
+#   python -m benchmarks.bench_render_server --clients 32 --requests 2000
+import argparse
+import asyncio
+import random
+import subprocess
+import sys
+import time
+from urllib.parse import quote
+
+import numpy as np
+
+from planner.data_store import BASE_DIR, read_exercise_data
+
+
+async def request(reader, writer, target, etag=None):
+    lines = [f"GET {target} HTTP/1.1", "Host: localhost"]
+    if etag:
+        lines.append(f"If-None-Match: {etag}")
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+    await writer.drain()
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    status = int(head[0].split(" ")[1])
+    headers = {}
+    for line in head[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    await reader.readexactly(int(headers["content-length"]))
+    return status, headers.get("etag")
+
+
+# Send every target once over `clients` keep-alive connections. With etags,
+# each request carries If-None-Match and is expected to come back as 304.
+async def run_phase(port, targets, clients, etags=None):
+    latencies = []
+    seen = {}
+
+    async def client(chunk):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        for target in chunk:
+            start = time.perf_counter()
+            status, etag = await request(reader, writer, target, etags and etags[target])
+            latencies.append(time.perf_counter() - start)
+            assert status == (304 if etags else 200), status
+            seen[target] = etag
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(targets[i::clients]) for i in range(clients)))
+    return time.perf_counter() - start, np.array(latencies), seen
+
+
+def report(name, elapsed, latencies):
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1e3
+    print(f"{name:>12} {len(latencies) / elapsed:>9.1f} {p50:>8.2f} {p95:>8.2f} {p99:>8.2f}")
+
+
+async def main_async(args):
+    names = list(read_exercise_data()["Exercise_Name"])
+    random.seed(0)
+    targets = ["/render?exercises=" + quote(",".join(random.sample(names, random.randint(3, 14))))
+               for _ in range(args.requests)]
+
+    server = subprocess.Popen([sys.executable, "-m", "planner.render_server", "--port", str(args.port)]
+                              + (["--workers", str(args.workers)] if args.workers else []),
+                              cwd=BASE_DIR, stdout=subprocess.DEVNULL)
+    try:
+        for _ in range(100):
+            try:
+                reader, writer = await asyncio.open_connection("127.0.0.1", args.port)
+                writer.close()
+                break
+            except OSError:
+                await asyncio.sleep(0.1)
+
+        print(f"{'phase':>12} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        elapsed, latencies, etags = await run_phase(args.port, targets, args.clients)
+        report("cold", elapsed, latencies)
+        elapsed, latencies, _ = await run_phase(args.port, targets, args.clients)
+        report("cached", elapsed, latencies)
+        elapsed, latencies, _ = await run_phase(args.port, targets, args.clients, etags)
+        report("304", elapsed, latencies)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8599)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=None)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# Scalability of the real loaders and renderer on synthetic data (see
+# benchmarks/synthetic.py): time and memory of every loading and rendering
+# step against catalog size, and against the number and density of
+# annotation regions. Results go to benchmarks/results/scalability-<time>.json
+# and a plot of them to scalability-<time>.png (matplotlib, see
+# requirements-dev.txt).
+#
+#   python -m benchmarks.bench_scalability
+#   python -m benchmarks.bench_scalability --catalog-sizes 10000 100000 --annotation-sizes 100x50 500x200
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import matplotlib
+import numpy as np
+
+from benchmarks import synthetic
+from planner import annotations, catalog, data_store
+from planner.exercise_index import ExerciseIndex
+from planner.render import RegionMap, highlight_muscles
+from planner.search import SearchIndex
+from planner.svg_overlay import SvgOverlay
+
+RESULTS_DIR = os.path.join(data_store.BASE_DIR, "benchmarks", "results")
+CATALOG_SIZES = [10_000, 100_000, 1_000_000]
+CATALOG_MUSCLES = 60
+# regions x vertices per polygon
+ANNOTATION_SIZES = [(100, 50), (500, 200), (1_000, 500), (2_000, 1_000)]
+SELECTION_SIZE = 20
+
+
+# Best time of a few calls, then the peak and the retained Python/NumPy
+# allocations of one more call traced on its own (Arrow buffers are not
+# traced)
+def measure(func, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    del result
+    tracemalloc.start()
+    result = func()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ms": best * 1e3, "peak_mb": peak / 2**20, "retained_mb": retained / 2**20}, result
+
+
+def catalog_steps(size, directory, template_image, region_map):
+    csv_path = os.path.join(directory, f"catalog-{size}.csv")
+    arrow_path = os.path.join(directory, f"catalog-{size}.arrow")
+    synthetic.make_catalog(size, CATALOG_MUSCLES).to_csv(csv_path, index=False)
+    repeat = 1 if size >= 1_000_000 else 3
+    missing = os.path.join(directory, "missing.arrow")
+
+    steps = {}
+    steps["parse_csv"], exercise_data = measure(lambda: data_store.read_exercise_data(csv_path, missing), repeat)
+    steps["compile_arrow"], _ = measure(
+        lambda: catalog.write_table(exercise_data, arrow_path, data_store.file_digest(csv_path)), repeat)
+    steps["load_arrow"], exercise_data = measure(lambda: data_store.read_exercise_data(csv_path, arrow_path))
+    steps["exercise_index"], exercise_index = measure(lambda: ExerciseIndex(exercise_data), repeat)
+    steps["search_index"], search_index = measure(lambda: SearchIndex(exercise_data), repeat)
+    steps["search_page"], results = measure(lambda: search_index.search("incline press", [], [], 0), 10)
+    muscle = exercise_index.muscle_names[0]
+    steps["filter_page"], _ = measure(lambda: search_index.search("", [muscle], ["Dumbbell"], 3), 10)
+    selection = random.Random(0).sample(list(exercise_index.names), SELECTION_SIZE)
+    steps["highlight_muscles"], _ = measure(
+        lambda: highlight_muscles(selection, exercise_index, region_map, template_image), 10)
+    return {"exercises": size, "csv_mb": os.path.getsize(csv_path) / 2**20,
+            "multiselect_options": len(results["names"]), "steps": steps}
+
+
+def annotation_steps(regions, vertices, directory, template_image):
+    path = os.path.join(directory, f"annotations-{regions}x{vertices}.json")
+    compiled_path = os.path.join(directory, f"annotations-{regions}x{vertices}.npz")
+    with open(path, "w") as f:
+        json.dump(synthetic.make_annotations(regions, vertices, CATALOG_MUSCLES, template_image.shape[:2]), f)
+    muscles = {muscle.replace(" ", "") for muscle in synthetic.muscle_names(CATALOG_MUSCLES)}
+    digest = data_store.file_digest(path)
+
+    steps = {}
+    steps["read_json"], muscle_data = measure(lambda: data_store.read_muscle_data(path))
+    steps["compile"], compiled = measure(
+        lambda: annotations.compile_annotations(muscle_data, template_image.shape[:2], muscles), 1)
+    annotations.write_compiled(compiled, compiled_path, digest)
+    steps["load_compiled"], compiled = measure(lambda: annotations.read_compiled(compiled_path, digest))
+    steps["region_map"], region_map = measure(lambda: RegionMap(compiled, template_image.shape), 1)
+    levels = np.full(len(region_map.labels) + 1, 100, dtype=np.uint16)
+    steps["paint_all"], _ = measure(lambda: region_map.paint(levels, template_image), 10)
+    overlay = SvgOverlay(compiled)
+    steps["svg_overlay"], html = measure(lambda: overlay.html(levels, "template.jpg"), 10)
+    return {"regions": regions, "vertices": vertices, "json_mb": os.path.getsize(path) / 2**20,
+            "overlap_pixels": len(region_map.overlap_pixels), "svg_kb": len(html) / 1024, "steps": steps}
+
+
+def print_table(title, key, rows):
+    steps = list(rows[0]["steps"])
+    print(f"\n{title}: ms (peak MB)")
+    print(f"{key:>12} " + " ".join(f"{step:>20}" for step in steps))
+    for row in rows:
+        label = row[key] if key == "exercises" else f"{row['regions']}x{row['vertices']}"
+        print(f"{label:>12} " + " ".join(
+            f"{row['steps'][step]['ms']:>11.1f} ({row['steps'][step]['peak_mb']:>6.1f})" for step in steps))
+
+
+# Time and peak memory of every step against size, log-log
+def plot(results, path):
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    figure, axes = plt.subplots(2, 2, figsize=(12, 9))
+    for row, (name, sizes, x_label) in enumerate((
+        ("catalogs", [r["exercises"] for r in results["catalogs"]], "exercises"),
+        ("annotations", [r["regions"] * r["vertices"] for r in results["annotations"]], "total vertices"),
+    )):
+        rows = results[name]
+        if not rows:
+            continue
+        for step in rows[0]["steps"]:
+            for column, (metric, y_label) in enumerate((("ms", "time (ms)"), ("peak_mb", "peak memory (MB)"))):
+                axes[row, column].plot(sizes, [max(r["steps"][step][metric], 1e-3) for r in rows],
+                                       marker="o", label=step)
+                axes[row, column].set(xscale="log", yscale="log", xlabel=x_label, ylabel=y_label,
+                                      title=f"{name}: {y_label}")
+        axes[row, 0].legend(fontsize=8)
+    figure.tight_layout()
+    figure.savefig(path, dpi=100)
+    plt.close(figure)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the loaders and renderer on synthetic data.")
+    parser.add_argument("--catalog-sizes", type=int, nargs="*", default=CATALOG_SIZES)
+    parser.add_argument("--annotation-sizes", nargs="*", default=[f"{r}x{v}" for r, v in ANNOTATION_SIZES],
+                        help="REGIONSxVERTICES")
+    args = parser.parse_args(argv)
+
+    template_image = data_store.get_template_image()
+    region_map = data_store.get_region_map()
+    results = {"catalogs": [], "annotations": []}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.catalog_sizes:
+            results["catalogs"].append(catalog_steps(size, directory, template_image, region_map))
+            print(f"catalog {size} done")
+        for spec in args.annotation_sizes:
+            regions, vertices = (int(value) for value in spec.split("x"))
+            results["annotations"].append(annotation_steps(regions, vertices, directory, template_image))
+            print(f"annotations {spec} done")
+
+    if results["catalogs"]:
+        print_table("Catalogs", "exercises", results["catalogs"])
+    if results["annotations"]:
+        print_table("Annotations", "regions", results["annotations"])
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    stem = os.path.join(RESULTS_DIR, f"scalability-{time.strftime('%Y%m%d-%H%M%S')}")
+    with open(stem + ".json", "w") as f:
+        json.dump(results, f, indent=2)
+    plot(results, stem + ".png")
+    print(f"\nResults written to {stem}.json and {stem}.png")
+
+
+if __name__ == "__main__":
+    main()
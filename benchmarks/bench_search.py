@@ -0,0 +1,54 @@
+# Times building the SearchIndex and answering typical searches on synthetic
+# catalogs of growing size, next to the DataFrame filter the same search
+# would need without the index.
+#
+#   python -m benchmarks.bench_search
+import re
+
+from benchmarks.bench_exercise_index import best_of, make_catalog
+from planner.data_store import read_exercise_data
+from planner.search import PAGE_SIZE, SearchIndex
+
+CATALOG_SIZES = [420, 10_000, 50_000, 100_000]
+SEARCHES = [
+    ("", (), ()),
+    ("pr", (), ()),
+    ("press", (), ()),
+    ("dumbbell curl", (), ()),
+    ("bar", ("Chest", "Shoulders"), ()),
+    ("", ("Quadriceps",), ("Machine",)),
+]
+
+
+# First page of the same search done with pandas string matching
+def scan_search(catalog, query, muscles, equipment):
+    mask = catalog["Exercise_Name"].notna()
+    names = catalog["Exercise_Name"].str.lower()
+    for term in query.lower().split():
+        if len(term) < 3:
+            mask &= names.str.contains(r"(?<![^\W_])" + re.escape(term))
+        else:
+            mask &= names.str.contains(term, regex=False)
+    if muscles:
+        mask &= catalog["muscle_gp"].isin(muscles)
+    if equipment:
+        mask &= catalog["Equipment"].isin(equipment)
+    return catalog[mask].sort_values(["Rating", "Exercise_Name"], ascending=[False, True]).head(PAGE_SIZE)
+
+
+def main():
+    base = read_exercise_data()
+    print(f"{'catalog':>9} {'build ms':>9} {'query':>30} {'matches':>8} {'scan ms':>9} {'index ms':>9}")
+    for size in CATALOG_SIZES:
+        catalog = base if size == len(base) else make_catalog(size, base)
+        build, index = best_of(lambda: SearchIndex(catalog), repeat=1)
+        for query, muscles, equipment in SEARCHES:
+            scan, _ = best_of(lambda: scan_search(catalog, query, muscles, equipment), repeat=3)
+            indexed, results = best_of(lambda: index.search(query, muscles, equipment))
+            label = " ".join([repr(query)] + list(muscles) + list(equipment))
+            print(f"{size:>9} {build * 1e3:>9.1f} {label[:30]:>30} {results['total']:>8} "
+                  f"{scan * 1e3:>9.2f} {indexed * 1e3:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# Memory of the app process against the number of connected sessions. Each
+# run builds the state of N sessions with random selections in a fresh
+# process and reports its RSS, for three layouts:
+#   copies  every session holds its own catalog, annotations, decoded
+#           template, highlighted copy and encoded image, as the planner
+#           page used to build them per session
+#   frame   shared assets, each session keeps its renderer with the last
+#           frame it painted (the renderer before it was trimmed)
+#   shared  shared assets and heatmap cache, each session keeps only its
+#           selection and intensity vector
+# Results go to benchmarks/results/session-memory-<time>.json.
+#
+#   python -m benchmarks.bench_session_memory
+#   python -m benchmarks.bench_session_memory --sessions 10 100 --modes frame shared
+import argparse
+import gc
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+from planner import data_store, memory
+from planner.heatmap_cache import IncrementalHeatmap, encode_image
+
+RESULTS_DIR = os.path.join(data_store.BASE_DIR, "benchmarks", "results")
+SESSIONS = [10, 100, 500]
+MODES = ["copies", "frame", "shared"]
+
+
+# A premade workout or 5-15 random exercises, like the selections of real
+# sessions
+def random_selection(rng, names, premade_workouts):
+    if rng.random() < 0.3:
+        return list(rng.choice(list(premade_workouts.values())))
+    return rng.sample(names, rng.randint(5, 15))
+
+
+def copies_session(selection, exercise_index, region_map):
+    template_image = data_store.read_template_image()
+    levels = region_map.levels(exercise_index.muscle_intensity(selection))
+    highlighted_image = region_map.paint(levels, template_image)
+    return {"selected_exercises": selection,
+            "exercise_data": data_store.read_exercise_data(),
+            "muscle_data": data_store.read_muscle_data(),
+            "template_image": template_image,
+            "highlighted_image": highlighted_image,
+            "image": encode_image(highlighted_image)}
+
+
+def frame_session(selection, exercise_index, region_map, template_image):
+    heatmap = IncrementalHeatmap(exercise_index, region_map, template_image)
+    image = heatmap.render(selection)
+    frame = region_map.paint(heatmap.levels(), template_image)
+    return {"selected_exercises": selection, "heatmap": heatmap, "frame": frame, "image": image}
+
+
+def shared_session(selection, exercise_index, region_map, template_image):
+    heatmap = IncrementalHeatmap(exercise_index, region_map, template_image)
+    return {"selected_exercises": selection, "heatmap": heatmap, "image": heatmap.render(selection)}
+
+
+# Build the sessions of one mode in this process, returns its measurements
+def run_child(mode, count):
+    exercise_index = data_store.get_exercise_index()
+    region_map = data_store.get_region_map()
+    template_image = data_store.get_template_image()
+    premade_workouts = data_store.get_premade_workouts()
+    names = list(exercise_index.names)
+    gc.collect()
+    baseline = memory.rss_bytes()
+
+    rng = random.Random(0)
+    start = time.perf_counter()
+    sessions = []
+    for _ in range(count):
+        selection = random_selection(rng, names, premade_workouts)
+        if mode == "copies":
+            sessions.append(copies_session(selection, exercise_index, region_map))
+        elif mode == "frame":
+            sessions.append(frame_session(selection, exercise_index, region_map, template_image))
+        else:
+            sessions.append(shared_session(selection, exercise_index, region_map, template_image))
+    seconds = time.perf_counter() - start
+    gc.collect()
+    rss = memory.rss_bytes()
+
+    shared, shared_seen = memory.shared_bytes()
+    session_sizes = [sum(memory.session_bytes(state, shared_seen).values()) for state in sessions]
+    return {"mode": mode, "sessions": count, "seconds": seconds, "baseline_rss_mb": baseline / 2**20,
+            "rss_mb": rss / 2**20, "rss_per_session_kb": (rss - baseline) / count / 1024,
+            "shared_mb": sum(shared.values()) / 2**20,
+            "session_kb_mean": sum(session_sizes) / count / 1024}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RSS of the app process against the number of sessions.")
+    parser.add_argument("--sessions", type=int, nargs="*", default=SESSIONS)
+    parser.add_argument("--modes", nargs="*", choices=MODES, default=MODES)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "SESSIONS"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_child(args.child[0], int(args.child[1]))))
+        return
+
+    results = []
+    print(f"{'mode':>8} {'sessions':>9} {'RSS MB':>8} {'RSS/session KB':>15} {'state/session KB':>17} {'shared MB':>10}")
+    for mode in args.modes:
+        for count in args.sessions:
+            # A fresh process per run so that RSS is not left over from the last
+            output = subprocess.run([sys.executable, "-m", "benchmarks.bench_session_memory",
+                                     "--child", mode, str(count)],
+                                    cwd=data_store.BASE_DIR, capture_output=True, text=True, check=True).stdout
+            result = json.loads(output.splitlines()[-1])
+            results.append(result)
+            print(f"{mode:>8} {count:>9} {result['rss_mb']:>8.1f} {result['rss_per_session_kb']:>15.1f} "
+                  f"{result['session_kb_mean']:>17.1f} {result['shared_mb']:>10.1f}")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"session-memory-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# Payload and render time of the two output modes for the premade workouts
+# and random selections: the PNG sent through st.image on every rerun
+# against the SVG overlay (the template itself is fetched once). Sizes are
+# also given gzipped, as the websocket and HTTP transfers may be compressed.
+#
+#   python -m benchmarks.bench_svg_overlay
+import gzip
+import os
+import random
+
+from benchmarks.bench_exercise_index import best_of
+from planner import data_store
+from planner.heatmap_cache import encode_image
+from planner.svg_overlay import get_svg_overlay, get_template_url
+
+SELECTION_SIZES = [1, 5, 15, 40]
+
+
+def main():
+    exercise_index = data_store.get_exercise_index()
+    region_map = data_store.get_region_map()
+    template_image = data_store.get_template_image()
+    overlay = get_svg_overlay()
+    template_url = get_template_url()
+
+    random.seed(0)
+    selections = dict(data_store.get_premade_workouts())
+    selections.update({f"random {n}": random.sample(list(exercise_index.names), n) for n in SELECTION_SIZES})
+
+    template_bytes = os.path.getsize(data_store.TEMPLATE_PATH)
+    print(f"Template fetched once in SVG mode: {template_bytes} bytes")
+    print(f"{'selection':>16} {'PNG B':>8} {'PNG gz B':>9} {'PNG ms':>8} {'SVG B':>7} {'SVG gz B':>9} {'SVG ms':>8}")
+    for name, selection in selections.items():
+        levels = region_map.levels(exercise_index.muscle_intensity(selection))
+        raster_time, png = best_of(lambda: encode_image(region_map.paint(levels, template_image)), repeat=3)
+        svg_time, html = best_of(lambda: overlay.html(levels, template_url), repeat=20)
+        html = html.encode()
+        print(f"{name:>16} {len(png):>8} {len(gzip.compress(png)):>9} {raster_time * 1e3:>8.2f} "
+              f"{len(html):>7} {len(gzip.compress(html)):>9} {svg_time * 1e3:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
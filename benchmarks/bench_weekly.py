@@ -0,0 +1,51 @@
+# Render time of a weekly plan: the batched render_week() (weekly heatmap
+# plus the strip of day thumbnails) against a single render_heatmap() and
+# against one highlight_muscles() + encode per day and for the week. No
+# heatmap cache is kept, so every call renders.
+#
+#   python -m benchmarks.bench_weekly
+import random
+
+import numpy as np
+
+from benchmarks.bench_exercise_index import best_of
+from planner import data_store
+from planner.heatmap_cache import HeatmapCache, encode_image, render_heatmap
+from planner.render import highlight_muscles
+from planner.weekly import DAYS, get_thumbnails, render_week
+
+
+def separate_renders(day_selections, exercise_index, region_map, template_image):
+    week = [name for selection in day_selections for name in selection]
+    return [encode_image(np.asarray(highlight_muscles(selection, exercise_index, region_map, template_image)))
+            for selection in day_selections + [week]]
+
+
+def main():
+    exercise_index = data_store.get_exercise_index()
+    region_map = data_store.get_region_map()
+    template_image = data_store.get_template_image()
+    thumbnails = get_thumbnails()
+    cache = HeatmapCache(max_bytes=0)
+
+    random.seed(0)
+    names = list(exercise_index.names)
+    plans = {
+        "3 days": [random.sample(names, 6) if i in (0, 2, 4) else [] for i in range(len(DAYS))],
+        "5 days": [random.sample(names, 8) if i < 5 else [] for i in range(len(DAYS))],
+        "7 days": [random.sample(names, 10) for _ in DAYS],
+    }
+    print(f"{'plan':>8} {'single ms':>10} {'week ms':>9} {'ratio':>6} {'separate ms':>12}")
+    for name, day_selections in plans.items():
+        week = [exercise for selection in day_selections for exercise in selection]
+        single, _ = best_of(lambda: render_heatmap(week, exercise_index, region_map, template_image, cache=cache))
+        batched, _ = best_of(lambda: render_week(day_selections, exercise_index, region_map, template_image,
+                                                 thumbnails, cache=cache))
+        separate, _ = best_of(lambda: separate_renders(day_selections, exercise_index, region_map,
+                                                       template_image), repeat=3)
+        print(f"{name:>8} {single * 1e3:>10.1f} {batched * 1e3:>9.1f} {batched / single:>5.2f}x "
+              f"{separate * 1e3:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
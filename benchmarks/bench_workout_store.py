@@ -0,0 +1,91 @@
+# Latency of the saved-workout operations a rerun performs (list, load,
+# save) while other processes keep saving workouts to the same database,
+# plus the "most popular exercises" aggregate. Runs on a throwaway database.
+#
+#   python -m benchmarks.bench_workout_store
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from planner import data_store
+from planner.workout_store import WorkoutStore
+
+WRITER_COUNTS = [0, 2, 8]
+USERS = 1_000
+SEED_WORKOUTS = 20_000
+OPERATIONS = 300
+
+
+def random_workout(rng, names):
+    return rng.sample(names, rng.randint(3, 15))
+
+
+def writer(path, names, stop, saves, seed):
+    store = WorkoutStore(path, pool_size=1)
+    rng = random.Random(seed)
+    while not stop.is_set():
+        store.save(f"user {rng.randrange(USERS)}", f"workout {rng.randrange(20)}", random_workout(rng, names))
+        with saves.get_lock():
+            saves.value += 1
+    store.close()
+
+
+def percentiles(times):
+    times = sorted(times)
+    return (f"{statistics.median(times) * 1e3:>7.2f} {times[int(len(times) * 0.95)] * 1e3:>7.2f} "
+            f"{times[int(len(times) * 0.99)] * 1e3:>7.2f}")
+
+
+def main():
+    names = list(data_store.get_exercise_index().names)
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "workouts.db")
+        store = WorkoutStore(path)
+        start = time.perf_counter()
+        for i in range(SEED_WORKOUTS):
+            store.save(f"user {i % USERS}", f"workout {i // USERS}", random_workout(rng, names))
+        print(f"Seeded {SEED_WORKOUTS} workouts of {USERS} users in {time.perf_counter() - start:.1f}s")
+
+        print(f"{'writers':>8} {'operation':>10} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7}  background saves/s")
+        for writers in WRITER_COUNTS:
+            stop = multiprocessing.Event()
+            saves = multiprocessing.Value("i", 0)
+            processes = [multiprocessing.Process(target=writer, args=(path, names, stop, saves, seed))
+                         for seed in range(writers)]
+            for process in processes:
+                process.start()
+            time.sleep(0.5 if writers else 0)
+
+            times = {"list": [], "load": [], "save": [], "popular": []}
+            saves_before = saves.value
+            begin = time.perf_counter()
+            for i in range(OPERATIONS):
+                user = f"user {rng.randrange(USERS)}"
+                for operation, call in (
+                    ("list", lambda: store.list(user)),
+                    ("load", lambda: store.load(user, "workout 0")),
+                    ("save", lambda: store.save(user, "bench", random_workout(rng, names))),
+                ):
+                    start = time.perf_counter()
+                    call()
+                    times[operation].append(time.perf_counter() - start)
+                if i % 30 == 0:
+                    start = time.perf_counter()
+                    store.popular_exercises()
+                    times["popular"].append(time.perf_counter() - start)
+            background = (saves.value - saves_before) / (time.perf_counter() - begin)
+            stop.set()
+            for process in processes:
+                process.join()
+
+            for operation, values in times.items():
+                print(f"{writers:>8} {operation:>10} {percentiles(values)}  {background:.0f}")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+# Load test of app.py with N concurrent simulated planners. A local
+# Streamlit server is started for every level of concurrency and each
+# session talks to it over the websocket protocol the browser uses, then
+# downloads the images it is shown. A session goes through the front page,
+# the planner page, each premade workout, then adds and removes exercises
+# from the search results, with a think time between steps, over and over
+# for the duration.
+# Reported are the reruns per second, rerun latency percentiles overall and
+# per step (from sending the widget change to the end of the script run),
+# image download times, and CPU and RSS of the server sampled over time
+# (read from /proc, so on Linux). Results go to
+# benchmarks/results/load-test-<time>.json. The websocket client comes from
+# requirements-dev.txt.
+#
+#   python -m benchmarks.load_test
+#   python -m benchmarks.load_test --sessions 1 8 32 --duration 60 --think-time 2
+#   python -m benchmarks.load_test --url http://localhost:8501     # a server already running
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+import websockets
+
+from planner.data_store import BASE_DIR
+
+APP_PATH = os.path.join(BASE_DIR, "app.py")
+RESULTS_DIR = os.path.join(BASE_DIR, "benchmarks", "results")
+SESSIONS = [1, 4, 16]
+DURATION = 30.0
+# Mean pause between two interactions of a session, in seconds
+THINK_TIME = 1.0
+# Exercises added one at a time, then removed one at a time, per journey
+ADDED_EXERCISES = 3
+SAMPLE_INTERVAL = 1.0
+STARTUP_TIMEOUT = 60
+RERUN_TIMEOUT = 60
+QUANTILES = (50, 95, 99)
+# Widget types whose value the simulated browser keeps and sends back
+WIDGETS = ("radio", "selectbox", "multiselect")
+
+
+def percentiles(seconds):
+    if not seconds:
+        return {f"p{q}_ms": None for q in QUANTILES}
+    values = np.percentile(seconds, QUANTILES) * 1e3
+    return {f"p{q}_ms": float(value) for q, value in zip(QUANTILES, values)}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_healthy(url, timeout=STARTUP_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(url + "/_stcore/health", timeout=2) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+        time.sleep(0.2)
+
+
+def start_server(port):
+    process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP_PATH, "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        cwd=BASE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_healthy(f"http://127.0.0.1:{port}")
+    except OSError:
+        process.kill()
+        raise
+    return process
+
+
+# (CPU seconds, RSS bytes) of a process, None where /proc is not available
+def process_usage(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/statm") as f:
+            resident = int(f.read().split()[1])
+    except OSError:
+        return None
+    cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    return cpu, resident * os.sysconf("SC_PAGE_SIZE")
+
+
+# Rerun and image download latencies of every session, and the CPU and RSS
+# of the server sampled every SAMPLE_INTERVAL
+class Recorder:
+    def __init__(self):
+        self.reruns = []
+        self.media = []
+        self.errors = []
+        self.samples = []
+        self.start = time.perf_counter()
+
+    def record(self, step, seconds, error=None):
+        self.reruns.append((time.perf_counter() - self.start, step, seconds))
+        if error is not None:
+            self.errors.append({"step": step, "error": error})
+
+    async def sample(self, pid):
+        last = (time.perf_counter(), process_usage(pid))
+        while last[1] is not None:
+            await asyncio.sleep(SAMPLE_INTERVAL)
+            now, usage = time.perf_counter(), process_usage(pid)
+            if usage is None:
+                return
+            self.samples.append({
+                "t": now - self.start,
+                "cpu_percent": (usage[0] - last[1][0]) / (now - last[0]) * 100,
+                "rss_mb": usage[1] / 2**20,
+                "reruns": len(self.reruns),
+            })
+            last = (now, usage)
+
+
+# One simulated browser tab. It keeps the value of every widget it changed
+# or the server set, like the frontend does, and sends them all with each
+# rerun request.
+class Session:
+    def __init__(self, url, recorder, deadline, think_time, seed):
+        self.url = url
+        self.recorder = recorder
+        self.deadline = deadline
+        self.think_time = think_time
+        self.rng = random.Random(seed)
+        self.widgets = {}
+        self.states = {}
+        self.fetched = set()
+        self.websocket = None
+
+    async def connect(self):
+
+        self.websocket = await websockets.connect(
+            self.url.replace("http", "ws", 1) + "/_stcore/stream", subprotocols=["streamlit"], max_size=None)
+
+    async def close(self):
+        if self.websocket is not None:
+            await self.websocket.close()
+
+    # Request a rerun with the current widget states and read the script's
+    # output until it finishes. Returns the error shown, if any.
+    async def rerun(self):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        message = BackMsg()
+        message.rerun_script.query_string = ""
+        message.rerun_script.widget_states.widgets.extend(self.states.values())
+        await self.websocket.send(message.SerializeToString())
+
+        widgets, images, errors = {}, [], []
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(await asyncio.wait_for(self.websocket.recv(), RERUN_TIMEOUT))
+            kind = forward.WhichOneof("type")
+            if kind == "script_finished":
+                if forward.script_finished == forward.FINISHED_WITH_COMPILE_ERROR:
+                    errors.append("compile error")
+                break
+            if kind != "delta" or forward.delta.WhichOneof("type") != "new_element":
+                continue
+            element = forward.delta.new_element
+            element_type = element.WhichOneof("type")
+            if element_type in WIDGETS:
+                widget = getattr(element, element_type)
+                widgets[widget.label] = (element_type, widget)
+                if widget.set_value:
+                    self.set_state(element_type, widget, list(widget.raw_values) if element_type == "multiselect"
+                                   else widget.raw_value)
+            elif element_type == "imgs":
+                images.extend(image.url for image in element.imgs.imgs)
+            elif element_type == "exception":
+                errors.append(element.exception.message)
+
+        # Widgets that were not shown this time are forgotten
+        ids = {widget.id for _, widget in widgets.values()}
+        self.states = {widget_id: state for widget_id, state in self.states.items() if widget_id in ids}
+        self.widgets = widgets
+        await self.fetch_images(images)
+        return "; ".join(errors) or None
+
+    def set_state(self, element_type, widget, value):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        state = WidgetState(id=widget.id)
+        if element_type == "multiselect":
+            state.string_array_value.data.extend(value)
+        else:
+            state.string_value = value
+        self.states[widget.id] = state
+
+    # Current value of a multiselect: the one sent last, or its defaults
+    def selection(self, label):
+        _, widget = self.widgets[label]
+        state = self.states.get(widget.id)
+        if state is not None:
+            return list(state.string_array_value.data)
+        return [widget.options[i] for i in widget.default]
+
+    # Download the images of a rerun the browser does not have yet
+    async def fetch_images(self, urls):
+        for url in urls:
+            if url in self.fetched:
+                continue
+            self.fetched.add(url)
+            start = time.perf_counter()
+            await asyncio.to_thread(lambda: urllib.request.urlopen(self.url + url, timeout=RERUN_TIMEOUT).read())
+            self.recorder.media.append(time.perf_counter() - start)
+
+    # Change a widget (by label) and rerun, timed. False once the test is over.
+    async def step(self, name, label, value):
+        if time.perf_counter() >= self.deadline:
+            return False
+        element_type, widget = self.widgets[label]
+        self.set_state(element_type, widget, value)
+        start = time.perf_counter()
+        try:
+            error = await self.rerun()
+        except Exception as exception:
+            error = repr(exception)
+        self.recorder.record(name, time.perf_counter() - start, error)
+        await asyncio.sleep(self.think_time * self.rng.uniform(0.5, 1.5))
+        return True
+
+    async def journey(self):
+        for page in ("Front Page", "Planner Page"):
+            if not await self.step(f"navigate.{page}", "Go to", page):
+                return False
+        _, workouts = self.widgets["Choose a Workout Plan:"]
+        for workout in list(workouts.options[1:]) + ["None"]:
+            if not await self.step("pick_workout", "Choose a Workout Plan:", workout):
+                return False
+        for _ in range(ADDED_EXERCISES):
+            selection = self.selection("Select Exercises:")
+            choices = [name for name in self.widgets["Select Exercises:"][1].options if name not in selection]
+            if choices and not await self.step("add_exercise", "Select Exercises:",
+                                               selection + [self.rng.choice(choices)]):
+                return False
+        for _ in range(ADDED_EXERCISES):
+            selection = self.selection("Select Exercises:")
+            if not selection:
+                break
+            removed = self.rng.choice(selection)
+            if not await self.step("remove_exercise", "Select Exercises:",
+                                   [name for name in selection if name != removed]):
+                return False
+        return True
+
+    async def run(self):
+        try:
+            await self.connect()
+            # Opening the page, not timed
+            await self.rerun()
+            while await self.journey():
+                pass
+        except Exception as exception:
+            self.recorder.record("session", 0.0, repr(exception))
+        finally:
+            await self.close()
+
+
+# Run `count` sessions, started evenly over `ramp_up` seconds, for
+# `duration` seconds once all are started
+async def run_level(url, count, duration, think_time, ramp_up, pid=None):
+    recorder = Recorder()
+    sampler = asyncio.create_task(recorder.sample(pid)) if pid else None
+    deadline = time.perf_counter() + ramp_up + duration
+    tasks = []
+    for seed in range(count):
+        tasks.append(asyncio.create_task(Session(url, recorder, deadline, think_time, seed).run()))
+        await asyncio.sleep(ramp_up / count)
+    await asyncio.gather(*tasks)
+    if sampler is not None:
+        sampler.cancel()
+
+    elapsed = time.perf_counter() - recorder.start
+    latencies = [seconds for _, step, seconds in recorder.reruns if step != "session"]
+    # Throughput once every session is running
+    steady = [seconds for t, step, seconds in recorder.reruns if t >= ramp_up and step != "session"]
+    steps = {}
+    for _, step, seconds in recorder.reruns:
+        if step != "session":
+            steps.setdefault(step, []).append(seconds)
+    return {
+        "sessions": count,
+        "duration_s": elapsed,
+        "reruns": len(latencies),
+        "errors": len(recorder.errors),
+        "throughput_rps": len(steady) / max(elapsed - ramp_up, 1e-9),
+        "latency": {**percentiles(latencies), "max_ms": max(latencies, default=0) * 1e3},
+        "steps": {step: {"count": len(values), **percentiles(values)} for step, values in sorted(steps.items())},
+        "images": {"count": len(recorder.media), **percentiles(recorder.media)},
+        "samples": recorder.samples,
+        "error_messages": recorder.errors[:20],
+    }
+
+
+# Load the shared assets of a fresh server with one untimed session
+async def warm_up(url):
+    session = Session(url, Recorder(), float("inf"), 0, 0)
+    await session.connect()
+    try:
+        await session.rerun()
+        await session.step("warm_up", "Go to", "Planner Page")
+    finally:
+        await session.close()
+
+
+def print_table(results):
+    print(f"{'sessions':>8} {'reruns':>7} {'errors':>6} {'reruns/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'CPU %':>6} {'RSS MB':>7}")
+    for result in results:
+        latency, samples = result["latency"], result["samples"]
+        cpu = np.mean([sample["cpu_percent"] for sample in samples]) if samples else float("nan")
+        rss = max((sample["rss_mb"] for sample in samples), default=float("nan"))
+        print(f"{result['sessions']:>8} {result['reruns']:>7} {result['errors']:>6} {result['throughput_rps']:>9.2f} "
+              f"{latency['p50_ms'] or 0:>8.1f} {latency['p95_ms'] or 0:>8.1f} {latency['p99_ms'] or 0:>8.1f} "
+              f"{cpu:>6.0f} {rss:>7.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test app.py with concurrent simulated sessions.")
+    parser.add_argument("--sessions", type=int, nargs="*", default=SESSIONS)
+    parser.add_argument("--duration", type=float, default=DURATION, help="seconds per level, after the ramp-up")
+    parser.add_argument("--think-time", type=float, default=THINK_TIME, help="mean seconds between interactions")
+    parser.add_argument("--ramp-up", type=float, default=None,
+                        help="seconds over which the sessions are started (default: the think time)")
+    parser.add_argument("--url", help="test a running server instead of starting one per level (no CPU/RSS)")
+    parser.add_argument("-o", "--output", help="JSON file to write (default: benchmarks/results/load-test-<time>.json)")
+    args = parser.parse_args(argv)
+    ramp_up = args.think_time if args.ramp_up is None else args.ramp_up
+
+    results = []
+    for count in args.sessions:
+        print(f"{count} sessions for {args.duration:.0f} s...", flush=True)
+        # A fresh server per level, so that RSS and caches start clean
+        server = None
+        if args.url:
+            url = args.url.rstrip("/")
+        else:
+            port = free_port()
+            server = start_server(port)
+            url = f"http://127.0.0.1:{port}"
+        try:
+            asyncio.run(warm_up(url))
+            results.append(asyncio.run(run_level(url, count, args.duration, args.think_time, ramp_up,
+                                                 server.pid if server else None)))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+    print()
+    print_table(results)
+
+    path = args.output or os.path.join(RESULTS_DIR, f"load-test-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"meta": {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "cpus": os.cpu_count(),
+                            "url": args.url, "duration_s": args.duration, "think_time_s": args.think_time,
+                            "ramp_up_s": ramp_up},
+                   "results": results}, f, indent=2)
+    print(f"\nResults written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+# Benchmark suite for the planner: loaders, rendering, encoding and full
+# Streamlit reruns of app.py through AppTest. Results are written as JSON so
+# two runs can be compared and regressions flagged.
+#
+#   python -m benchmarks.run                          # writes benchmarks/results/<time>.json
+#   python -m benchmarks.run --compare old.json       # also compares against an earlier run
+#   python -m benchmarks.run --quick --no-apptest
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+from planner import data_store
+from planner.data_store import BASE_DIR
+from planner.heatmap_cache import HeatmapCache, render_heatmap
+from planner.render import get_gradient_color, highlight_muscles
+
+RESULTS_DIR = os.path.join(BASE_DIR, "benchmarks", "results")
+APP_PATH = os.path.join(BASE_DIR, "app.py")
+SELECTION_SIZES = [1, 5, 10, 25, 50]
+# A benchmark is flagged when its median got slower by more than this
+DEFAULT_THRESHOLD = 0.20
+# Medians below this are timer noise and never flagged
+NOISE_FLOOR_MS = 0.05
+
+
+# Time func until it ran `repeat` times or for about `budget` seconds
+def measure(func, repeat=50, budget=1.0, setup=None):
+    times = []
+    deadline = time.perf_counter() + budget
+    while len(times) < repeat and (len(times) < 3 or time.perf_counter() < deadline):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {
+        "runs": len(times),
+        "min_ms": min(times) * 1e3,
+        "median_ms": statistics.median(times) * 1e3,
+        "mean_ms": statistics.fmean(times) * 1e3,
+    }
+
+
+def loader_benchmarks(quick):
+    repeat = 5 if quick else 20
+    return {
+        "load_exercise_data.cold": measure(data_store.read_exercise_data, repeat),
+        "load_muscle_data.cold": measure(data_store.read_annotations, repeat),
+        "load_template_image.cold": measure(data_store.read_template_image, repeat),
+        "load_exercise_data.shared": measure(data_store.get_exercise_data, 200),
+        "load_muscle_data.shared": measure(data_store.get_muscle_data, 200),
+        "load_template_image.shared": measure(data_store.get_template_image, 200),
+    }
+
+
+def render_benchmarks(selections, quick):
+    exercise_index = data_store.get_exercise_index()
+    region_map = data_store.get_region_map()
+    template_image = data_store.get_template_image()
+    repeat = 10 if quick else 50
+    results = {
+        "get_gradient_color": measure(lambda: [get_gradient_color(count) for count in range(7)], 200),
+    }
+    for name, selection in selections.items():
+        results[f"highlight_muscles.{name}"] = measure(
+            lambda: highlight_muscles(selection, exercise_index, region_map, template_image), repeat)
+        # Full render + PNG encode with an empty cache every time
+        cache = HeatmapCache()
+        results[f"render_heatmap.miss.{name}"] = measure(
+            lambda: render_heatmap(selection, exercise_index, region_map, template_image, cache=cache),
+            repeat // 2, setup=cache.clear)
+        results[f"render_heatmap.hit.{name}"] = measure(
+            lambda: render_heatmap(selection, exercise_index, region_map, template_image, cache=cache),
+            repeat)
+    return results
+
+
+# End-to-end reruns of app.py: each measured step is one interaction
+def apptest_benchmarks(workouts, quick):
+    from streamlit.testing.v1 import AppTest
+
+    repeat = 3 if quick else 10
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    results = {
+        "apptest.front_page": measure(lambda: at.run(), repeat),
+    }
+    at.sidebar.radio[0].set_value("Planner Page").run()
+    results["apptest.planner_page.empty"] = measure(lambda: at.run(), repeat)
+
+    for name, exercises in workouts.items():
+        def pick(name=name):
+            at.sidebar.selectbox[0].set_value("None").run()
+            at.sidebar.selectbox[0].set_value(name)
+        results[f"apptest.planner_page.{name.replace(' ', '_')}"] = measure(lambda: at.run(), repeat,
+                                                                            setup=pick)
+
+    # Adding one exercise to a premade workout
+    exercises = next(iter(workouts.values()))
+
+    def add_one():
+        at.sidebar.selectbox[0].set_value("None").run()
+        # Selections go through session state, the last exercise need not be
+        # on the first page of search results
+        at.session_state["selected_exercises"] = exercises[:-1]
+        at.run()
+        at.session_state["selected_exercises"] = exercises
+    results["apptest.planner_page.add_exercise"] = measure(lambda: at.run(), repeat, setup=add_one)
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Benchmarks whose median grew by more than threshold relative to baseline
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    rows = []
+    for name, result in results["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        ratio = result["median_ms"] / old["median_ms"] if old["median_ms"] else float("inf")
+        flagged = ratio > 1 + threshold and result["median_ms"] > NOISE_FLOOR_MS
+        rows.append((name, old["median_ms"], result["median_ms"], ratio, flagged))
+    return rows
+
+
+def print_results(results):
+    width = max(len(name) for name in results)
+    print(f"{'benchmark':<{width}} {'median ms':>10} {'min ms':>10} {'runs':>5}")
+    for name, result in results.items():
+        print(f"{name:<{width}} {result['median_ms']:>10.3f} {result['min_ms']:>10.3f} {result['runs']:>5}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the planner benchmarks.")
+    parser.add_argument("-o", "--output", help="JSON file to write (default: benchmarks/results/<time>.json)")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown of the median flagged as a regression")
+    parser.add_argument("--quick", action="store_true", help="fewer repetitions")
+    parser.add_argument("--no-apptest", action="store_true", help="skip the Streamlit rerun benchmarks")
+    args = parser.parse_args(argv)
+
+    names = list(data_store.get_exercise_data()["Exercise_Name"])
+    random.seed(0)
+    selections = {f"random_{n}": random.sample(names, n) for n in SELECTION_SIZES}
+    # The workouts the sidebar offers, read from data/premade_workouts.json
+    workouts = {name: list(exercises) for name, exercises in data_store.get_premade_workouts().items()}
+    selections.update({name.replace(" ", "_"): exercises for name, exercises in workouts.items()})
+
+    results = {}
+    results.update(loader_benchmarks(args.quick))
+    results.update(render_benchmarks(selections, args.quick))
+    if not args.no_apptest:
+        results.update(apptest_benchmarks(workouts, args.quick))
+    print_results(results)
+
+    output = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+    path = args.output or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(output, f, indent=2)
+    print(f"\nWrote {path}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare(output, baseline, args.threshold)
+        regressions = [row for row in rows if row[4]]
+        print(f"\nCompared with {args.compare} ({baseline['meta'].get('git')}):")
+        for name, old, new, ratio, flagged in rows:
+            print(f"{'REGRESSION' if flagged else '':>10} {name}: {old:.3f} -> {new:.3f} ms ({ratio:.2f}x)")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# Synthetic catalogs and annotation files in the same formats as
+# data/prep_data.csv and annotations.json, to see how the loaders and the
+# renderer behave with far more exercises, muscle groups and regions than
+# the real data has.
+#
+#   python -m benchmarks.synthetic --exercises 100000 --muscles 60 --regions 500 --vertices 400 -o synthetic/
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from planner.data_store import EXERCISE_PATH, read_template_shape
+
+MOVEMENTS = ["Press", "Curl", "Row", "Raise", "Extension", "Squat", "Lunge", "Pull-Down", "Fly", "Crunch",
+             "Deadlift", "Shrug", "Kickback", "Twist", "Carry"]
+VARIANTS = ["Seated", "Standing", "Incline", "Decline", "Single-Arm", "Alternating", "Close-Grip",
+            "Wide-Grip", "Reverse-Grip", "Kneeling", "Lying", "Paused"]
+SITE = "https://www.bodybuilding.com/exercises"
+
+
+# The muscle groups and equipment of the real catalog, with numbered extra
+# muscle groups when more are asked for
+def real_vocabulary():
+    real = pd.read_csv(EXERCISE_PATH, usecols=["muscle_gp", "Equipment"])
+    return sorted(real["muscle_gp"].dropna().unique()), sorted(real["Equipment"].dropna().unique())
+
+
+def muscle_names(count):
+    muscles, _ = real_vocabulary()
+    return (muscles + [f"Muscle{i}" for i in range(len(muscles), count)])[:count]
+
+
+# A catalog of `size` uniquely named exercises with every column of
+# prep_data.csv. About 2% of the ratings are missing, like in the real data.
+def make_catalog(size, muscles=17, seed=0):
+    rng = np.random.default_rng(seed)
+    muscle_list = np.array(muscle_names(muscles), dtype=object)
+    equipment = np.array(real_vocabulary()[1], dtype=object)
+    names = pd.Series(
+        np.array(VARIANTS, dtype=object)[rng.integers(0, len(VARIANTS), size)] + " "
+        + equipment[rng.integers(0, len(equipment), size)] + " "
+        + np.array(MOVEMENTS, dtype=object)[rng.integers(0, len(MOVEMENTS), size)]
+    ) + [f" {i}" for i in range(size)]
+    muscle = muscle_list[rng.integers(0, len(muscle_list), size)]
+    kit = equipment[rng.integers(0, len(equipment), size)]
+    slugs = names.str.lower().str.replace(" ", "-", regex=False)
+    rating = rng.normal(7.5, 1.5, size).clip(0, 10).round(1)
+    rating[rng.random(size) < 0.02] = np.nan
+    return pd.DataFrame({
+        "Exercise_Name": names,
+        "Description_URL": SITE + "/" + slugs,
+        "Exercise_Image": SITE + "/exerciseImages/" + slugs + "_1.jpg",
+        "Exercise_Image1": SITE + "/exerciseImages/" + slugs + "_2.jpg",
+        "muscle_gp_details": SITE + "/muscle/" + pd.Series(muscle).str.lower(),
+        "muscle_gp": muscle,
+        "equipment_details": SITE + "/equipment/" + pd.Series(kit).str.lower(),
+        "Equipment": kit,
+        "Rating": rating,
+        "Description": "Average",
+    })
+
+
+# VIA regions for an image of the given (height, width): `regions` closed
+# star-shaped polygons of `vertices` points each, labelled with the muscle
+# groups in turn, sized so that together they cover about `coverage` of the
+# image and overlapping where they happen to meet
+def make_regions(regions, vertices, muscles, shape, coverage=0.6, seed=0):
+    rng = np.random.default_rng(seed)
+    height, width = shape
+    # Labels use the muscle_gp names as cleaned by catalog.clean_catalog()
+    labels = [muscle.replace(" ", "") for muscle in muscle_names(muscles)]
+    radius = np.sqrt(coverage * height * width / regions / np.pi)
+    result = {}
+    for i in range(regions):
+        center = rng.uniform((radius, radius), (width - radius, height - radius)) if radius * 2 < min(shape) \
+            else np.array([width / 2, height / 2])
+        angles = np.sort(rng.uniform(0, 2 * np.pi, vertices))
+        radii = radius * rng.uniform(0.6, 1.2, vertices)
+        xs = np.clip(center[0] + radii * np.cos(angles), 0, width - 1).astype(int).tolist()
+        ys = np.clip(center[1] + radii * np.sin(angles), 0, height - 1).astype(int).tolist()
+        result[str(i)] = {
+            "shape_attributes": {"name": "polygon", "all_points_x": xs + xs[:1], "all_points_y": ys + ys[:1]},
+            "region_attributes": {"label": labels[i % len(labels)]},
+        }
+    return result
+
+
+# The regions wrapped like annotations.json
+def make_annotations(regions, vertices, muscles, shape, seed=0):
+    return {"template.jpg": {"filename": "template.jpg",
+                             "regions": make_regions(regions, vertices, muscles, shape, seed=seed)}}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic catalog CSV and annotation file.")
+    parser.add_argument("--exercises", type=int, default=100_000)
+    parser.add_argument("--muscles", type=int, default=17)
+    parser.add_argument("--regions", type=int, default=500)
+    parser.add_argument("--vertices", type=int, default=200, help="points per polygon")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="synthetic", help="output directory")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output, exist_ok=True)
+    catalog_path = os.path.join(args.output, "prep_data.csv")
+    make_catalog(args.exercises, args.muscles, args.seed).to_csv(catalog_path, index=False)
+    annotations_path = os.path.join(args.output, "annotations.json")
+    with open(annotations_path, "w") as f:
+        json.dump(make_annotations(args.regions, args.vertices, args.muscles, read_template_shape(), args.seed), f)
+    for path in (catalog_path, annotations_path):
+        print(f"Wrote {path} ({os.path.getsize(path)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2 @@
+# Core of the Workout Planner that does not depend on Streamlit, shared by
+# app.py and the command-line tools.
@@ -0,0 +1,168 @@
+import os
+
+import numpy as np
+
+# Distance in pixels a simplified outline may stray from the original
+SIMPLIFY_TOLERANCE = 1.0
+FORMAT_VERSION = 1
+
+
+# The annotation polygons compiled into flat arrays. Regions keep the order
+# of annotations.json, which is the order they are drawn in.
+#   labels:         muscle group names, label id i is labels[i - 1]
+#   region_labels:  label id of every region
+#   vertex_starts:  vertices of region i are vertices[vertex_starts[i]:vertex_starts[i + 1]]
+#   vertices:       int32 (x, y) pairs, truncated like the renderer always did
+#   bboxes:         int32 (x0, y0, x1, y1) of every region, inclusive
+#   simplified_*:   the same outlines with fewer vertices, for vector output
+class Annotations:
+    def __init__(self, labels, region_labels, vertex_starts, vertices, bboxes,
+                 simplified_starts, simplified_vertices, shape):
+        self.labels = list(labels)
+        self.label_ids = {label: i + 1 for i, label in enumerate(self.labels)}
+        self.region_labels = region_labels
+        self.vertex_starts = vertex_starts
+        self.vertices = vertices
+        self.bboxes = bboxes
+        self.simplified_starts = simplified_starts
+        self.simplified_vertices = simplified_vertices
+        self.shape = tuple(int(v) for v in shape)
+        for array in (region_labels, vertex_starts, vertices, bboxes, simplified_starts, simplified_vertices):
+            array.flags.writeable = False
+
+    def __len__(self):
+        return len(self.region_labels)
+
+    # (label id, (N, 1, 2) vertex view) of every region in drawing order
+    def polygons(self, simplified=False):
+        starts, vertices = ((self.simplified_starts, self.simplified_vertices) if simplified
+                            else (self.vertex_starts, self.vertices))
+        for i, label_id in enumerate(self.region_labels):
+            yield int(label_id), vertices[starts[i]:starts[i + 1]].reshape(-1, 1, 2)
+
+    def arrays(self):
+        return {
+            "labels": np.array(self.labels, dtype=str),
+            "region_labels": self.region_labels,
+            "vertex_starts": self.vertex_starts,
+            "vertices": self.vertices,
+            "bboxes": self.bboxes,
+            "simplified_starts": self.simplified_starts,
+            "simplified_vertices": self.simplified_vertices,
+            "shape": np.array(self.shape, dtype=np.int64),
+        }
+
+
+# Problems with the VIA regions of the template, one message each: unknown
+# labels, shapes that are not closed polygons, points outside the image
+def validation_errors(regions, shape, muscle_names=None):
+    height, width = shape[:2]
+    errors = []
+    for key, region in regions.items():
+        shape_attributes = region.get("shape_attributes", {})
+        label = region.get("region_attributes", {}).get("label", "")
+        name = f"region {key} ({label or 'no label'})"
+        if muscle_names is not None and label not in muscle_names:
+            errors.append(f"{name}: label is not a muscle_gp of the catalog")
+        if shape_attributes.get("name") != "polygon":
+            errors.append(f"{name}: shape is {shape_attributes.get('name')!r}, not a polygon")
+            continue
+        xs, ys = shape_attributes.get("all_points_x", []), shape_attributes.get("all_points_y", [])
+        if len(xs) != len(ys) or len(set(zip(xs, ys))) < 3:
+            errors.append(f"{name}: needs at least 3 distinct points")
+            continue
+        if (xs[0], ys[0]) != (xs[-1], ys[-1]):
+            errors.append(f"{name}: polygon is not closed, the last point differs from the first")
+        if min(xs) < 0 or min(ys) < 0 or max(xs) >= width or max(ys) >= height:
+            errors.append(f"{name}: points outside the {width}x{height} image")
+    return errors
+
+
+# Douglas-Peucker simplification of a closed outline. The outline is split
+# at the vertex farthest from the first one so that neither half starts and
+# ends at the same point.
+def simplify(points, tolerance=SIMPLIFY_TOLERANCE):
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) > 1 and (points[0] == points[-1]).all():
+        points = points[:-1]
+    if len(points) <= 3:
+        return points
+    far = int(np.argmax(((points - points[0]) ** 2).sum(axis=1)))
+    keep = np.zeros(len(points) + 1, dtype=bool)
+    keep[[0, far, len(points)]] = True
+    ring = np.concatenate((points, points[:1]))
+
+    stack = [(0, far), (far, len(points))]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = ring[end] - ring[start]
+        offsets = ring[start + 1:end] - ring[start]
+        length = np.hypot(*segment)
+        distances = np.abs(segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0]) / length
+        i = int(np.argmax(distances))
+        if distances[i] > tolerance:
+            keep[start + 1 + i] = True
+            stack += [(start, start + 1 + i), (start + 1 + i, end)]
+    return points[keep[:-1]]
+
+
+# Compile the VIA regions of the template (as in annotations.json) for an
+# image of the given shape. Raises ValueError listing every problem found.
+def compile_annotations(regions, shape, muscle_names=None, tolerance=SIMPLIFY_TOLERANCE):
+    errors = validation_errors(regions, shape, muscle_names)
+    if errors:
+        raise ValueError("Invalid annotations:\n  " + "\n  ".join(errors))
+
+    labels, label_ids = [], {}
+    region_labels, outlines, simplified = [], [], []
+    for region in regions.values():
+        label = region["region_attributes"].get("label", "")
+        if label not in label_ids:
+            labels.append(label)
+            label_ids[label] = len(labels)
+        region_labels.append(label_ids[label])
+        points = np.column_stack((region["shape_attributes"]["all_points_x"],
+                                  region["shape_attributes"]["all_points_y"]))
+        outlines.append(points.astype(np.int32))
+        simplified.append(simplify(points, tolerance).astype(np.int32))
+
+    def flatten(polygons):
+        starts = np.concatenate(([0], np.cumsum([len(p) for p in polygons]))).astype(np.int64)
+        return starts, np.concatenate(polygons) if polygons else np.empty((0, 2), dtype=np.int32)
+
+    vertex_starts, vertices = flatten(outlines)
+    simplified_starts, simplified_vertices = flatten(simplified)
+    bboxes = np.array([np.concatenate((p.min(axis=0), p.max(axis=0))) for p in outlines],
+                      dtype=np.int32).reshape(-1, 4)
+    return Annotations(labels, np.array(region_labels, dtype=np.int32), vertex_starts, vertices, bboxes,
+                       simplified_starts, simplified_vertices, shape[:2])
+
+
+# Write compiled annotations as an uncompressed .npz, tagged with the hash of
+# the annotations.json they came from
+def write_compiled(annotations, path, source_digest):
+    with open(path + ".tmp", "wb") as f:
+        np.savez(f, source_sha256=np.array(source_digest), version=np.array(FORMAT_VERSION),
+                 **annotations.arrays())
+    # Replace atomically so a running app never reads a half-written file
+    os.replace(path + ".tmp", path)
+
+
+# Read annotations written by write_compiled. Returns None when the file does
+# not exist, has another format version or was built from another source.
+def read_compiled(path, source_digest):
+    try:
+        data = np.load(path)
+    except OSError:
+        return None
+    with data:
+        if (int(data["version"]) != FORMAT_VERSION
+                or str(data["source_sha256"]) != source_digest):
+            return None
+        return Annotations(
+            [str(label) for label in data["labels"]], data["region_labels"], data["vertex_starts"],
+            data["vertices"], data["bboxes"], data["simplified_starts"], data["simplified_vertices"],
+            data["shape"],
+        )
@@ -0,0 +1,197 @@
+import os
+
+import numpy as np
+from PIL import Image  # pillow library for image processing
+
+# OpenCV is optional and only imported once its backend is asked for
+cv2 = None
+
+# Same fixed-point precision as OpenCV's polygon filling
+XY_SHIFT = 16
+XY_ONE = 1 << XY_SHIFT
+
+
+# Cohen-Sutherland clipping of a segment to the image, as cv2.clipLine does
+# it (including its truncating double arithmetic). Returns whether any part
+# is inside and the end points, which like in OpenCV may have been moved
+# even when the segment turns out to be outside.
+def clip_line(width, height, x1, y1, x2, y2):
+    right, bottom = width - 1, height - 1
+    c1 = (x1 < 0) + (x1 > right) * 2 + (y1 < 0) * 4 + (y1 > bottom) * 8
+    c2 = (x2 < 0) + (x2 > right) * 2 + (y2 < 0) * 4 + (y2 > bottom) * 8
+
+    if (c1 & c2) == 0 and (c1 | c2) != 0:
+        if c1 & 12:
+            a = 0 if c1 < 8 else bottom
+            x1 += int(float(a - y1) * (x2 - x1) / (y2 - y1))
+            y1 = a
+            c1 = (x1 < 0) + (x1 > right) * 2
+        if c2 & 12:
+            a = 0 if c2 < 8 else bottom
+            x2 += int(float(a - y2) * (x2 - x1) / (y2 - y1))
+            y2 = a
+            c2 = (x2 < 0) + (x2 > right) * 2
+        if (c1 & c2) == 0 and (c1 | c2) != 0:
+            if c1:
+                a = 0 if c1 == 1 else right
+                y1 += int(float(a - x1) * (y2 - y1) / (x2 - x1))
+                x1 = a
+                c1 = 0
+            if c2:
+                a = 0 if c2 == 1 else right
+                y2 += int(float(a - x2) * (y2 - y1) / (x2 - x1))
+                x2 = a
+                c2 = 0
+
+    return (c1 | c2) == 0, x1, y1, x2, y2
+
+
+# Pixels of 8-connected Bresenham lines, one segment per entry of the end
+# point arrays. Segments are walked left to right like cv2.LineIterator so
+# that the same pixels are chosen; all end points must be inside the image.
+def line_pixels(x1, y1, x2, y2):
+    flip = x2 < x1
+    x1, y1, x2, y2 = np.where(flip, x2, x1), np.where(flip, y2, y1), np.where(flip, x1, x2), np.where(flip, y1, y2)
+
+    dx, dy = x2 - x1, np.abs(y2 - y1)
+    step_y = np.where(y2 >= y1, 1, -1)
+    vertical = dy > dx
+    major, minor = np.where(vertical, dy, dx), np.where(vertical, dx, dy)
+
+    lengths = major + 1
+    segment = np.repeat(np.arange(len(major)), lengths)
+    steps = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    major, minor, vertical = major[segment], minor[segment], vertical[segment]
+    # Number of minor-axis steps taken after i major-axis steps
+    minor_steps = -((major - 2 * minor * steps) // np.maximum(2 * major, 1))
+    xs = x1[segment] + np.where(vertical, minor_steps, steps)
+    ys = y1[segment] + step_y[segment] * np.where(vertical, steps, minor_steps)
+    return xs, ys
+
+
+# Scanline polygon fill matching cv2.fillPoly with the default 8-connected
+# line type: the outline is drawn as lines, edges are walked in 16.16 fixed
+# point and every row is filled between consecutive pairs of edge crossings.
+def fill_poly(mask, points, value=1, offset=(0, 0)):
+    height, width = mask.shape[:2]
+    points = np.asarray(points, dtype=np.int64).reshape(-1, 2) + np.asarray(offset, dtype=np.int64)
+    if len(points) == 0:
+        return mask
+
+    # Edge i runs from vertex i - 1 to vertex i
+    x0, y0 = np.roll(points[:, 0], 1), np.roll(points[:, 1], 1)
+    x1, y1 = points[:, 0].copy(), points[:, 1].copy()
+    # Fixed-point x of both ends, taken from the clipped segment when the
+    # edge leaves the image
+    cx0, cy0, cx1, cy1 = x0 << XY_SHIFT, y0.copy(), x1 << XY_SHIFT, y1.copy()
+    lx0, ly0, lx1, ly1 = x0.copy(), y0.copy(), x1.copy(), y1.copy()
+    drawn = np.ones(len(points), dtype=bool)
+
+    leaving = ((x0 < 0) | (x0 >= width) | (y0 < 0) | (y0 >= height)
+               | (x1 < 0) | (x1 >= width) | (y1 < 0) | (y1 >= height))
+    for i in np.flatnonzero(leaving):
+        inside, tx0, ty0, tx1, ty1 = clip_line(width, height, int(x0[i]), int(y0[i]), int(x1[i]), int(y1[i]))
+        drawn[i] = inside
+        lx0[i], ly0[i], lx1[i], ly1[i] = tx0, ty0, tx1, ty1
+        if ty0 != ty1:
+            cy0[i], cy1[i] = ty0, ty1
+        cx0[i], cx1[i] = tx0 << XY_SHIFT, tx1 << XY_SHIFT
+
+    xs, ys = line_pixels(lx0[drawn], ly0[drawn], lx1[drawn], ly1[drawn])
+    mask[ys, xs] = value
+
+    # Horizontal edges never cross a row; the rest are oriented downwards
+    sloped = y0 != y1
+    if sloped.sum() < 2:
+        return mask
+    y0, y1, cx0, cy0, cx1, cy1 = y0[sloped], y1[sloped], cx0[sloped], cy0[sloped], cx1[sloped], cy1[sloped]
+    up = y0 > y1
+    y0, y1 = np.where(up, y1, y0), np.where(up, y0, y1)
+    cx0, cx1 = np.where(up, cx1, cx0), np.where(up, cx0, cx1)
+    cy0, cy1 = np.where(up, cy1, cy0), np.where(up, cy0, cy1)
+    # C division truncates towards zero
+    numerator, denominator = cx1 - cx0, cy1 - cy0
+    dx = np.abs(numerator) // np.abs(denominator) * np.where((numerator < 0) == (denominator < 0), 1, -1)
+    x_start = cx0 - (cy0 - y0) * dx
+
+    # Crossings of every edge with every row it spans inside the image
+    first, stop = np.maximum(y0, 0), np.minimum(y1, height)
+    lengths = np.maximum(stop - first, 0)
+    if not lengths.any():
+        return mask
+    edge = np.repeat(np.arange(len(lengths)), lengths)
+    rows = first[edge] + np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    xs = x_start[edge] + (rows - y0[edge]) * dx[edge]
+    order = np.lexsort((xs, rows))
+    rows, xs = rows[order], xs[order]
+
+    # Consecutive crossings of a row pair up into filled spans
+    span_rows = rows[0::2]
+    left = (xs[0::2] + XY_ONE - 1) >> XY_SHIFT
+    right = xs[1::2] >> XY_SHIFT
+    keep = (left < width) & (right >= 0)
+    span_rows, left, right = span_rows[keep], np.maximum(left[keep], 0), np.minimum(right[keep], width - 1)
+
+    # Paint the spans through a per-row difference array
+    coverage = np.zeros((height, width + 1), dtype=np.int32)
+    np.add.at(coverage, (span_rows, left), 1)
+    np.add.at(coverage, (span_rows, right + 1), -1)
+    mask[np.cumsum(coverage[:, :width], axis=1) > 0] = value
+    return mask
+
+
+# Pure NumPy/Pillow backend, the default. Decoding goes through Pillow's
+# libjpeg-turbo like OpenCV's, and fill_poly above reproduces cv2.fillPoly
+# pixel for pixel, so both backends render the same images.
+class NumpyBackend:
+    name = "numpy"
+
+    def read_image(self, path):
+        try:
+            with Image.open(path) as image:
+                return np.asarray(image.convert("RGB")).copy()
+        except (FileNotFoundError, OSError):
+            return None
+
+    def fill_poly(self, mask, points, value=1, offset=(0, 0)):
+        return fill_poly(mask, points, value, offset)
+
+
+# OpenCV backend, used when PLANNER_RENDER_BACKEND=opencv and cv2 is installed
+class OpenCVBackend:
+    name = "opencv"
+
+    def __init__(self):
+        global cv2
+        import cv2  # opencv-python library for image processing
+
+    def read_image(self, path):
+        image = cv2.imread(path)
+        if image is None:
+            return None
+        return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+    def fill_poly(self, mask, points, value=1, offset=(0, 0)):
+        points = np.asarray(points, dtype=np.int32).reshape((-1, 1, 2))
+        cv2.fillPoly(mask, [points], value, offset=(int(offset[0]), int(offset[1])))
+        return mask
+
+
+BACKENDS = {"numpy": NumpyBackend, "opencv": OpenCVBackend}
+DEFAULT_BACKEND = os.environ.get("PLANNER_RENDER_BACKEND", "numpy").lower()
+_backends = {}
+
+
+# Backend instance by name (default from PLANNER_RENDER_BACKEND). cv2 is only
+# imported when the OpenCV backend is asked for, and asking for it without
+# OpenCV installed falls back to NumPy rather than failing.
+def get_backend(name=None):
+    name = (name or DEFAULT_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown render backend {name!r}, expected one of {sorted(BACKENDS)}")
+    if name not in _backends:
+        try:
+            _backends[name] = BACKENDS[name]()
+        except ImportError:
+            _backends[name] = get_backend("numpy")
+    return _backends[name]
@@ -0,0 +1,124 @@
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from planner import data_store
+from planner.heatmap_cache import render_heatmap
+
+EXTENSIONS = {"PNG": "png", "JPEG": "jpg", "WEBP": "webp"}
+
+
+# Named workouts from a JSONL file ({"name": ..., "exercises": [...]} per
+# line) or a CSV file with one "name,exercise" row per exercise
+def read_workouts(path):
+    workouts = {}
+    with open(path, newline="") as f:
+        if path.endswith(".csv"):
+            for row in csv.DictReader(f):
+                workouts.setdefault(row["name"], []).append(row["exercise"])
+        else:
+            for line in f:
+                if line.strip():
+                    workout = json.loads(line)
+                    workouts[workout["name"]] = list(workout["exercises"])
+    return workouts
+
+
+def file_name(name, format):
+    stem = re.sub(r"[^\w.-]+", "_", name).strip("_") or "workout"
+    return f"{stem}.{EXTENSIONS[format]}"
+
+
+# {workout name: file name}, in the order of the workouts. Names that clean
+# up to the same file ("Leg Day!", "Leg Day?") get -2, -3... suffixes instead
+# of overwriting each other; compared without case for case-insensitive
+# file systems.
+def file_names(names, format):
+    files = {}
+    taken = set()
+    for name in names:
+        stem, extension = os.path.splitext(file_name(name, format))
+        candidate, suffix = stem + extension, 1
+        while candidate.casefold() in taken:
+            suffix += 1
+            candidate = f"{stem}-{suffix}{extension}"
+        taken.add(candidate.casefold())
+        files[name] = candidate
+    return files
+
+
+# {workout name: [unknown Exercise_Names]} of the workouts naming exercises
+# that are not in the catalog
+def unknown_exercises(workouts):
+    name_to_id = data_store.get_exercise_index().name_to_id
+    unknown = {}
+    for name, exercises in workouts.items():
+        missing = [exercise for exercise in dict.fromkeys(exercises) if exercise not in name_to_id]
+        if missing:
+            unknown[name] = missing
+    return unknown
+
+
+# Each worker loads the catalog index, region map and template once and keeps
+# them for every workout it renders. Under the fork start method they were
+# already loaded by the parent and are shared copy-on-write.
+def init_worker():
+    data_store.get_exercise_index()
+    data_store.get_region_map()
+    data_store.get_template_image()
+
+
+def render_one(job):
+    exercises, path, format = job
+    data = render_heatmap(exercises, data_store.get_exercise_index(), data_store.get_region_map(),
+                          data_store.get_template_image(), format=format)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def render_workouts(workouts, output_dir, workers=None, format="PNG", chunksize=8):
+    os.makedirs(output_dir, exist_ok=True)
+    files = file_names(workouts, format)
+    jobs = [(exercises, os.path.join(output_dir, files[name]), format) for name, exercises in workouts.items()]
+    init_worker()
+    if workers == 1:
+        return [render_one(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        return list(pool.map(render_one, jobs, chunksize=chunksize))
+
+
+# Render the muscle heatmap of every workout in a file without Streamlit.
+#   python -m planner.batch_render workouts.jsonl -o heatmaps/ --workers 4
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render muscle heatmaps for a file of workouts.")
+    parser.add_argument("workouts", help="JSONL ({name, exercises}) or CSV (name,exercise) file")
+    parser.add_argument("-o", "--output", default="heatmaps", help="output directory")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="worker processes (default: one per CPU, 1 renders in-process)")
+    parser.add_argument("-f", "--format", default="PNG", type=str.upper, choices=sorted(EXTENSIONS))
+    args = parser.parse_args(argv)
+
+    workouts = read_workouts(args.workouts)
+    # Like the render endpoint, a workout with a typo is not rendered from the
+    # exercises that remain
+    unknown = unknown_exercises(workouts)
+    for name, exercises in unknown.items():
+        print(f"Skipped {name!r}, unknown exercises: {', '.join(exercises)}", file=sys.stderr)
+    workouts = {name: exercises for name, exercises in workouts.items() if name not in unknown}
+    start = time.perf_counter()
+    paths = render_workouts(workouts, args.output, args.workers, args.format)
+    elapsed = time.perf_counter() - start
+    print(f"Rendered {len(paths)} images to {args.output} in {elapsed:.2f}s "
+          f"({len(paths) / elapsed:.1f} images/s)")
+    if unknown:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:  # the app falls back to parsing the CSV
+    pa = None
+
+# Columns the planner needs on every load, and the long URL columns that are
+# only read when something asks for them
+CORE_COLUMNS = ["Exercise_Name", "muscle_gp", "Equipment", "Rating"]
+URL_COLUMNS = ["Description_URL", "Exercise_Image", "Exercise_Image1",
+               "muscle_gp_details", "equipment_details"]
+CATEGORY_COLUMNS = ["muscle_gp", "Equipment"]
+
+SOURCE_KEY = b"source_sha256"
+
+
+# Normalise the core columns the same way for the CSV and the binary catalog
+def clean_catalog(df):
+    df = df[CORE_COLUMNS].copy()
+    df["muscle_gp"] = df["muscle_gp"].str.replace(" ", "")
+    for column in CATEGORY_COLUMNS:
+        df[column] = df[column].astype("category")
+    df["Rating"] = df["Rating"].astype("float32")
+    return df
+
+
+def url_columns(df):
+    return df[["Exercise_Name"] + URL_COLUMNS].reset_index(drop=True)
+
+
+# Write a DataFrame as an uncompressed Arrow IPC file, which can be memory
+# mapped, tagged with the hash of the CSV it was built from
+def write_table(df, path, source_digest):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                           SOURCE_KEY: source_digest.encode()})
+    with pa.OSFile(path + ".tmp", "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    # Replace atomically so a running app never maps a half-written file
+    os.replace(path + ".tmp", path)
+
+
+# Read an Arrow IPC file written by write_table. Returns None when pyarrow is
+# missing, the file does not exist or it was built from another CSV.
+def read_table(path, source_digest, columns=None):
+    if pa is None:
+        return None
+    try:
+        source = pa.memory_map(path, "r")
+    except OSError:
+        return None
+    with source:
+        reader = pa.ipc.open_file(source)
+        metadata = reader.schema.metadata or {}
+        if metadata.get(SOURCE_KEY) != source_digest.encode():
+            return None
+        table = reader.read_all()
+        if columns is not None:
+            table = table.select(columns)
+        return table.to_pandas()
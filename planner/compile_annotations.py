@@ -0,0 +1,28 @@
+import os
+import sys
+
+from planner import annotations
+from planner.data_store import (ANNOTATIONS_PATH, BASE_DIR, COMPILED_ANNOTATIONS_PATH, catalog_muscles,
+                                file_digest, read_muscle_data, read_template_shape)
+
+
+# Validate annotations.json against the catalog and the template and compile
+# it into the binary file the app loads. Exits with status 1 listing every
+# problem when the annotations are invalid.
+#   python -m planner.compile_annotations
+def main(path=ANNOTATIONS_PATH, compiled_path=COMPILED_ANNOTATIONS_PATH):
+    try:
+        compiled = annotations.compile_annotations(read_muscle_data(path), read_template_shape(),
+                                                   catalog_muscles())
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        sys.exit(1)
+
+    annotations.write_compiled(compiled, compiled_path, file_digest(path))
+    print(f"Compiled {len(compiled)} regions of {len(compiled.labels)} muscle groups, "
+          f"{len(compiled.vertices)} vertices ({len(compiled.simplified_vertices)} simplified)")
+    print(f"Wrote {os.path.relpath(compiled_path, BASE_DIR)} ({os.path.getsize(compiled_path)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
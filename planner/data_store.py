@@ -0,0 +1,406 @@
+import hashlib
+import json
+import os
+import threading
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+from PIL import Image  # pillow library for image processing
+
+from planner import annotations, backends, catalog
+from planner.exercise_index import ExerciseIndex
+from planner.generator import WorkoutGenerator
+from planner.heatmap_cache import heatmap_cache, render_heatmap
+from planner.render import RegionMap
+from planner.search import SearchIndex
+
+# Paths are resolved from the repository root so the loaders work no matter
+# which directory the app or a script is started from
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXERCISE_PATH = os.path.join(BASE_DIR, "data", "prep_data.csv")
+ANNOTATIONS_PATH = os.path.join(BASE_DIR, "annotations.json")
+# Compiled from ANNOTATIONS_PATH by python -m planner.compile_annotations
+COMPILED_ANNOTATIONS_PATH = os.path.join(BASE_DIR, "data", "annotations.npz")
+TEMPLATE_PATH = os.path.join(BASE_DIR, "images", "template.jpg")
+# Binary catalog compiled from EXERCISE_PATH by python -m planner.prep_data
+CATALOG_PATH = os.path.join(BASE_DIR, "data", "catalog.arrow")
+URLS_PATH = os.path.join(BASE_DIR, "data", "catalog_urls.arrow")
+WORKOUTS_PATH = os.path.join(BASE_DIR, "data", "premade_workouts.json")
+# Secondary muscles worked by exercises, on top of their catalog muscle_gp.
+# Off unless PLANNER_ACTIVATIONS is set: the shipped weights are a flat 0.5
+# placeholder rather than measured values, and they change the heatmaps.
+ACTIVATIONS_PATH = os.path.join(BASE_DIR, "data", "muscle_activations.csv")
+ACTIVATIONS_ENABLED = os.environ.get("PLANNER_ACTIVATIONS", "") not in ("", "0")
+
+
+# Read the exercise catalog from the binary artifact when it was built from
+# the current CSV, otherwise parse and clean the CSV itself
+def read_exercise_data(path=EXERCISE_PATH, catalog_path=CATALOG_PATH):
+    df = catalog.read_table(catalog_path, file_digest(path))
+    if df is None:
+        df = catalog.clean_catalog(pd.read_csv(path, usecols=catalog.CORE_COLUMNS))
+    return df
+
+
+# URL columns of the catalog, in the same row order as read_exercise_data()
+def read_exercise_urls(path=EXERCISE_PATH, urls_path=URLS_PATH):
+    df = catalog.read_table(urls_path, file_digest(path))
+    if df is None:
+        df = catalog.url_columns(pd.read_csv(path, usecols=["Exercise_Name"] + catalog.URL_COLUMNS))
+    return df
+
+
+# Read the muscle regions of the template from the VIA annotation file
+def read_muscle_data(path=ANNOTATIONS_PATH):
+    with open(path, "r") as f:
+        data = json.load(f)
+        # Access the muscle regions directly from the "template.jpg" key
+        return freeze(data.get("template.jpg", {}).get("regions", {}))
+
+
+# Read the secondary muscle activations, one Exercise_Name, muscle_gp,
+# weight row each. Weights are relative to the 1.0 of the primary muscle.
+def read_muscle_activations(path=ACTIVATIONS_PATH):
+    df = pd.read_csv(path, dtype={"Exercise_Name": str, "muscle_gp": str, "weight": float})
+    if list(df.columns) != ["Exercise_Name", "muscle_gp", "weight"]:
+        raise ValueError(f"{path} must have the columns Exercise_Name, muscle_gp, weight")
+    if not (df["weight"] > 0).all() or not df["weight"].lt(float("inf")).all():
+        raise ValueError(f"{path}: every weight must be a positive number")
+    return df
+
+
+# Exercise index of the catalog with the secondary activations. Raises a
+# ValueError listing every activation row whose exercise or muscle is not in
+# the catalog.
+def build_exercise_index(exercise_data, activations):
+    exercise_names = set(exercise_data["Exercise_Name"])
+    muscle_names = set(exercise_data["muscle_gp"].dropna().astype(str))
+    problems = [
+        f"  line {i + 2}: {name!r}, {muscle!r}"
+        + (" (unknown exercise)" if name not in exercise_names else " (unknown muscle group)")
+        for i, (name, muscle) in enumerate(zip(activations["Exercise_Name"], activations["muscle_gp"]))
+        if name not in exercise_names or muscle not in muscle_names
+    ]
+    if problems:
+        raise ValueError(f"Unknown activations in {ACTIVATIONS_PATH}:\n" + "\n".join(problems))
+    return ExerciseIndex(exercise_data, activations)
+
+
+# Read the premade workouts, {workout name: [Exercise_Name, ...]} in the
+# order they are offered
+def read_premade_workouts(path=WORKOUTS_PATH):
+    with open(path, "r") as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not all(
+        isinstance(exercises, list) and all(isinstance(name, str) for name in exercises)
+        for exercises in data.values()
+    ):
+        raise ValueError(f"{path} must map each workout name to a list of exercise names")
+    return freeze(data)
+
+
+# Raise a ValueError listing every exercise of a premade workout that is not
+# an Exercise_Name of the catalog, with the catalog spelling when only the
+# case differs
+def validate_workouts(workouts, exercise_index, path=WORKOUTS_PATH):
+    by_case = {name.casefold(): name for name in exercise_index.names}
+    problems = []
+    for workout, exercises in workouts.items():
+        for name in exercises:
+            if name not in exercise_index.name_to_id:
+                hint = by_case.get(name.casefold())
+                problems.append(f"  {workout}: {name!r}" + (f" (did you mean {hint!r}?)" if hint else ""))
+    if problems:
+        raise ValueError(f"Unknown exercises in {path}:\n" + "\n".join(problems))
+
+
+# Validated premade workouts. Their heatmaps are rendered into the shared
+# heatmap cache on the way, so the first session picking one gets a hit.
+def prepare_premade_workouts(workouts, exercise_index, region_map, template_image):
+    validate_workouts(workouts, exercise_index)
+    for exercises in workouts.values():
+        render_heatmap(exercises, exercise_index, region_map, template_image, cache=heatmap_cache)
+    return workouts
+
+
+# Annotation polygons as flat arrays, from the compiled file when it was
+# built from the current annotations.json for a template of this shape and
+# only has labels of these muscle groups, otherwise validated and compiled
+# from the JSON here. Shape and muscles default to those of the template and
+# catalog files.
+def read_annotations(path=ANNOTATIONS_PATH, compiled_path=COMPILED_ANNOTATIONS_PATH, shape=None, muscles=None):
+    shape = read_template_shape() if shape is None else tuple(shape[:2])
+    muscles = catalog_muscles() if muscles is None else muscles
+    compiled = annotations.read_compiled(compiled_path, file_digest(path))
+    if compiled is not None and compiled.shape == shape and set(compiled.labels) <= muscles:
+        return compiled
+    return annotations.compile_annotations(read_muscle_data(path), shape, muscles)
+
+
+# Muscle groups of the catalog, which annotation labels have to match
+def catalog_muscles(exercise_data=None):
+    exercise_data = read_exercise_data() if exercise_data is None else exercise_data
+    return set(exercise_data["muscle_gp"].dropna().astype(str))
+
+
+# (height, width) of the template from its header, without decoding it
+def read_template_shape(path=TEMPLATE_PATH):
+    with Image.open(path) as image:
+        return image.height, image.width
+
+
+# Decode the template image as a read-only RGB array
+def read_template_image(path=TEMPLATE_PATH):
+    image = backends.get_backend().read_image(path)
+    if image is None:
+        raise FileNotFoundError(f"Could not read template image: {path}")
+    image.flags.writeable = False
+    return image
+
+
+# Turn parsed JSON into nested read-only mappings and tuples so that a
+# session cannot change the copy every other session is using
+def freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+# Mark every NumPy array of a shared value read-only: the value itself, or
+# the arrays held by it and by the planner objects, lists, tuples, dicts and
+# DataFrames it holds. A session writing into one then fails instead of
+# changing what every other session sees. Assigning a whole column of a
+# shared DataFrame still replaces it; callers copy before doing that.
+def freeze_arrays(value, seen=None):
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return value
+    seen.add(id(value))
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, pd.DataFrame):
+        for buffer in column_buffers(value):
+            buffer.flags.writeable = False
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            freeze_arrays(item, seen)
+    elif isinstance(value, (dict, MappingProxyType)):
+        for item in value.values():
+            freeze_arrays(item, seen)
+    elif type(value).__module__.startswith("planner.") and hasattr(value, "__dict__"):
+        for item in vars(value).values():
+            freeze_arrays(item, seen)
+    return value
+
+
+# NumPy buffers behind the columns of a DataFrame: the codes of categorical
+# columns and the values of NumPy columns, as the arrays owning the memory so
+# that every view pandas hands out is covered. Arrow-backed columns (the
+# strings) are immutable already.
+def column_buffers(frame):
+    for _, column in frame.items():
+        array = column.array
+        if isinstance(array, pd.Categorical):
+            buffer = array.codes
+        elif isinstance(array, pd.arrays.NumpyExtensionArray):
+            buffer = array.to_numpy()
+        else:
+            continue
+        while isinstance(buffer.base, np.ndarray):
+            buffer = buffer.base
+        yield buffer
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# A value loaded from a file once per process and shared by every session.
+# The file is only stat'ed on access; when its mtime or size changes the
+# content hash decides whether the value really has to be loaded again.
+class SharedAsset:
+    def __init__(self, path, loader):
+        self.path = path
+        self.loader = loader
+        self.value = None
+        self.stat_key = None
+        self.digest = None
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.lock = threading.Lock()
+
+    def get(self):
+        stat = os.stat(self.path)
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            if self.stat_key == stat_key:
+                self.hits += 1
+                return self.value
+
+            digest = file_digest(self.path)
+            if self.digest == digest:
+                # Touched but not changed, keep the loaded value
+                self.stat_key = stat_key
+                self.hits += 1
+                return self.value
+
+            value = freeze_arrays(self.loader(self.path))
+            if self.digest is None:
+                self.misses += 1
+            else:
+                self.reloads += 1
+            self.value, self.stat_key, self.digest = value, stat_key, digest
+            return value
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "reloads": self.reloads}
+
+
+# A value computed from other shared assets, rebuilt only when one of the
+# source assets hands out a new object
+class DerivedAsset:
+    def __init__(self, sources, builder):
+        self.sources = sources
+        self.builder = builder
+        self.source_values = None
+        self.value = None
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.lock = threading.Lock()
+
+    def get(self):
+        source_values = tuple(source.get() for source in self.sources)
+        with self.lock:
+            if self.source_values is not None and all(
+                new is old for new, old in zip(source_values, self.source_values)
+            ):
+                self.hits += 1
+                return self.value
+
+            value = freeze_arrays(self.builder(*source_values))
+            if self.source_values is None:
+                self.misses += 1
+            else:
+                self.reloads += 1
+            self.value, self.source_values = value, source_values
+            return value
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "reloads": self.reloads}
+
+
+# The objects returned below are shared by every session, callers must treat
+# them as read-only and copy before making changes. Their arrays are marked
+# read-only when loaded.
+exercise_asset = SharedAsset(EXERCISE_PATH, read_exercise_data)
+template_asset = SharedAsset(TEMPLATE_PATH, read_template_image)
+# The annotations depend on the template's shape and the catalog's muscle
+# groups too, so they are derived from all three; the file asset only
+# tracks the content hash of annotations.json
+annotations_file_asset = SharedAsset(ANNOTATIONS_PATH, file_digest)
+muscle_asset = DerivedAsset(
+    (annotations_file_asset, exercise_asset, template_asset),
+    lambda digest, exercise_data, template_image: read_annotations(
+        shape=template_image.shape, muscles=catalog_muscles(exercise_data)),
+)
+workouts_asset = SharedAsset(WORKOUTS_PATH, read_premade_workouts)
+activations_asset = SharedAsset(ACTIVATIONS_PATH, read_muscle_activations)
+# Only loaded when something asks for the URLs
+urls_asset = SharedAsset(EXERCISE_PATH, read_exercise_urls)
+if ACTIVATIONS_ENABLED:
+    exercise_index_asset = DerivedAsset((exercise_asset, activations_asset), build_exercise_index)
+else:
+    exercise_index_asset = DerivedAsset((exercise_asset,), ExerciseIndex)
+search_index_asset = DerivedAsset((exercise_asset,), SearchIndex)
+workout_generator_asset = DerivedAsset((exercise_asset, exercise_index_asset), WorkoutGenerator)
+region_map_asset = DerivedAsset(
+    (muscle_asset, template_asset),
+    lambda muscle_data, template_image: RegionMap(muscle_data, template_image.shape),
+)
+premade_workouts_asset = DerivedAsset(
+    (workouts_asset, exercise_index_asset, region_map_asset, template_asset),
+    prepare_premade_workouts,
+)
+
+ASSETS = {
+    "exercise_data": exercise_asset,
+    "muscle_data": muscle_asset,
+    "template_image": template_asset,
+    "exercise_urls": urls_asset,
+    "exercise_index": exercise_index_asset,
+    "search_index": search_index_asset,
+    "workout_generator": workout_generator_asset,
+    "region_map": region_map_asset,
+    "premade_workouts": premade_workouts_asset,
+    "muscle_activations": activations_asset,
+}
+
+
+def get_exercise_data():
+    return exercise_asset.get()
+
+
+def get_muscle_data():
+    return muscle_asset.get()
+
+
+def get_template_image():
+    return template_asset.get()
+
+
+def get_exercise_urls():
+    return urls_asset.get()
+
+
+def get_muscle_activations():
+    return activations_asset.get()
+
+
+def get_exercise_index():
+    return exercise_index_asset.get()
+
+
+def get_search_index():
+    return search_index_asset.get()
+
+
+def get_workout_generator():
+    return workout_generator_asset.get()
+
+
+def get_region_map():
+    return region_map_asset.get()
+
+
+def get_premade_workouts():
+    return premade_workouts_asset.get()
+
+
+warm_up_lock = threading.Lock()
+warm_up_thread = None
+
+
+# Load the shared assets and pre-render the premade workouts in a background
+# thread, once per process, so the first planner page does not wait for it.
+# Errors are raised again to whoever calls get_premade_workouts().
+def warm_up():
+    global warm_up_thread
+    with warm_up_lock:
+        if warm_up_thread is None:
+            warm_up_thread = threading.Thread(target=get_premade_workouts, name="planner-warm-up", daemon=True)
+            warm_up_thread.start()
+    return warm_up_thread
+
+
+# Hit/miss/reload counters of every shared asset
+def cache_stats():
+    return {name: asset.stats() for name, asset in ASSETS.items()}
@@ -0,0 +1,261 @@
+import asyncio
+import hashlib
+import io
+import os
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image  # pillow library for image processing
+
+from planner import data_store
+from planner.data_store import BASE_DIR, DerivedAsset
+
+# Thumbnails of the catalog's Exercise_Image URLs, kept on disk across
+# restarts. PLANNER_IMAGE_CACHE moves the directory.
+CACHE_DIR = os.environ.get("PLANNER_IMAGE_CACHE", os.path.join(BASE_DIR, "var", "images"))
+THUMBNAIL_SIZE = (240, 240)
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# At most this many downloads at once, across every session
+MAX_CONCURRENCY = 8
+FETCH_TIMEOUT = 10
+# Larger downloads are rejected, and so are images of more pixels, before
+# they are decoded
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+MAX_IMAGE_PIXELS = 40_000_000
+# A URL that failed is not tried again for this many seconds
+RETRY_AFTER = 600
+
+
+def read_url(url, timeout=FETCH_TIMEOUT, max_bytes=None):
+    max_bytes = MAX_IMAGE_BYTES if max_bytes is None else max_bytes
+    request = urllib.request.Request(url, headers={"User-Agent": "workout-planner"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        length = response.headers.get("Content-Length")
+        if length and length.isdigit() and int(length) > max_bytes:
+            raise ValueError(f"{url} is {length} bytes, more than {max_bytes}")
+        data = response.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise ValueError(f"{url} is more than {max_bytes} bytes")
+    return data
+
+
+# Default fetcher: the body of a URL, downloaded in a worker thread. A
+# fetcher is any coroutine function taking a URL and returning its bytes.
+async def http_fetch(url):
+    return await asyncio.to_thread(read_url, url)
+
+
+# Decode an image once and shrink it to fit THUMBNAIL_SIZE as JPEG
+def make_thumbnail(data, size=THUMBNAIL_SIZE):
+    with Image.open(io.BytesIO(data)) as image:
+        if image.width * image.height > MAX_IMAGE_PIXELS:
+            raise ValueError(f"image of {image.width}x{image.height} pixels is too large")
+        image.draft("RGB", size)
+        image = image.convert("RGB")
+    image.thumbnail(size, Image.LANCZOS)
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=85)
+    return buffer.getvalue()
+
+
+# Disk cache of exercise thumbnails, bounded by the total size of the files.
+# Files are named by the SHA-256 of the thumbnail bytes, so exercises sharing
+# an image share one file. A log of "<digest> <url>" lines maps URLs to
+# files; each put appends one line and the log is rewritten when it has
+# grown well past the number of URLs. The least recently read files are
+# removed first; the order survives restarts through the file mtimes, which
+# a read refreshes.
+# Missing thumbnails are fetched by prefetch() on a background asyncio loop
+# with bounded parallelism, so a rerun never waits for the network.
+class ThumbnailCache:
+    def __init__(self, directory=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, fetcher=http_fetch,
+                 concurrency=MAX_CONCURRENCY, size=THUMBNAIL_SIZE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.fetcher = fetcher
+        self.concurrency = concurrency
+        self.size = size
+        self.lock = threading.Lock()
+        self.pending = set()
+        self.failed = {}
+        self.hits = 0
+        self.misses = 0
+        self.fetched = 0
+        self.evictions = 0
+        self.loop = None
+        self.semaphore = None
+
+        os.makedirs(directory, exist_ok=True)
+        files = []
+        for name in os.listdir(directory):
+            if name.endswith(".jpg"):
+                stat = os.stat(os.path.join(directory, name))
+                files.append((stat.st_mtime_ns, name[:-4], stat.st_size))
+        self.entries = OrderedDict((digest, size) for _, digest, size in sorted(files))
+        self.current_bytes = sum(self.entries.values())
+        # Thumbnails of another size are other files, so every size has its
+        # own log
+        self.log_path = os.path.join(directory, f"urls-{size[0]}x{size[1]}.log")
+        self.urls = {}
+        self.read_log()
+
+    def read_log(self):
+        lines = 0
+        try:
+            with open(self.log_path) as f:
+                for line in f:
+                    digest, _, url = line.rstrip("\n").partition(" ")
+                    lines += 1
+                    if url:
+                        self.urls[url] = digest
+        except OSError:
+            pass
+        self.urls = {url: digest for url, digest in self.urls.items() if digest in self.entries}
+        if lines > 2 * len(self.urls) + 100:
+            with open(self.log_path + ".tmp", "w") as f:
+                f.writelines(f"{digest} {url}\n" for url, digest in self.urls.items())
+            os.replace(self.log_path + ".tmp", self.log_path)
+
+    def path(self, digest):
+        return os.path.join(self.directory, digest + ".jpg")
+
+    # Thumbnail bytes of a URL, or None when it is not cached
+    def get(self, url):
+        with self.lock:
+            digest = self.urls.get(url)
+            if digest not in self.entries:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(digest)
+            self.hits += 1
+        try:
+            with open(self.path(digest), "rb") as f:
+                data = f.read()
+            os.utime(self.path(digest))
+            return data
+        except OSError:
+            # Removed behind our back
+            with self.lock:
+                self.current_bytes -= self.entries.pop(digest, 0)
+            return None
+
+    def put(self, url, data):
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+        with self.lock:
+            self.current_bytes += len(data) - self.entries.pop(digest, 0)
+            self.entries[digest] = len(data)
+            self.urls[url] = digest
+            with open(self.log_path, "a") as f:
+                f.write(f"{digest} {url}\n")
+            while self.current_bytes > self.max_bytes and len(self.entries) > 1:
+                evicted, size = self.entries.popitem(last=False)
+                self.current_bytes -= size
+                self.evictions += 1
+                try:
+                    os.remove(self.path(evicted))
+                except OSError:
+                    pass
+
+    # "cached", "pending", "failed" (recently) or "missing"
+    def status(self, url):
+        with self.lock:
+            if self.urls.get(url) in self.entries:
+                return "cached"
+            if url in self.pending:
+                return "pending"
+            if time.monotonic() - self.failed.get(url, -RETRY_AFTER) < RETRY_AFTER:
+                return "failed"
+        return "missing"
+
+    async def fetch(self, url):
+        try:
+            async with self.semaphore:
+                data = await self.fetcher(url)
+            thumbnail = await asyncio.to_thread(make_thumbnail, data, self.size)
+            await asyncio.to_thread(self.put, url, thumbnail)
+            with self.lock:
+                self.fetched += 1
+                self.failed.pop(url, None)
+        except Exception:
+            with self.lock:
+                self.failed[url] = time.monotonic()
+        finally:
+            with self.lock:
+                self.pending.discard(url)
+
+    async def fetch_all(self, urls):
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(*(self.fetch(url) for url in urls))
+
+    def start_loop(self):
+        with self.lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                # Blocking downloads and resizes run in threads, enough for
+                # every allowed download plus the resizes
+                self.loop.set_default_executor(ThreadPoolExecutor(self.concurrency + 2,
+                                                                  thread_name_prefix="planner-images"))
+                threading.Thread(target=self.loop.run_forever, name="planner-images", daemon=True).start()
+            return self.loop
+
+    # Start fetching the URLs that are neither cached, already being fetched
+    # nor recently failed. Returns a concurrent.futures.Future, or None when
+    # there was nothing to fetch.
+    def prefetch(self, urls):
+        urls = [url for url in dict.fromkeys(urls) if url and self.status(url) == "missing"]
+        with self.lock:
+            urls = [url for url in urls if url not in self.pending]
+            self.pending.update(urls)
+        if not urls:
+            return None
+        return asyncio.run_coroutine_threadsafe(self.fetch_all(urls), self.start_loop())
+
+    def stats(self):
+        with self.lock:
+            return {"entries": len(self.entries), "bytes": self.current_bytes, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses, "fetched": self.fetched,
+                    "evictions": self.evictions, "pending": len(self.pending), "failed": len(self.failed)}
+
+
+# {Exercise_Name: card fields} for the detail cards: muscle group, equipment,
+# rating, the first image URL available and the description URL
+def exercise_cards(exercise_data, exercise_urls):
+    images = exercise_urls["Exercise_Image"].fillna(exercise_urls["Exercise_Image1"])
+    cards = {}
+    for (name, muscle, equipment, rating), image, url in zip(
+        exercise_data[["Exercise_Name", "muscle_gp", "Equipment", "Rating"]].itertuples(index=False),
+        images, exercise_urls["Description_URL"],
+    ):
+        cards.setdefault(name, {
+            "muscle": muscle, "equipment": equipment, "rating": None if rating != rating else float(rating),
+            "image": image if isinstance(image, str) else None, "url": url if isinstance(url, str) else None,
+        })
+    return cards
+
+
+cards_asset = DerivedAsset((data_store.exercise_asset, data_store.urls_asset), exercise_cards)
+
+
+def get_exercise_cards():
+    return cards_asset.get()
+
+
+cache_lock = threading.Lock()
+thumbnail_cache = None
+
+
+# The cache shared by every session, opened on first use
+def get_thumbnail_cache():
+    global thumbnail_cache
+    with cache_lock:
+        if thumbnail_cache is None:
+            thumbnail_cache = ThumbnailCache()
+        return thumbnail_cache
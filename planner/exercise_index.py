@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+
+# Activation of an exercise's own muscle_gp, secondary muscles are given
+# relative to it
+PRIMARY_WEIGHT = 1.0
+
+
+# Lookup tables built once per catalog so that counting the muscles of a
+# selection does not scan the DataFrame for every selected exercise.
+#   name_to_id:   Exercise_Name -> integer exercise id
+#   muscle_codes: exercise id -> code of its muscle group (-1 when missing)
+#   muscle_names: muscle group code -> muscle group name
+# Every exercise also has weighted muscle activations, a sparse
+# exercise x muscle matrix in CSR layout: 1.0 for the muscle_gp of each of
+# its catalog rows plus the secondary muscles given in `activations`
+# (Exercise_Name, muscle_gp, weight rows, see data/muscle_activations.csv).
+#   activation_starts:  activations of exercise i are at [starts[i]:starts[i + 1]]
+#   activation_muscles: muscle code of each activation
+#   activation_weights: weight of each activation
+class ExerciseIndex:
+    def __init__(self, exercise_data, activations=None):
+        name_ids, names = pd.factorize(exercise_data["Exercise_Name"])
+        row_codes, muscles = pd.factorize(exercise_data["muscle_gp"])
+
+        self.names = np.asarray(names, dtype=object)
+        self.name_to_id = {name: i for i, name in enumerate(self.names)}
+        self.muscle_names = np.asarray(muscles, dtype=object)
+        self.muscle_ids = {muscle: i for i, muscle in enumerate(self.muscle_names)}
+
+        # The prepared catalog has one row per name, then an exercise id maps
+        # to a single muscle code. A raw catalog can repeat a name, in which
+        # case every row of that name is counted, as the DataFrame scan did.
+        rows_per_name = np.bincount(name_ids, minlength=len(names))
+        self.unique_names = bool((rows_per_name == 1).all())
+        if self.unique_names:
+            self.muscle_codes = np.empty(len(names), dtype=np.int32)
+            self.muscle_codes[name_ids] = row_codes
+        else:
+            order = np.argsort(name_ids, kind="stable")
+            self.row_codes = row_codes[order].astype(np.int32)
+            self.row_starts = np.concatenate(([0], np.cumsum(rows_per_name)))
+            self.muscle_codes = None
+
+        entry_ids, entry_codes = name_ids, row_codes
+        entry_weights = np.full(len(name_ids), PRIMARY_WEIGHT)
+        if activations is not None and len(activations):
+            entry_ids = np.concatenate((entry_ids, lookup(activations["Exercise_Name"], self.name_to_id)))
+            entry_codes = np.concatenate((entry_codes, lookup(activations["muscle_gp"], self.muscle_ids)))
+            entry_weights = np.concatenate((entry_weights, activations["weight"].to_numpy(dtype=np.float64)))
+        # Unknown names and muscles, and rows without a muscle_gp, activate nothing
+        known = (entry_ids >= 0) & (entry_codes >= 0)
+        entry_ids, entry_codes, entry_weights = entry_ids[known], entry_codes[known], entry_weights[known]
+        order = np.argsort(entry_ids, kind="stable")
+        self.activation_muscles = entry_codes[order].astype(np.int32)
+        self.activation_weights = entry_weights[order]
+        self.activation_starts = np.concatenate(
+            ([0], np.cumsum(np.bincount(entry_ids.astype(np.intp), minlength=len(names))))
+        )
+
+    def __len__(self):
+        return len(self.names)
+
+    # Integer ids of the selected exercises, unknown names are ignored
+    def ids(self, selected_exercises):
+        lookup = self.name_to_id
+        return np.fromiter(
+            (lookup[name] for name in selected_exercises if name in lookup),
+            dtype=np.intp,
+        )
+
+    # Muscle codes hit by the given exercise ids, one entry per catalog row
+    def codes(self, exercise_ids):
+        if self.unique_names:
+            return self.muscle_codes[exercise_ids]
+        if len(exercise_ids) == 0:
+            return np.empty(0, dtype=np.int32)
+        return np.concatenate(
+            [self.row_codes[self.row_starts[i]:self.row_starts[i + 1]] for i in exercise_ids]
+        )
+
+    # Number of selected exercises per muscle code
+    def count_vector(self, selected_exercises):
+        codes = self.codes(self.ids(selected_exercises))
+        codes = codes[codes >= 0]
+        return np.bincount(codes, minlength=len(self.muscle_names))
+
+    # Same {muscle_gp: count} dict the per-exercise DataFrame scan produced
+    def muscle_counts(self, selected_exercises):
+        counts = self.count_vector(selected_exercises)
+        return {self.muscle_names[i]: int(counts[i]) for i in np.flatnonzero(counts)}
+
+    # Activation entries (muscle codes, weights) of the given exercise ids,
+    # with the weights scaled per exercise when multipliers are given
+    def activations(self, exercise_ids, multipliers=None):
+        starts = self.activation_starts[exercise_ids]
+        lengths = self.activation_starts[np.asarray(exercise_ids) + 1] - starts
+        # Position of every entry: its row start plus its offset in the row
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        entries = np.repeat(starts, lengths) + offsets
+        weights = self.activation_weights[entries]
+        if multipliers is not None:
+            weights = weights * np.repeat(multipliers, lengths)
+        return self.activation_muscles[entries], weights
+
+    # Activation per muscle code of a selection: the mat-vec of the selection
+    # (1 per exercise, or the given {Exercise_Name: sets} multipliers) with
+    # the activation matrix
+    def intensity_vector(self, selected_exercises, multipliers=None):
+        selected_exercises = list(selected_exercises)
+        exercise_ids = self.ids(selected_exercises)
+        if multipliers is not None:
+            multipliers = np.array([multipliers.get(name, 1) for name in selected_exercises
+                                    if name in self.name_to_id], dtype=np.float64)
+        codes, weights = self.activations(exercise_ids, multipliers)
+        return np.bincount(codes, weights, minlength=len(self.muscle_names))
+
+    # Intensity vectors of several selections in one pass, a row each
+    def intensity_matrix(self, selections):
+        selection_ids = [self.ids(selection) for selection in selections]
+        exercise_ids = np.concatenate(selection_ids) if selection_ids else np.empty(0, dtype=np.intp)
+        codes, weights = self.activations(exercise_ids)
+        lengths = self.activation_starts[exercise_ids + 1] - self.activation_starts[exercise_ids]
+        rows = np.repeat(np.repeat(np.arange(len(selections)), [len(ids) for ids in selection_ids]), lengths)
+        muscles = len(self.muscle_names)
+        intensity = np.bincount(rows * muscles + codes, weights, minlength=len(selections) * muscles)
+        return intensity.reshape(len(selections), muscles)
+
+    # {muscle_gp: activation} of a selection, for RegionMap.levels()
+    def muscle_intensity(self, selected_exercises, multipliers=None):
+        intensity = self.intensity_vector(selected_exercises, multipliers)
+        return {self.muscle_names[i]: float(intensity[i]) for i in np.flatnonzero(intensity)}
+
+
+# Integer ids of a column's values in a {value: id} dict, -1 when missing
+def lookup(values, ids):
+    return values.astype(object).map(ids).fillna(-1).to_numpy(dtype=np.int64)
@@ -0,0 +1,182 @@
+import hashlib
+import io
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont  # pillow library for image processing
+
+from planner import data_store, timing
+from planner.heatmap_cache import HeatmapCache
+from planner.render import PALETTE
+
+EXPORT_FORMATS = {"PDF": "application/pdf", "PNG": "image/png"}
+# Exports run on their own small pool so that however many are requested,
+# interactive reruns keep the rest of the CPU. Requests beyond MAX_PENDING
+# queued or running exports are turned down.
+EXPORT_WORKERS = 1
+MAX_PENDING = 8
+# Memory budget for finished exports, kept by plan hash
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+# A4 at 150 dpi
+PAGE_SIZE = (1240, 1754)
+MARGIN = 80
+ROW_HEIGHT = 34
+COLUMNS = [("Exercise", "Exercise_Name", 0), ("Muscle Group", "muscle_gp", 560),
+           ("Equipment", "Equipment", 800), ("Rating", "Rating", 990)]
+
+
+class ExportBusy(Exception):
+    pass
+
+
+def font(size):
+    return ImageFont.load_default(size=size)
+
+
+# Hash of what a sheet shows, the same plan in the same format is exported once
+def plan_key(exercises, format):
+    return hashlib.sha256(json.dumps([format, list(exercises)]).encode()).hexdigest()
+
+
+# Horizontal bar of the heatmap colormap with its end labels
+def draw_legend(draw, page, x, y, width):
+    colors = PALETTE[1:]
+    bar = colors[np.linspace(0, len(colors) - 1, width).round().astype(np.intp)]
+    page.paste(Image.fromarray(np.repeat(bar[None], 24, axis=0)), (x, y))
+    draw.text((x, y + 30), "Minimal", fill=(85, 85, 85), font=font(20))
+    draw.text((x + width, y + 30), "Extreme", fill=(85, 85, 85), font=font(20), anchor="ra")
+    return y + 60
+
+
+# Printable pages for a plan: title, heatmap and legend on the first page,
+# then the exercise table with its rating and equipment, continued on as many
+# pages as it needs. A name listed on several catalog rows shows its first,
+# like the search results and exercise cards.
+def sheet_pages(exercises, exercise_data, heatmap, title="Workout Plan"):
+    catalog = exercise_data.drop_duplicates("Exercise_Name").set_index("Exercise_Name")
+    rows = catalog.reindex(list(exercises)).reset_index()
+    pages = []
+
+    def new_page():
+        page = Image.new("RGB", PAGE_SIZE, "white")
+        pages.append(page)
+        return page, ImageDraw.Draw(page)
+
+    page, draw = new_page()
+    draw.text((MARGIN, MARGIN), title, fill="black", font=font(44))
+    y = MARGIN + 80
+    width = PAGE_SIZE[0] - 2 * MARGIN
+    image = Image.fromarray(heatmap)
+    height = min(round(image.height * width / image.width), 820)
+    image = image.resize((round(image.width * height / image.height), height), Image.LANCZOS)
+    page.paste(image, ((PAGE_SIZE[0] - image.width) // 2, y))
+    y = draw_legend(draw, page, MARGIN + 100, y + height + 20, width - 200) + 20
+
+    def header(y):
+        for name, _, offset in COLUMNS:
+            draw.text((MARGIN + offset, y), name, fill="black", font=font(24))
+        draw.line((MARGIN, y + ROW_HEIGHT, PAGE_SIZE[0] - MARGIN, y + ROW_HEIGHT), fill=(120, 120, 120), width=2)
+        return y + ROW_HEIGHT + 8
+
+    y = header(y)
+    for row in rows.itertuples(index=False):
+        if y + ROW_HEIGHT > PAGE_SIZE[1] - MARGIN:
+            page, draw = new_page()
+            y = header(MARGIN)
+        for _, column, offset in COLUMNS:
+            value = getattr(row, column)
+            text = "" if value != value else f"{value:.1f}" if column == "Rating" else str(value)
+            draw.text((MARGIN + offset, y), text[:48], fill=(30, 30, 30), font=font(20))
+        y += ROW_HEIGHT
+    return pages
+
+
+# PDF with a page each, or a PNG with the pages stacked
+def encode_sheet(pages, format):
+    buffer = io.BytesIO()
+    if format == "PDF":
+        pages[0].save(buffer, format="PDF", save_all=True, append_images=pages[1:], resolution=150)
+    else:
+        sheet = Image.new("RGB", (PAGE_SIZE[0], PAGE_SIZE[1] * len(pages)), "white")
+        for i, page in enumerate(pages):
+            sheet.paste(page, (0, PAGE_SIZE[1] * i))
+        sheet.save(buffer, format="PNG", compress_level=3)
+    return buffer.getvalue()
+
+
+class ExportJob:
+    def __init__(self):
+        self.progress = 0.0
+        self.future = None
+
+
+# Builds printable sheets in the background. submit() returns the plan hash
+# right away, status() reports the progress of that export and, once done,
+# its bytes. Finished exports are kept in an LRU bounded by size, so
+# exporting the same plan again is immediate.
+class PlanExporter:
+    def __init__(self, workers=EXPORT_WORKERS, max_pending=MAX_PENDING, max_bytes=DEFAULT_MAX_BYTES):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="planner-export")
+        self.max_pending = max_pending
+        self.results = HeatmapCache(max_bytes)
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, exercises, format="PDF"):
+        exercise_data = data_store.get_exercise_data()
+        exercise_index = data_store.get_exercise_index()
+        region_map = data_store.get_region_map()
+        template_image = data_store.get_template_image()
+        # Exports of older data are dropped when the shared assets reload
+        self.results.bind(exercise_data, region_map, template_image)
+        key = plan_key(exercises, format)
+        if self.results.get(key) is not None:
+            return key
+        with self.lock:
+            job = self.jobs.get(key)
+            # A failed export is tried again
+            if job is not None and not (job.future.done() and job.future.exception()):
+                return key
+            pending = sum(not job.future.done() for job in self.jobs.values())
+            if pending >= self.max_pending:
+                raise ExportBusy(f"{pending} exports are already waiting, try again shortly")
+            job = self.jobs[key] = ExportJob()
+            job.future = self.pool.submit(self.run, key, job, list(exercises), format,
+                                          exercise_data, exercise_index, region_map, template_image)
+        return key
+
+    def run(self, key, job, exercises, format, exercise_data, exercise_index, region_map, template_image):
+        with timing.span("export.heatmap"):
+            levels = region_map.levels(exercise_index.muscle_intensity(exercises))
+            heatmap = region_map.paint(levels, template_image)
+        job.progress = 0.3
+        with timing.span("export.layout"):
+            pages = sheet_pages(exercises, exercise_data, heatmap)
+        job.progress = 0.6
+        with timing.span("export.encode"):
+            data = encode_sheet(pages, format)
+        self.results.put(key, data)
+        job.progress = 1.0
+        with self.lock:
+            del self.jobs[key]
+        return data
+
+    # {"state": "pending" | "done" | "error" | "unknown", "progress": 0..1,
+    #  "data": bytes when done, "error": message when failed}
+    def status(self, key):
+        data = self.results.get(key)
+        if data is not None:
+            return {"state": "done", "progress": 1.0, "data": data}
+        with self.lock:
+            job = self.jobs.get(key)
+        if job is None:
+            return {"state": "unknown", "progress": 0.0}
+        if job.future.done() and job.future.exception() is not None:
+            return {"state": "error", "progress": job.progress, "error": str(job.future.exception())}
+        return {"state": "pending", "progress": job.progress}
+
+
+exporter = PlanExporter()
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+DEFAULT_BUDGET = 8
+
+
+# Builds workouts from the catalog: given target muscle groups, the
+# available equipment and a number of exercises, picks exercises so that
+# every target is hit as evenly as possible, preferring higher Rating.
+# Coverage is measured with the index's weighted activations, the same
+# intensity the heatmap shows, so a secondary muscle counts for its weight.
+#
+# Equipment and ratings are per catalog row, kept in CSR form: the rows of
+# exercise i are [row_starts[i]:row_starts[i + 1]]. The prepared catalog has
+# one row per exercise; raw catalogs may list a name several times.
+class WorkoutGenerator:
+    def __init__(self, exercise_data, exercise_index):
+        self.index = exercise_index
+        name_ids = exercise_data["Exercise_Name"].map(exercise_index.name_to_id).to_numpy(dtype=np.int64)
+        order = np.argsort(name_ids, kind="stable")
+        rows_per_name = np.bincount(name_ids, minlength=len(exercise_index))
+        self.row_starts = np.concatenate(([0], np.cumsum(rows_per_name)))
+
+        equipment_codes, equipment = pd.factorize(exercise_data["Equipment"].astype(object), sort=True)
+        self.equipment_names = [str(value) for value in equipment]
+        self.equipment_ids = {name: i for i, name in enumerate(self.equipment_names)}
+        self.row_equipment = equipment_codes[order]
+
+        # Best rating of each exercise, missing ratings rank last
+        rating = pd.to_numeric(exercise_data["Rating"], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        rating = np.nan_to_num(rating[order], nan=-np.inf)
+        self.ratings = np.maximum.reduceat(rating, self.row_starts[:-1]) if len(rating) else rating
+        # Exercise ids from best to worst rated, ties broken by name
+        self.rank_order = np.lexsort((exercise_index.names.astype(str), -self.ratings))
+        # Exercise id of every activation entry of the index
+        self.activation_owners = np.repeat(np.arange(len(exercise_index)),
+                                           np.diff(exercise_index.activation_starts))
+
+    def codes(self, names, lookup, kind):
+        unknown = [name for name in names if name not in lookup]
+        if unknown:
+            raise ValueError(f"Unknown {kind}: {', '.join(map(str, unknown))}")
+        return np.array([lookup[name] for name in names], dtype=np.int64)
+
+    # Any row of the exercise satisfies the condition
+    def any_row(self, row_mask):
+        if len(row_mask) == 0:
+            return np.zeros(len(self.index), dtype=bool)
+        return np.logical_or.reduceat(row_mask, self.row_starts[:-1])
+
+    # Exercise names for the given targets in the order they were picked,
+    # ready for highlight_muscles(). An empty equipment list allows
+    # everything. Stops early when no allowed exercise can activate a target
+    # muscle any more.
+    def generate(self, muscles, equipment=(), budget=DEFAULT_BUDGET, exclude=()):
+        index = self.index
+        targets = self.codes(muscles, index.muscle_ids, "muscle groups")
+        is_target = np.zeros(len(index.muscle_names), dtype=bool)
+        is_target[targets] = True
+
+        candidate = np.zeros(len(index), dtype=bool)
+        candidate[self.activation_owners[is_target[index.activation_muscles]]] = True
+        if len(equipment):
+            allowed = np.isin(self.row_equipment, self.codes(equipment, self.equipment_ids, "equipment"))
+            candidate &= self.any_row(allowed)
+        candidate[index.ids(exclude)] = False
+        # Candidates in rank order, so the first best gain is the best rated
+        candidates = self.rank_order[candidate[self.rank_order]]
+        if len(candidates) == 0 or budget <= 0:
+            return []
+
+        # Target activations of the candidates, by position in candidates
+        codes, weights = index.activations(candidates)
+        positions = np.repeat(np.arange(len(candidates)),
+                              index.activation_starts[candidates + 1] - index.activation_starts[candidates])
+        on_target = is_target[codes]
+        positions, codes, weights = positions[on_target], codes[on_target], weights[on_target]
+        if (np.bincount(positions, minlength=len(candidates)) == 1).all():
+            # With one target activation per candidate, a candidate only
+            # competes with those activating the same muscle, heavier first,
+            # and only the best `budget` of each muscle can ever be picked
+            order = np.lexsort((positions, -weights, codes))
+            group_starts = np.searchsorted(codes[order], codes[order])
+            keep = np.zeros(len(candidates), dtype=bool)
+            keep[positions[order]] = np.arange(len(order)) - group_starts < budget
+            renumber = np.cumsum(keep) - 1
+            candidates = candidates[keep]
+            kept = keep[positions]
+            positions, codes, weights = renumber[positions[kept]], codes[kept], weights[kept]
+        starts = np.searchsorted(positions, np.arange(len(candidates) + 1))
+
+        coverage = np.zeros(len(index.muscle_names), dtype=np.float64)
+        # Candidates left that activate each muscle
+        available = np.bincount(codes, minlength=len(index.muscle_names))
+        taken = np.zeros(len(candidates), dtype=bool)
+        picked = []
+        for _ in range(min(budget, len(candidates))):
+            open_targets = targets[available[targets] > 0]
+            if len(open_targets) == 0:
+                break
+            # Gain of a candidate: its activation of the least covered targets
+            least = is_target & (coverage <= coverage[open_targets].min() + 1e-9)
+            gain = np.bincount(positions, weights * least[codes], minlength=len(candidates))
+            gain[taken] = -1
+            best = int(np.argmax(gain))
+            if gain[best] <= 0:
+                break
+            taken[best] = True
+            hit = slice(starts[best], starts[best + 1])
+            np.add.at(coverage, codes[hit], weights[hit])
+            np.subtract.at(available, codes[hit], 1)
+            picked.append(candidates[best])
+        return list(index.names[picked])
@@ -0,0 +1,196 @@
+import io
+import threading
+from collections import Counter, OrderedDict
+
+import numpy as np
+from PIL import Image  # pillow library for image processing
+
+from planner import timing
+from planner.render import intensity_levels
+
+# Default memory budget for the encoded heatmaps kept by the app
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+# Encoder settings per format. zlib level 3 encodes the flat-colored heatmap
+# about twice as fast as Pillow's default level 6, and not larger.
+ENCODE_OPTIONS = {
+    "PNG": {"compress_level": 3},
+    "JPEG": {"quality": 90},
+    "WEBP": {"quality": 80},
+}
+
+
+# Encode a rendered RGB array as image file bytes
+def encode_image(image, format="PNG"):
+    buffer = io.BytesIO()
+    Image.fromarray(image).save(buffer, format=format, **ENCODE_OPTIONS.get(format, {}))
+    return buffer.getvalue()
+
+
+# Least-recently-used cache of encoded heatmaps bounded by the total size of
+# the stored bytes. Keys are the bucketed level vector of a render, so every
+# selection that ends up with the same colors shares one entry.
+class HeatmapCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.sources = None
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            data = self.entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        with self.lock:
+            if len(data) > self.max_bytes:
+                return
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= len(old)
+            self.entries[key] = data
+            self.current_bytes += len(data)
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.current_bytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.current_bytes = 0
+
+    # Entries are only valid for the region map and template they were
+    # rendered from, drop them all when the shared assets were reloaded
+    def bind(self, *sources):
+        with self.lock:
+            if self.sources is not None and len(sources) == len(self.sources) and all(
+                new is old for new, old in zip(sources, self.sources)
+            ):
+                return
+            self.entries.clear()
+            self.current_bytes = 0
+            self.sources = sources
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+heatmap_cache = HeatmapCache()
+
+
+# Cache key of a render: every selection with the same levels looks the same
+def heatmap_key(levels, format="PNG"):
+    return (format, levels.astype("u2").tobytes())
+
+
+# Encoded heatmap of a selection, rendered and encoded only on a cache miss.
+# multipliers optionally weighs exercises, e.g. by {Exercise_Name: sets}.
+def render_heatmap(selected_exercises, exercise_index, region_map, template_image,
+                   cache=heatmap_cache, format="PNG", multipliers=None):
+    with timing.span("highlight.count"):
+        muscle_intensity = exercise_index.muscle_intensity(selected_exercises, multipliers)
+        levels = region_map.levels(muscle_intensity)
+        key = heatmap_key(levels, format)
+
+    cache.bind(region_map, template_image)
+    data = cache.get(key)
+    if data is None:
+        with timing.span("highlight.paint"):
+            highlighted_image = region_map.paint(levels, template_image)
+        with timing.span("highlight.encode"):
+            data = encode_image(highlighted_image, format)
+        cache.put(key, data)
+    return data
+
+
+# Per-session renderer for selections that change one exercise at a time.
+# A session only keeps its selection and the muscle intensity vector of it,
+# everything else is the shared index, region map, template and cache. A new
+# selection only adds and removes the activations of the exercises that
+# changed; a cache miss paints a fresh frame, which is dropped once encoded.
+# The bytes are the same as render_heatmap().
+class IncrementalHeatmap:
+    def __init__(self, exercise_index, region_map, template_image, cache=heatmap_cache, format="PNG"):
+        self.exercise_index = exercise_index
+        self.region_map = region_map
+        self.template_image = template_image
+        self.cache = cache
+        self.format = format
+        self.selection = Counter()
+        self.intensity = np.zeros(len(exercise_index.muscle_names) + 1, dtype=np.float64)
+
+    # Whether this renderer was built from these shared objects
+    def matches(self, exercise_index, region_map, template_image):
+        return (self.exercise_index is exercise_index and self.region_map is region_map
+                and self.template_image is template_image)
+
+    def update_intensity(self, selected_exercises):
+        selection = Counter(selected_exercises)
+        added, removed = selection - self.selection, self.selection - selection
+        for names, sign in ((added, 1), (removed, -1)):
+            if names:
+                codes, weights = self.exercise_index.activations(self.exercise_index.ids(names.elements()))
+                np.add.at(self.intensity, codes, sign * weights)
+        self.selection = selection
+
+    def levels(self):
+        label_muscles = label_muscle_codes(self.exercise_index, self.region_map)
+        # Rounded so that adding and removing weights leaves no residue
+        return intensity_levels(self.intensity[label_muscles].round(9))
+
+    def render(self, selected_exercises):
+        with timing.span("highlight.count"):
+            self.update_intensity(selected_exercises)
+            levels = self.levels()
+            key = heatmap_key(levels, self.format)
+
+        self.cache.bind(self.region_map, self.template_image)
+        data = self.cache.get(key)
+        if data is None:
+            with timing.span("highlight.paint"):
+                frame = self.region_map.paint(levels, self.template_image)
+            with timing.span("highlight.encode"):
+                data = encode_image(frame, self.format)
+            self.cache.put(key, data)
+        return data
+
+
+label_muscles_lock = threading.Lock()
+label_muscles = None
+
+
+# Muscle code of every label of a region map (index 0 is the background),
+# -1 for labels without a muscle, which reads the "no muscle" slot at the
+# end of an intensity vector. Computed once for the current exercise index
+# and region map and shared by every session.
+def label_muscle_codes(exercise_index, region_map):
+    global label_muscles
+    with label_muscles_lock:
+        if label_muscles is None or label_muscles[0] is not exercise_index or label_muscles[1] is not region_map:
+            codes = np.array([-1] + [exercise_index.muscle_ids.get(label, -1) for label in region_map.labels],
+                             dtype=np.intp)
+            codes.flags.writeable = False
+            label_muscles = (exercise_index, region_map, codes)
+        return label_muscles[2]
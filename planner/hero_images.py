@@ -0,0 +1,119 @@
+import glob
+import io
+import os
+import time
+
+from PIL import Image  # pillow library for image processing
+
+from planner.data_store import BASE_DIR, SharedAsset, file_digest
+
+HERO_PATH = os.path.join(BASE_DIR, "images", "gym_art.jpg")
+# Served by Streamlit at app/static/hero/ when server.enableStaticServing is on
+OUTPUT_DIR = os.path.join(BASE_DIR, "static", "hero")
+STATIC_URL = "app/static/hero"
+
+# Streamlit's centered layout is at most 730 CSS pixels wide, the largest
+# variant covers it on 2x screens
+WIDTHS = (480, 730, 1080, 1460)
+FORMATS = {"JPEG": ("jpg", {"quality": 82, "optimize": True, "progressive": True}),
+           "WEBP": ("webp", {"quality": 80, "method": 6})}
+
+
+# Downscaled and recompressed copies of the hero image, written once per
+# source content. File names carry a prefix of the source hash, so a changed
+# source gets new variants and the stale ones are removed.
+def generate_variants(source=HERO_PATH, output_dir=OUTPUT_DIR, widths=WIDTHS):
+    stem = os.path.splitext(os.path.basename(source))[0]
+    digest = file_digest(source)[:12]
+    os.makedirs(output_dir, exist_ok=True)
+
+    variants = []
+    image = None
+    for format, (extension, options) in FORMATS.items():
+        for width in widths:
+            name = f"{stem}-{digest}-{width}.{extension}"
+            path = os.path.join(output_dir, name)
+            if not os.path.exists(path):
+                if image is None:
+                    image = Image.open(source)
+                    image.draft("RGB", (max(widths), image.height * max(widths) // image.width))
+                    image = image.convert("RGB")
+                height = round(image.height * width / image.width)
+                resized = image.resize((width, height), Image.LANCZOS)
+                # Write to a temporary name first so a concurrent reader never
+                # sees a partial file
+                resized.save(path + ".tmp", format=format, **options)
+                os.replace(path + ".tmp", path)
+            variants.append({"format": format, "width": width, "name": name, "path": path,
+                             "bytes": os.path.getsize(path)})
+
+    for path in glob.glob(os.path.join(output_dir, f"{stem}-*")):
+        if f"{stem}-{digest}-" not in os.path.basename(path):
+            os.remove(path)
+    return variants
+
+
+# <picture> element letting the browser pick the variant that fits the layout,
+# WebP where supported and JPEG otherwise
+def picture_html(variants, alt="", sizes="(max-width: 730px) 100vw, 730px"):
+    def srcset(format):
+        return ", ".join(f"{STATIC_URL}/{v['name']} {v['width']}w"
+                         for v in variants if v["format"] == format)
+
+    jpeg = [v for v in variants if v["format"] == "JPEG"]
+    fallback = min(jpeg, key=lambda v: abs(v["width"] - 730))
+    return (
+        "<picture>"
+        f"<source type='image/webp' srcset='{srcset('WEBP')}' sizes='{sizes}'>"
+        f"<img src='{STATIC_URL}/{fallback['name']}' srcset='{srcset('JPEG')}' sizes='{sizes}' "
+        f"alt='{alt}' style='width: 100%; height: auto;'>"
+        "</picture>"
+    )
+
+
+# Variants are generated on first use and again only when the source changes
+hero_asset = SharedAsset(HERO_PATH, generate_variants)
+
+
+def get_hero_variants():
+    return hero_asset.get()
+
+
+def decode_time(path, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with Image.open(path) as image:
+            image.load()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# Build the variants and compare them against the original image.
+#   python -m planner.hero_images
+def main():
+    start = time.perf_counter()
+    variants = generate_variants()
+    print(f"Variants ready in {time.perf_counter() - start:.2f}s under {OUTPUT_DIR}")
+
+    rows = [("original", HERO_PATH)] + [(f"{v['format']} {v['width']}w", v["path"]) for v in variants]
+    print(f"{'variant':>14} {'size':>11} {'bytes':>10} {'decode ms':>10}")
+    for label, path in rows:
+        with Image.open(path) as image:
+            size = "x".join(map(str, image.size))
+        print(f"{label:>14} {size:>11} {os.path.getsize(path):>10} {decode_time(path) * 1e3:>10.1f}")
+
+    # What the front page used to send: Streamlit decodes the original and
+    # re-encodes it at its maximum content width on every visit
+    start = time.perf_counter()
+    with Image.open(HERO_PATH) as image:
+        width = 1460
+        resized = image.resize((width, round(image.height * width / image.width)), Image.BILINEAR)
+        buffer = io.BytesIO()
+        resized.save(buffer, format="JPEG", quality=90)
+    print(f"st.image(original): {len(buffer.getvalue())} bytes, "
+          f"{(time.perf_counter() - start) * 1e3:.1f} ms per visit")
+
+
+if __name__ == "__main__":
+    main()
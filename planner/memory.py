@@ -0,0 +1,104 @@
+import os
+import sys
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+from planner import data_store
+from planner.exercise_images import cards_asset, get_thumbnail_cache
+from planner.export import exporter
+from planner.heatmap_cache import heatmap_cache
+from planner.svg_overlay import overlay_asset
+from planner.weekly import thumbnails_asset
+
+# The Memory page is off unless PLANNER_DIAGNOSTICS is set
+ENABLED = os.environ.get("PLANNER_DIAGNOSTICS", "") not in ("", "0")
+
+# Process-wide values outside data_store.ASSETS, read without loading them
+SHARED = {
+    "svg_overlay": lambda: overlay_asset.value,
+    "week_thumbnails": lambda: thumbnails_asset.value,
+    "exercise_cards": lambda: cards_asset.value,
+    "heatmap_cache": lambda: heatmap_cache,
+    "export_results": lambda: exporter.results,
+}
+
+
+# Bytes held by a value and everything it holds, each object counted once
+# across calls sharing `seen`. NumPy arrays count their data, DataFrames
+# their deep memory usage; planner objects are followed through their
+# attributes, other objects (locks, threads, modules) only count themselves.
+def deep_size(value, seen):
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, np.ndarray):
+        size = sys.getsizeof(value)
+        if value.base is not None:
+            size += deep_size(value.base, seen)
+        if value.dtype == object:
+            size += sum(deep_size(item, seen) for item in value.ravel())
+        return size
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    size = sys.getsizeof(value)
+    if isinstance(value, (str, bytes, bytearray, int, float, bool)) or value is None:
+        return size
+    if isinstance(value, (dict, MappingProxyType)):
+        return size + sum(deep_size(key, seen) + deep_size(item, seen) for key, item in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(deep_size(item, seen) for item in value)
+    if type(value).__module__.startswith("planner.") and hasattr(value, "__dict__"):
+        return size + deep_size(vars(value), seen)
+    return size
+
+
+# {name: bytes} of every shared value loaded so far, and the ids of every
+# object counted, so that sessions can be measured on top of them
+def shared_bytes():
+    seen = set()
+    values = {name: asset.value for name, asset in data_store.ASSETS.items()}
+    values.update((name, value()) for name, value in SHARED.items())
+    sizes = {name: deep_size(value, seen) for name, value in values.items() if value is not None}
+    return sizes, seen
+
+
+# {key: bytes} of a session's state, leaving out the shared objects it
+# refers to (pass the seen set of shared_bytes())
+def session_bytes(state, shared_seen):
+    seen = set(shared_seen)
+    return {str(key): deep_size(value, seen) for key, value in state.items()}
+
+
+# The state of every session connected to this server, {session id: state
+# mapping}, or None when it is unknown: there is no Streamlit server
+# (AppTest), or its session manager, a private attribute of the runtime,
+# cannot be read in this Streamlit version. The page must keep working
+# whatever goes wrong here.
+def active_sessions():
+    try:
+        from streamlit.runtime import Runtime
+        session_manager = Runtime.instance()._session_mgr
+        return {info.session.id: info.session.session_state.filtered_state
+                for info in session_manager.list_active_sessions()}
+    except Exception:
+        return None
+
+
+# Resident set size of this process, from /proc where there is one,
+# otherwise the peak reported by getrusage
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+# Disk use of the thumbnail cache, kept apart since it is not memory
+def disk_bytes():
+    return {"thumbnail_cache": get_thumbnail_cache().stats()["bytes"]}
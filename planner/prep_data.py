@@ -0,0 +1,36 @@
+import os
+
+import pandas as pd
+
+from planner import catalog
+from planner.data_store import BASE_DIR, CATALOG_PATH, EXERCISE_PATH, URLS_PATH, file_digest
+
+RAW_PATH = os.path.join(BASE_DIR, "data", "gym_exercises.csv")
+
+
+# The cleaning done in data_prep.ipynb: keep one row per Exercise_Name
+def prepare(data):
+    data = data.drop_duplicates(subset=["Exercise_Name"])
+    return data.reset_index(drop=True)
+
+
+# Rebuild data/prep_data.csv from the raw Kaggle export and compile it into
+# the binary catalog the app loads.
+#   python -m planner.prep_data
+def main(raw_path=RAW_PATH, csv_path=EXERCISE_PATH):
+    data = prepare(pd.read_csv(raw_path))
+    data.to_csv(csv_path, index=False)
+    print(f"Wrote {len(data)} exercises to {os.path.relpath(csv_path, BASE_DIR)}")
+
+    if catalog.pa is None:
+        print("pyarrow is not installed, the app will keep reading the CSV")
+        return
+    digest = file_digest(csv_path)
+    catalog.write_table(catalog.clean_catalog(data), CATALOG_PATH, digest)
+    catalog.write_table(catalog.url_columns(data), URLS_PATH, digest)
+    for path in (CATALOG_PATH, URLS_PATH):
+        print(f"Wrote {os.path.relpath(path, BASE_DIR)} ({os.path.getsize(path)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+import copy
+
+import numpy as np
+from PIL import Image  # pillow library for image processing
+
+from planner import backends, timing
+
+# Palettes tried before settling on the one below
+# color_1 = (255, 185, 50)
+# color_2 = (230, 150, 60)
+# color_3 = (180, 110, 50)
+# color_4 = (120, 80, 40)
+# color_5 = (60, 50, 30)
+
+# color_1 = (255, 245, 100)
+# color_2 = (255, 210, 80)
+# color_3 = (255, 165, 59)
+# color_4 = (220, 100, 43)
+# color_5 = (183, 28, 28)
+
+# color_1 = (240, 200, 60)
+# color_2 = (225, 150, 50)
+# color_3 = (210, 100, 40)
+# color_4 = (195, 50, 35)
+# color_5 = (160, 20, 20)
+
+
+# Function to get the color based on the number of exercises targeting the muscle
+def get_gradient_color(count):
+
+    color_1 = (255, 245, 100)
+    color_2 = (255, 210, 80)
+    color_3 = (255, 165, 59)
+    color_4 = (220, 100, 43)
+    color_5 = (183, 28, 28)
+
+    if count == 1:
+        return color_1
+    elif count == 2:
+        return color_2
+    elif count == 3:
+        return color_3
+    elif count == 4:
+        return color_4
+    else:
+        return color_5
+
+
+# Colormap over muscle intensity (the summed activation of the selected
+# exercises, see ExerciseIndex.intensity_vector): intensity k = 1..MAX_LEVEL
+# gets get_gradient_color(k), values in between are interpolated in
+# LEVEL_STEPS steps, intensities above MAX_LEVEL keep the last color and
+# positive ones below 1 the first. An intensity is reduced to an index into
+# PALETTE (0 = not targeted) before looking up its color.
+MAX_LEVEL = 5
+LEVEL_STEPS = 64
+ANCHORS = np.array([get_gradient_color(level) for level in range(1, MAX_LEVEL + 1)], dtype=np.float64)
+PALETTE = np.vstack((
+    [(0, 0, 0)],
+    np.column_stack([
+        np.interp(np.linspace(0, MAX_LEVEL - 1, (MAX_LEVEL - 1) * LEVEL_STEPS + 1),
+                  np.arange(MAX_LEVEL), ANCHORS[:, channel])
+        for channel in range(3)
+    ]).round(),
+)).astype(np.uint8)
+
+
+# PALETTE index of every intensity, vectorized
+def intensity_levels(intensity):
+    intensity = np.asarray(intensity, dtype=np.float64)
+    steps = np.rint((np.clip(intensity, 1, MAX_LEVEL) - 1) * LEVEL_STEPS).astype(np.uint16) + 1
+    return np.where(intensity > 0, steps, 0).astype(np.uint16)
+
+
+# Rasterize one region, given as (N, 1, 2) vertices in the layout of
+# cv2.fillPoly, inside its bounding box (x0, y0, x1, y1 inclusive) clipped to
+# the image. Returns the box as (y0, y1, x0, x1) and the boolean mask inside it.
+def region_mask(points, shape, bbox):
+    height, width = shape
+    x0, y0 = np.maximum(bbox[:2], 0)
+    x1, y1 = np.minimum(np.asarray(bbox[2:]) + 1, (width, height))
+    if x1 <= x0 or y1 <= y0:
+        return (0, 0, 0, 0), np.zeros((0, 0), dtype=bool)
+    mask = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+    backends.get_backend().fill_poly(mask, points, 1, offset=(-int(x0), -int(y0)))
+    return (y0, y1, x0, x1), mask.view(bool)
+
+
+# The annotation polygons rasterized once into an integer image of the
+# template's size: 0 is background, i > 0 is the muscle labels[i - 1].
+# Pixels covered by regions of different labels are kept aside so that the
+# region drawn last among the highlighted ones wins, as with cv2.fillPoly.
+# Built from compiled annotations, see planner/annotations.py.
+class RegionMap:
+    def __init__(self, annotations, shape):
+        self.shape = tuple(shape[:2])
+        self.labels = list(annotations.labels)
+        self.label_ids = dict(annotations.label_ids)
+
+        label_image = np.zeros(self.shape, dtype=np.int32)
+        overlap = np.zeros(self.shape, dtype=bool)
+        for (label_id, points), bbox in zip(annotations.polygons(), annotations.bboxes):
+            (y0, y1, x0, x1), mask = region_mask(points, self.shape, bbox)
+            window = label_image[y0:y1, x0:x1]
+            overlap[y0:y1, x0:x1] |= mask & (window != 0) & (window != label_id)
+            window[mask] = label_id
+
+        # Flat pixel indices where labels overlap, and the pixels of each
+        # region touching them in drawing order
+        self.overlap_pixels = np.flatnonzero(overlap)
+        self.overlap_regions = []
+        if len(self.overlap_pixels):
+            overlap_ids = np.full(overlap.size, -1, dtype=np.int64)
+            overlap_ids[self.overlap_pixels] = np.arange(len(self.overlap_pixels))
+            overlap_ids = overlap_ids.reshape(self.shape)
+            for (label_id, points), bbox in zip(annotations.polygons(), annotations.bboxes):
+                (y0, y1, x0, x1), mask = region_mask(points, self.shape, bbox)
+                hit = overlap_ids[y0:y1, x0:x1][mask]
+                hit = hit[hit >= 0]
+                if len(hit):
+                    self.overlap_regions.append((label_id, self.overlap_pixels[hit]))
+
+        self.label_image = label_image.astype(np.min_scalar_type(len(self.labels)))
+        self.label_image.flags.writeable = False
+
+        # Flat pixel indices grouped by label: the pixels of label i are
+        # label_pixels[label_starts[i]:label_starts[i + 1]]
+        flat_labels = self.label_image.ravel()
+        self.label_pixels = np.flatnonzero(flat_labels)
+        self.label_pixels = self.label_pixels[
+            np.argsort(flat_labels[self.label_pixels], kind="stable")
+        ]
+        label_sizes = np.bincount(flat_labels, minlength=len(self.labels) + 1)
+        label_sizes[0] = 0
+        self.label_starts = np.concatenate(([0], np.cumsum(label_sizes)))
+
+    # Level of every label (index 0 is the background) for a
+    # {muscle: intensity} dict
+    def levels(self, muscle_intensity):
+        intensity = np.zeros(len(self.labels) + 1, dtype=np.float64)
+        for muscle_label, label_id in self.label_ids.items():
+            intensity[label_id] = muscle_intensity.get(muscle_label, 0)
+        return intensity_levels(intensity)
+
+    # Paint the template with one palette lookup per highlighted label. The
+    # pixels are addressed as 3-byte void items so each label is a single
+    # fancy assignment of a scalar color.
+    def paint(self, levels, template_image):
+        highlighted_image = template_image.copy()
+        pixels = as_pixels(highlighted_image)
+        colors = as_pixels(PALETTE)[levels]
+        for label_id in np.flatnonzero(levels):
+            start, end = self.label_starts[label_id], self.label_starts[label_id + 1]
+            pixels[self.label_pixels[start:end]] = colors[label_id]
+
+        if self.overlap_regions:
+            pixels[self.overlap_pixels] = as_pixels(template_image)[self.overlap_pixels]
+            for label_id, region_pixels in self.overlap_regions:
+                if levels[label_id]:
+                    pixels[region_pixels] = colors[label_id]
+        return highlighted_image
+
+    # The same map for the image sampled at the given rows and columns
+    # (nearest neighbour), e.g. for thumbnails. Painting it gives the full
+    # size paint() at those pixels.
+    def sampled(self, rows, cols):
+        sampled = copy.copy(self)
+        sampled.shape = (len(rows), len(cols))
+        source = (np.asarray(rows)[:, None] * self.shape[1] + np.asarray(cols)[None, :]).ravel()
+        sampled.label_image = self.label_image.ravel()[source].reshape(sampled.shape)
+        sampled.label_image.flags.writeable = False
+
+        # Full size pixel index -> sampled pixel index, -1 when not sampled.
+        # Rows and columns are increasing, so the pixels keep their order.
+        position = np.full(self.label_image.size, -1, dtype=np.int64)
+        position[source] = np.arange(len(source))
+
+        def keep(pixels):
+            pixels = position[pixels]
+            return pixels[pixels >= 0]
+
+        sampled.label_pixels = keep(self.label_pixels)
+        label_sizes = np.bincount(sampled.label_image.ravel(), minlength=len(self.labels) + 1)
+        label_sizes[0] = 0
+        sampled.label_starts = np.concatenate(([0], np.cumsum(label_sizes)))
+        sampled.overlap_pixels = keep(self.overlap_pixels)
+        sampled.overlap_regions = [(label_id, keep(pixels)) for label_id, pixels in self.overlap_regions]
+        sampled.overlap_regions = [(label_id, pixels) for label_id, pixels in sampled.overlap_regions if len(pixels)]
+        return sampled
+
+
+# View an RGB image as a flat array with one 3-byte item per pixel
+def as_pixels(image):
+    image = np.ascontiguousarray(image)
+    return image.reshape(-1, image.shape[-1]).view(f"V{image.shape[-1]}").ravel()
+
+
+# Function to highlight selected muscles
+def highlight_muscles(selected_exercises, exercise_index, region_map, template_image):
+    # Sum the activations of the selected exercises on each muscle
+    with timing.span("highlight.count"):
+        muscle_intensity = exercise_index.muscle_intensity(selected_exercises)
+        levels = region_map.levels(muscle_intensity)
+    with timing.span("highlight.paint"):
+        highlighted_image = region_map.paint(levels, template_image)
+    with timing.span("highlight.to_pil"):
+        return Image.fromarray(highlighted_image)
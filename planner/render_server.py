@@ -0,0 +1,192 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from planner import data_store
+from planner.batch_render import init_worker
+from planner.heatmap_cache import encode_image, heatmap_cache, heatmap_key
+
+CONTENT_TYPES = {"PNG": "image/png", "JPEG": "image/jpeg", "WEBP": "image/webp"}
+CACHE_CONTROL = "public, max-age=86400"
+MAX_HEADER_BYTES = 16 * 1024
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+# Runs in a worker process: paint and encode one level vector
+def render_levels(levels, format):
+    image = data_store.get_region_map().paint(np.asarray(levels), data_store.get_template_image())
+    return encode_image(image, format)
+
+
+# Exercises from ?exercises=A,B,C and/or repeated ?exercise=A&exercise=B
+def requested_exercises(query):
+    exercises = list(query.get("exercise", []))
+    for value in query.get("exercises", []):
+        exercises.extend(name.strip() for name in value.split(",") if name.strip())
+    return exercises
+
+
+# Minimal HTTP/1.1 server for GET /render. Parsing the request and computing
+# the level signature happen on the event loop, which is cheap; painting and
+# encoding go to a process pool so the loop never blocks on them. Identical
+# requests in flight share one render.
+class RenderServer:
+    def __init__(self, workers=None):
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker)
+        self.pending = {}
+        self.requests = 0
+
+    # Strong validator of a render: the level vector, the output format and
+    # the annotation and template files it is painted from
+    def etag(self, key):
+        digest = hashlib.sha1()
+        digest.update(data_store.annotations_file_asset.digest.encode())
+        digest.update(data_store.template_asset.digest.encode())
+        digest.update(key[0].encode())
+        digest.update(key[1])
+        return f'"{digest.hexdigest()}"'
+
+    async def render(self, key, levels):
+        data = heatmap_cache.get(key)
+        if data is not None:
+            return data
+        future = self.pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.pool, render_levels, levels.tolist(), key[0])
+            self.pending[key] = future
+            try:
+                data = await future
+                heatmap_cache.put(key, data)
+            finally:
+                del self.pending[key]
+            return data
+        return await future
+
+    async def handle_render(self, query, headers):
+        format = query.get("format", ["PNG"])[0].upper()
+        if format not in CONTENT_TYPES:
+            return 400, {}, f"Unknown format {format}".encode()
+        exercises = requested_exercises(query)
+        if not exercises:
+            return 400, {}, b"No exercises given"
+
+        exercise_index = data_store.get_exercise_index()
+        # Rendering the known ones would answer a typo with a plausible
+        # heatmap, cached for a day
+        unknown = [name for name in dict.fromkeys(exercises) if name not in exercise_index.name_to_id]
+        if unknown:
+            return 404, {"Content-Type": "text/plain; charset=utf-8"}, (
+                "Unknown exercises: " + ", ".join(unknown)).encode()
+        region_map = data_store.get_region_map()
+        heatmap_cache.bind(region_map, data_store.get_template_image())
+        levels = region_map.levels(exercise_index.muscle_intensity(exercises))
+        key = heatmap_key(levels, format)
+
+        response_headers = {"ETag": self.etag(key), "Cache-Control": CACHE_CONTROL}
+        if_none_match = [tag.strip() for tag in headers.get("if-none-match", "").split(",")]
+        if response_headers["ETag"] in if_none_match or "*" in if_none_match:
+            return 304, response_headers, b""
+        data = await self.render(key, levels)
+        response_headers["Content-Type"] = CONTENT_TYPES[format]
+        return 200, response_headers, data
+
+    async def handle(self, method, target, headers):
+        if method not in ("GET", "HEAD"):
+            return 405, {"Allow": "GET, HEAD"}, b""
+        url = urlsplit(target)
+        if url.path == "/render":
+            return await self.handle_render(parse_qs(url.query), headers)
+        if url.path == "/stats":
+            stats = {"requests": self.requests, "heatmap_cache": heatmap_cache.stats(),
+                     "assets": data_store.cache_stats()}
+            return 200, {"Content-Type": "application/json"}, json.dumps(stats).encode()
+        if url.path == "/healthz":
+            return 200, {"Content-Type": "text/plain"}, b"ok"
+        return 404, {}, b""
+
+    async def serve_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ")
+                except ValueError:
+                    await self.respond(writer, 400, {}, b"", keep_alive=False)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+
+                self.requests += 1
+                try:
+                    status, response_headers, body = await self.handle(method, target, headers)
+                except Exception as error:
+                    status, response_headers, body = 500, {}, str(error).encode()
+                keep_alive = (version == "HTTP/1.1" and headers.get("connection", "").lower() != "close")
+                await self.respond(writer, status, response_headers, body, keep_alive,
+                                   head_only=method == "HEAD")
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, headers, body, keep_alive, head_only=False):
+        lines = [f"HTTP/1.1 {status} {REASONS[status]}",
+                 f"Content-Length: {len(body)}",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        if not head_only:
+            writer.write(body)
+        await writer.drain()
+
+
+async def serve(host, port, workers):
+    # Load the shared assets before forking the workers so they inherit them
+    init_worker()
+    server = RenderServer(workers)
+    listener = await asyncio.start_server(server.serve_connection, host, port,
+                                          limit=MAX_HEADER_BYTES)
+    print(f"Serving heatmaps on http://{host}:{port}/render?exercises=...")
+    # SIGTERM stops the server like Ctrl-C, so the render workers are shut
+    # down with it instead of being left behind
+    stopped = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopped.set)
+    try:
+        async with listener:
+            await stopped.wait()
+    finally:
+        server.pool.shutdown(cancel_futures=True)
+
+
+# Serve heatmaps over HTTP for embedding outside Streamlit.
+#   python -m planner.render_server --port 8502
+#   GET /render?exercises=Leg Press,Pushups&format=png
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP endpoint rendering muscle heatmaps.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("-w", "--workers", type=int, default=None, help="render worker processes")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
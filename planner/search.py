@@ -0,0 +1,149 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+PAGE_SIZE = 25
+# Characters are packed into 21 bits each, enough for any code point
+CHAR_BITS = 21
+WORD_PATTERN = re.compile(r"[^\W_]+")
+
+
+# Normalized form used for both names and queries
+def normalize(text):
+    return " ".join(text.lower().split())
+
+
+# Codes of every trigram of every name, as (codes, exercise ids) pairs.
+# Names are packed into a fixed-width UCS-4 array so the trigrams of the
+# whole catalog come out of a few array operations.
+def name_trigrams(names):
+    width = max((len(name) for name in names), default=0)
+    if width < 3:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64)
+    chars = np.asarray(names, dtype=f"U{width}").view(np.uint32).reshape(len(names), width).astype(np.uint64)
+    codes = (chars[:, :-2] << (2 * CHAR_BITS)) | (chars[:, 1:-1] << CHAR_BITS) | chars[:, 2:]
+    # Trigrams running into the padding of shorter names do not exist
+    valid = chars[:, 2:] != 0
+    ids = np.broadcast_to(np.arange(len(names))[:, None], codes.shape)
+    return codes[valid], ids[valid]
+
+
+def query_trigrams(term):
+    chars = [ord(c) for c in term]
+    return np.array(
+        [(a << (2 * CHAR_BITS)) | (b << CHAR_BITS) | c for a, b, c in zip(chars, chars[1:], chars[2:])],
+        dtype=np.uint64,
+    )
+
+
+# Sorted keys with the ids of each key stored contiguously, so looking up a
+# key is a binary search and its posting list a slice
+class PostingIndex:
+    def __init__(self, keys, ids):
+        order = np.lexsort((ids, keys))
+        keys, self.ids = keys[order], ids[order]
+        self.keys, starts = np.unique(keys, return_index=True)
+        self.starts = np.append(starts, len(keys))
+
+    def lookup(self, key):
+        i = np.searchsorted(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            return self.ids[:0]
+        return self.ids[self.starts[i]:self.starts[i + 1]]
+
+    # Ids of every key in [low, high)
+    def lookup_range(self, low, high):
+        i, j = np.searchsorted(self.keys, [low, high])
+        return np.unique(self.ids[self.starts[i]:self.starts[j]])
+
+
+# In-memory search over the exercise catalog, built once per catalog.
+# Exercises are numbered by rank (Rating, best first, then name), so any
+# sorted list of ids is already in result order and a page is a slice.
+#   trigrams:  name trigram -> ids, for substring search on terms of 3+ chars
+#   words:     word of a name -> ids, for prefix search on shorter terms
+#   muscles / equipment: facet value -> ids
+class SearchIndex:
+    def __init__(self, exercise_data):
+        catalog = exercise_data.drop_duplicates("Exercise_Name")
+        rating = pd.to_numeric(catalog["Rating"], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        normalized = [normalize(str(name)) for name in catalog["Exercise_Name"]]
+        order = np.lexsort((normalized, -np.nan_to_num(rating, nan=-np.inf)))
+
+        self.names = catalog["Exercise_Name"].to_numpy(dtype=object)[order]
+        self.normalized = np.asarray(normalized, dtype=str)[order]
+        self.ratings = rating[order]
+        self.name_to_id = {name: i for i, name in enumerate(self.names)}
+
+        self.trigrams = PostingIndex(*name_trigrams(list(self.normalized)))
+        words = [(word, i) for i, name in enumerate(self.normalized) for word in WORD_PATTERN.findall(name)]
+        self.words = PostingIndex(
+            np.array([word for word, _ in words], dtype=str),
+            np.array([i for _, i in words], dtype=np.int64),
+        )
+
+        self.muscle_codes, self.muscle_names = self.facet(catalog["muscle_gp"], order)
+        self.equipment_codes, self.equipment_names = self.facet(catalog["Equipment"], order)
+
+    def __len__(self):
+        return len(self.names)
+
+    @staticmethod
+    def facet(column, order):
+        codes, values = pd.factorize(column.astype(object).to_numpy()[order], sort=True)
+        return codes.astype(np.int32), [str(value) for value in values]
+
+    # Ids whose name matches one query term: a substring for 3+ characters,
+    # otherwise the start of any word
+    def match_term(self, term):
+        if len(term) < 3:
+            return self.words.lookup_range(term, term[:-1] + chr(ord(term[-1]) + 1))
+        candidates = None
+        for code in np.unique(query_trigrams(term)):
+            postings = self.trigrams.lookup(code)
+            candidates = postings if candidates is None else np.intersect1d(candidates, postings, assume_unique=True)
+            if len(candidates) == 0:
+                return candidates
+        if len(term) > 3:
+            # Sharing every trigram does not make the term a substring
+            candidates = candidates[np.char.find(self.normalized[candidates], term) >= 0]
+        return candidates
+
+    def facet_mask(self, codes, names, selected):
+        wanted = [names.index(value) for value in selected if value in names]
+        return np.isin(codes, wanted)
+
+    # One page of matching exercises in rank order. Every term of the query
+    # has to match; an empty facet selection does not filter. The facet
+    # counts for each facet ignore that facet's own selection, as usual.
+    def search(self, query="", muscles=(), equipment=(), page=0, page_size=PAGE_SIZE):
+        matched = np.ones(len(self), dtype=bool)
+        for term in normalize(query).split():
+            term_mask = np.zeros(len(self), dtype=bool)
+            term_mask[self.match_term(term)] = True
+            matched &= term_mask
+
+        muscle_mask = self.facet_mask(self.muscle_codes, self.muscle_names, muscles) if muscles else True
+        equipment_mask = (self.facet_mask(self.equipment_codes, self.equipment_names, equipment)
+                          if equipment else True)
+        ids = np.flatnonzero(matched & muscle_mask & equipment_mask)
+
+        pages = max(-(-len(ids) // page_size), 1)
+        page = min(max(page, 0), pages - 1)
+        page_ids = ids[page * page_size:(page + 1) * page_size]
+        return {
+            "names": list(self.names[page_ids]),
+            "total": len(ids),
+            "page": page,
+            "pages": pages,
+            "muscle_counts": self.facet_counts(self.muscle_codes, self.muscle_names, matched & equipment_mask),
+            "equipment_counts": self.facet_counts(self.equipment_codes, self.equipment_names,
+                                                  matched & muscle_mask),
+        }
+
+    @staticmethod
+    def facet_counts(codes, names, mask):
+        codes = codes[mask]
+        counts = np.bincount(codes[codes >= 0], minlength=len(names))
+        return {name: int(count) for name, count in zip(names, counts)}
@@ -0,0 +1,76 @@
+import glob
+import os
+import shutil
+
+from planner import data_store
+from planner.data_store import BASE_DIR, TEMPLATE_PATH, DerivedAsset, SharedAsset, file_digest
+from planner.render import PALETTE
+
+# Served by Streamlit at app/static/overlay/ when server.enableStaticServing is on
+OUTPUT_DIR = os.path.join(BASE_DIR, "static", "overlay")
+STATIC_URL = "app/static/overlay"
+COLORS = ["#%02x%02x%02x" % tuple(int(c) for c in color) for color in PALETTE]
+
+
+# Copy of the template under a name carrying a prefix of its hash, so the
+# browser can keep it across reruns and a changed template gets a new URL
+def publish_template(source=TEMPLATE_PATH, output_dir=OUTPUT_DIR):
+    stem, extension = os.path.splitext(os.path.basename(source))
+    name = f"{stem}-{file_digest(source)[:12]}{extension}"
+    path = os.path.join(output_dir, name)
+    os.makedirs(output_dir, exist_ok=True)
+    if not os.path.exists(path):
+        shutil.copyfile(source, path + ".tmp")
+        os.replace(path + ".tmp", path)
+    for stale in glob.glob(os.path.join(output_dir, f"{stem}-*")):
+        if os.path.basename(stale) != name:
+            os.remove(stale)
+    return f"{STATIC_URL}/{name}"
+
+
+# The simplified annotation outlines as SVG, in drawing order. Only the
+# highlighted ones are emitted, later polygons cover earlier ones like in
+# RegionMap.paint().
+class SvgOverlay:
+    def __init__(self, annotations):
+        self.height, self.width = annotations.shape
+        self.polygons = [
+            (label_id, " ".join(f"{x},{y}" for x, y in points.reshape(-1, 2)))
+            for label_id, points in annotations.polygons(simplified=True)
+        ]
+
+    # <svg> for the given label levels (as from RegionMap.levels()), or an
+    # empty overlay when nothing is highlighted
+    def svg(self, levels):
+        shapes = "".join(
+            f'<polygon points="{points}" fill="{COLORS[levels[label_id]]}"/>'
+            for label_id, points in self.polygons if levels[label_id]
+        )
+        return (
+            f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {self.width} {self.height}" '
+            f'shape-rendering="crispEdges" style="position: absolute; inset: 0; width: 100%; height: 100%;">'
+            f"{shapes}</svg>"
+        )
+
+    # The template image with the overlay on top, both scaled to the width
+    # of the container
+    def html(self, levels, template_url, alt=""):
+        return (
+            '<div style="position: relative; line-height: 0;">'
+            f'<img src="{template_url}" alt="{alt}" width="{self.width}" height="{self.height}" '
+            'style="width: 100%; height: auto;">'
+            f"{self.svg(levels)}</div>"
+        )
+
+
+# Published on first use and again only when the template changes
+template_url_asset = SharedAsset(TEMPLATE_PATH, publish_template)
+overlay_asset = DerivedAsset((data_store.muscle_asset,), SvgOverlay)
+
+
+def get_template_url():
+    return template_url_asset.get()
+
+
+def get_svg_overlay():
+    return overlay_asset.get()
@@ -0,0 +1,136 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Collection is off unless PLANNER_TIMING is set, a disabled span costs one
+# function call and returns a shared no-op context manager
+ENABLED = os.environ.get("PLANNER_TIMING", "") not in ("", "0")
+# File the metrics are exported to (.json for JSON, Prometheus text otherwise)
+METRICS_PATH = os.environ.get("PLANNER_METRICS_FILE")
+EXPORT_INTERVAL = 10.0
+
+# Percentiles are computed over the most recent WINDOW samples of a stage
+WINDOW = 1024
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Stage:
+    def __init__(self):
+        self.samples = deque(maxlen=WINDOW)
+        self.count = 0
+        self.total = 0.0
+
+
+stages = {}
+lock = threading.Lock()
+last_export = 0.0
+
+
+def record(name, seconds):
+    with lock:
+        stage = stages.get(name)
+        if stage is None:
+            stage = stages[name] = Stage()
+        stage.samples.append(seconds)
+        stage.count += 1
+        stage.total += seconds
+
+
+class Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record(self.name, time.perf_counter() - self.start)
+
+
+class NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+# Time the body of a with-statement under the given stage name
+def span(name):
+    if not ENABLED:
+        return NULL_SPAN
+    return Span(name)
+
+
+def enable(enabled=True):
+    global ENABLED
+    ENABLED = enabled
+
+
+def reset():
+    with lock:
+        stages.clear()
+
+
+# {stage: {count, sum_s, p50_ms, p95_ms, p99_ms}} over the rolling window
+def summary():
+    with lock:
+        snapshot = {name: (list(stage.samples), stage.count, stage.total)
+                    for name, stage in stages.items()}
+    result = {}
+    for name, (samples, count, total) in sorted(snapshot.items()):
+        percentiles = np.percentile(samples, [q * 100 for q in QUANTILES]) * 1e3
+        result[name] = {"count": count, "sum_s": total}
+        for q, value in zip(QUANTILES, percentiles):
+            result[name][f"p{round(q * 100)}_ms"] = float(value)
+    return result
+
+
+# Prometheus text exposition format, one summary metric with a stage label
+def prometheus_text(metrics=None):
+    metrics = summary() if metrics is None else metrics
+    lines = ["# HELP planner_stage_seconds Time spent in each stage of a rerun.",
+             "# TYPE planner_stage_seconds summary"]
+    for name, stage in metrics.items():
+        for q in QUANTILES:
+            value = stage[f"p{round(q * 100)}_ms"] / 1e3
+            lines.append(f'planner_stage_seconds{{stage="{name}",quantile="{q}"}} {value:.9g}')
+        lines.append(f'planner_stage_seconds_sum{{stage="{name}"}} {stage["sum_s"]:.9g}')
+        lines.append(f'planner_stage_seconds_count{{stage="{name}"}} {stage["count"]}')
+    return "\n".join(lines) + "\n"
+
+
+def export(path):
+    metrics = summary()
+    if path.endswith(".json"):
+        text = json.dumps(metrics, indent=2)
+    else:
+        text = prometheus_text(metrics)
+    with open(path + ".tmp", "w") as f:
+        f.write(text)
+    os.replace(path + ".tmp", path)
+
+
+# Export to METRICS_PATH at most once every EXPORT_INTERVAL seconds
+def maybe_export(path=None):
+    global last_export
+    path = path or METRICS_PATH
+    if not ENABLED or not path:
+        return
+    now = time.monotonic()
+    if now - last_export < EXPORT_INTERVAL:
+        return
+    last_export = now
+    export(path)
@@ -0,0 +1,73 @@
+import numpy as np
+from PIL import Image  # pillow library for image processing
+
+from planner import data_store, timing
+from planner.data_store import DerivedAsset
+from planner.heatmap_cache import encode_image, heatmap_cache, heatmap_key, label_muscle_codes
+from planner.render import intensity_levels
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+THUMBNAIL_WIDTH = 200
+
+
+# The region map and template scaled down once for the per-day thumbnails.
+# Labels are sampled at the pixel centers, the template is box-filtered.
+class Thumbnails:
+    def __init__(self, region_map, template_image, width=THUMBNAIL_WIDTH):
+        height, full_width = region_map.shape
+        width = min(width, full_width)
+        self.height = max(1, round(height * width / full_width))
+        self.width = width
+        rows = ((np.arange(self.height) + 0.5) * height / self.height).astype(np.intp)
+        cols = ((np.arange(self.width) + 0.5) * full_width / self.width).astype(np.intp)
+        self.region_map = region_map.sampled(rows, cols)
+        self.template_image = np.asarray(
+            Image.fromarray(template_image).resize((self.width, self.height), Image.BOX))
+        self.template_image.flags.writeable = False
+
+    # One strip with a thumbnail per row of levels, side by side
+    def strip(self, day_levels):
+        return np.hstack([self.region_map.paint(levels, self.template_image) for levels in day_levels])
+
+
+# Render a weekly plan, a list of selections with one per day, in one pass:
+# the intensities of all days come from a single mat-vec, the week is their
+# sum. Returns the encoded heatmap of the week (full size, shared with
+# render_heatmap() through the cache) and the encoded strip of day
+# thumbnails, each painted from the shared pre-scaled masks and template.
+def render_week(day_selections, exercise_index, region_map, template_image, thumbnails,
+                cache=heatmap_cache, format="PNG"):
+    with timing.span("week.count"):
+        intensity = exercise_index.intensity_matrix(day_selections)
+        # The last column is "no muscle" and stays 0
+        label_muscles = label_muscle_codes(exercise_index, region_map)
+        intensity = np.column_stack((intensity, np.zeros(len(intensity))))[:, label_muscles]
+        day_levels = intensity_levels(intensity)
+        week_levels = intensity_levels(intensity.sum(axis=0))
+
+    cache.bind(region_map, template_image)
+    week_key = heatmap_key(week_levels, format)
+    week = cache.get(week_key)
+    if week is None:
+        with timing.span("week.paint"):
+            frame = region_map.paint(week_levels, template_image)
+        with timing.span("week.encode"):
+            week = encode_image(frame, format)
+        cache.put(week_key, week)
+
+    strip_key = (f"{format}-strip-{len(day_levels)}", day_levels.astype("u2").tobytes())
+    strip = cache.get(strip_key)
+    if strip is None:
+        with timing.span("week.paint_days"):
+            frame = thumbnails.strip(day_levels)
+        with timing.span("week.encode_days"):
+            strip = encode_image(frame, format)
+        cache.put(strip_key, strip)
+    return week, strip
+
+
+thumbnails_asset = DerivedAsset((data_store.region_map_asset, data_store.template_asset), Thumbnails)
+
+
+def get_thumbnails():
+    return thumbnails_asset.get()
@@ -0,0 +1,173 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+
+from planner.data_store import BASE_DIR
+
+# Saved workouts live outside the repository data, the path can be moved
+# with PLANNER_DB_PATH, e.g. to a volume shared by several app instances
+DB_PATH = os.environ.get("PLANNER_DB_PATH", os.path.join(BASE_DIR, "var", "workouts.db"))
+POOL_SIZE = 4
+
+# Exercises get their own ids, kept when the catalog changes order; a
+# workout is the list of those ids in the order they were selected. The
+# number of saved workouts with an exercise is kept up to date on every
+# save and delete, so the most popular ones are read off an index.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS exercises (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    workouts INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS workouts (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    name TEXT NOT NULL,
+    updated REAL NOT NULL,
+    UNIQUE (user, name)
+);
+CREATE TABLE IF NOT EXISTS workout_exercises (
+    workout_id INTEGER NOT NULL REFERENCES workouts (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    exercise_id INTEGER NOT NULL REFERENCES exercises (id),
+    PRIMARY KEY (workout_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS workouts_by_user ON workouts (user, updated DESC);
+CREATE INDEX IF NOT EXISTS workout_exercises_by_exercise ON workout_exercises (exercise_id);
+CREATE INDEX IF NOT EXISTS exercises_by_popularity ON exercises (workouts DESC, name);
+"""
+
+
+def connect(path):
+    connection = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute("PRAGMA synchronous = NORMAL")
+    connection.execute("PRAGMA foreign_keys = ON")
+    return connection
+
+
+# A fixed number of connections shared by every session of the process.
+# Readers do not block each other or the writer under WAL, writers queue on
+# SQLite's lock (busy timeout 10 s).
+class ConnectionPool:
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = path
+        self.connections = queue.LifoQueue()
+        for _ in range(size):
+            self.connections.put(connect(path))
+
+    @contextmanager
+    def connection(self):
+        connection = self.connections.get()
+        try:
+            yield connection
+        finally:
+            self.connections.put(connection)
+
+    @contextmanager
+    def transaction(self):
+        with self.connection() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def close(self):
+        while not self.connections.empty():
+            self.connections.get().close()
+
+
+# Add delta to the workout count of every distinct exercise of a workout
+def count_workout(connection, workout_id, delta):
+    connection.execute(
+        "UPDATE exercises SET workouts = workouts + ? "
+        "WHERE id IN (SELECT exercise_id FROM workout_exercises WHERE workout_id = ?)",
+        (delta, workout_id),
+    )
+
+
+# Workouts saved by name per user
+class WorkoutStore:
+    def __init__(self, path=DB_PATH, pool_size=POOL_SIZE):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(connect(path)) as connection:
+            connection.executescript(SCHEMA)
+        self.pool = ConnectionPool(path, pool_size)
+
+    # Save a workout, replacing the user's workout of the same name
+    def save(self, user, name, exercises):
+        exercises = list(exercises)
+        with self.pool.transaction() as connection:
+            connection.executemany("INSERT OR IGNORE INTO exercises (name) VALUES (?)",
+                                   ((exercise,) for exercise in exercises))
+            workout_id = connection.execute(
+                "INSERT INTO workouts (user, name, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT (user, name) DO UPDATE SET updated = excluded.updated RETURNING id",
+                (user, name, time.time()),
+            ).fetchone()[0]
+            count_workout(connection, workout_id, -1)
+            connection.execute("DELETE FROM workout_exercises WHERE workout_id = ?", (workout_id,))
+            connection.executemany(
+                "INSERT INTO workout_exercises (workout_id, position, exercise_id) "
+                "SELECT ?, ?, id FROM exercises WHERE name = ?",
+                ((workout_id, position, exercise) for position, exercise in enumerate(exercises)),
+            )
+            count_workout(connection, workout_id, 1)
+
+    # Names of the user's workouts, most recently saved first
+    def list(self, user):
+        with self.pool.connection() as connection:
+            return [name for name, in connection.execute(
+                "SELECT name FROM workouts WHERE user = ? ORDER BY updated DESC", (user,))]
+
+    # Exercise names of a saved workout in their saved order, None when the
+    # user has no workout of that name
+    def load(self, user, name):
+        with self.pool.connection() as connection:
+            rows = connection.execute(
+                "SELECT exercises.name FROM workouts "
+                "LEFT JOIN workout_exercises ON workout_exercises.workout_id = workouts.id "
+                "LEFT JOIN exercises ON exercises.id = workout_exercises.exercise_id "
+                "WHERE workouts.user = ? AND workouts.name = ? ORDER BY workout_exercises.position",
+                (user, name),
+            ).fetchall()
+        if not rows:
+            return None
+        return [exercise for exercise, in rows if exercise is not None]
+
+    def delete(self, user, name):
+        with self.pool.transaction() as connection:
+            row = connection.execute("SELECT id FROM workouts WHERE user = ? AND name = ?", (user, name)).fetchone()
+            if row is not None:
+                count_workout(connection, row[0], -1)
+                connection.execute("DELETE FROM workouts WHERE id = ?", row)
+
+    # [(Exercise_Name, number of saved workouts with it)], most saved first
+    def popular_exercises(self, limit=10):
+        with self.pool.connection() as connection:
+            return connection.execute(
+                "SELECT name, workouts FROM exercises WHERE workouts > 0 ORDER BY workouts DESC, name LIMIT ?",
+                (limit,),
+            ).fetchall()
+
+    def close(self):
+        self.pool.close()
+
+
+store_lock = threading.Lock()
+store = None
+
+
+# The store shared by every session, opened on first use
+def get_workout_store():
+    global store
+    with store_lock:
+        if store is None:
+            store = WorkoutStore()
+        return store
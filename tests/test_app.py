@@ -0,0 +1,71 @@
+import os
+
+from streamlit.testing.v1 import AppTest
+
+from planner import data_store, svg_overlay, workout_store
+
+APP_PATH = os.path.join(data_store.BASE_DIR, "app.py")
+
+
+def test_picking_premade_workouts_with_search_filters():
+    at = AppTest.from_file(APP_PATH, default_timeout=60).run()
+    at.sidebar.radio[0].set_value("Planner Page").run()
+    search_index = data_store.get_search_index()
+    at.multiselect(key="search_muscles").set_value(search_index.muscle_names[:2]).run()
+    at.text_input(key="search_query").set_value("press").run()
+    for name, exercises in data_store.get_premade_workouts().items():
+        at.selectbox(key="workout").set_value(name).run()
+        assert not at.exception
+        assert at.multiselect(key="selected_exercises").value == list(exercises)
+        assert at.multiselect(key="search_muscles").value == search_index.muscle_names[:2]
+    # Another page and back, as the load test's sessions do between journeys
+    at.sidebar.radio[0].set_value("Front Page").run()
+    at.sidebar.radio[0].set_value("Planner Page").run()
+    for name, exercises in data_store.get_premade_workouts().items():
+        at.selectbox(key="workout").set_value(name).run()
+        assert not at.exception
+        assert at.multiselect(key="selected_exercises").value == list(exercises)
+    at.selectbox(key="workout").set_value("None").run()
+    assert not at.exception
+
+
+def click(at, label):
+    next(button for button in at.button if button.label == label).click().run()
+
+
+def test_saved_workouts_ignore_surrounding_spaces(tmp_path, monkeypatch):
+    monkeypatch.setattr(workout_store, "store", workout_store.WorkoutStore(str(tmp_path / "workouts.db")))
+    exercises = list(data_store.get_exercise_index().names[:3])
+    at = AppTest.from_file(APP_PATH, default_timeout=60).run()
+    at.sidebar.radio[0].set_value("Planner Page").run()
+    at.multiselect(key="selected_exercises").set_value(exercises).run()
+    at.text_input(key="saved_user").set_value("bob ").run()
+    at.text_input(key="save_name").set_value(" Legs ").run()
+    click(at, "Save Selection")
+    assert not at.exception
+    assert at.selectbox(key="saved_workout").options == ["Legs"]
+    assert workout_store.store.load("bob", "Legs") == exercises
+
+    at.multiselect(key="selected_exercises").set_value([]).run()
+    click(at, "Load")
+    assert at.multiselect(key="selected_exercises").value == exercises
+    click(at, "Delete")
+    assert not at.exception
+    assert workout_store.store.list("bob") == []
+    workout_store.store.close()
+
+
+def test_svg_overlay_falls_back_when_the_template_cannot_be_published(monkeypatch):
+    def read_only(*args):
+        raise PermissionError("read-only file system")
+
+    monkeypatch.setattr(svg_overlay.template_url_asset, "get", read_only)
+    exercises = list(data_store.get_exercise_index().names[:3])
+    at = AppTest.from_file(APP_PATH, default_timeout=60).run()
+    at.sidebar.radio[0].set_value("Planner Page").run()
+    at.multiselect(key="selected_exercises").set_value(exercises).run()
+    at.sidebar.toggle(key="svg_overlay").set_value(True).run()
+    assert not at.exception
+    assert not [markdown for markdown in at.markdown if "<svg" in markdown.value]
+    assert "Highlighted Muscles Activation" in [caption for image in at.image for caption in image.captions]
+    assert "SVG overlay unavailable, showing the image instead" in [caption.value for caption in at.sidebar.caption]
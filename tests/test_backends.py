@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from planner import backends, data_store
+from planner.backends import clip_line, fill_poly
+from planner.render import PALETTE, RegionMap
+
+WIDTH, HEIGHT = 120, 90
+
+
+def test_fill_poly_rectangle_is_inclusive():
+    mask = np.zeros((HEIGHT, WIDTH), dtype=np.uint8)
+    fill_poly(mask, [[10, 20], [30, 20], [30, 40], [10, 40]], 7)
+    expected = np.zeros_like(mask)
+    expected[20:41, 10:31] = 7
+    assert (mask == expected).all()
+
+
+def test_fill_poly_clips_to_the_image():
+    mask = np.zeros((HEIGHT, WIDTH), dtype=np.uint8)
+    fill_poly(mask, [[-50, -50], [WIDTH + 50, -50], [WIDTH + 50, HEIGHT + 50], [-50, HEIGHT + 50]])
+    assert mask.all()
+    mask[:] = 0
+    fill_poly(mask, [[-50, -50], [-10, -50], [-10, -10]])
+    assert not mask.any()
+
+
+# Random polygons with vertices up to 50 pixels outside the image, some
+# with an offset, filled by both implementations
+def test_fill_poly_matches_opencv():
+    cv2 = pytest.importorskip("cv2")
+    rng = np.random.default_rng(0)
+    for _ in range(2000):
+        points = rng.integers((-50, -50), (WIDTH + 50, HEIGHT + 50), (rng.integers(1, 12), 2))
+        offset = tuple(int(v) for v in rng.integers(-20, 20, 2)) if rng.random() < 0.3 else (0, 0)
+        ours = fill_poly(np.zeros((HEIGHT, WIDTH), dtype=np.uint8), points, 1, offset)
+        theirs = cv2.fillPoly(np.zeros((HEIGHT, WIDTH), dtype=np.uint8),
+                              [points.astype(np.int32).reshape(-1, 1, 2)], 1, offset=offset)
+        assert (ours == theirs).all(), (points.tolist(), offset)
+
+
+def test_clip_line_matches_opencv():
+    cv2 = pytest.importorskip("cv2")
+    rng = np.random.default_rng(1)
+    for _ in range(20000):
+        x1, y1, x2, y2 = (int(v) for v in rng.integers(-200, 300, 4))
+        inside, *points = clip_line(WIDTH, HEIGHT, x1, y1, x2, y2)
+        retval, pt1, pt2 = cv2.clipLine((0, 0, WIDTH, HEIGHT), (x1, y1), (x2, y2))
+        assert (inside, *points) == (retval, *pt1, *pt2), (x1, y1, x2, y2)
+
+
+# The whole path on the shipped template and annotations: decoding the
+# template, rasterizing every region and painting, once per backend
+def test_region_map_paints_the_same_with_both_backends(monkeypatch):
+    pytest.importorskip("cv2")
+    images = []
+    for name in ("numpy", "opencv"):
+        monkeypatch.setattr(backends, "DEFAULT_BACKEND", name)
+        assert backends.get_backend().name == name
+        template_image = data_store.read_template_image()
+        region_map = RegionMap(data_store.get_muscle_data(), template_image.shape)
+        exercise_index = data_store.get_exercise_index()
+        levels = [np.arange(len(region_map.labels) + 1) % len(PALETTE)]
+        levels += [region_map.levels(exercise_index.muscle_intensity(exercises))
+                   for exercises in data_store.get_premade_workouts().values()]
+        images.append((template_image, region_map.label_image,
+                       [region_map.paint(level, template_image) for level in levels]))
+    (numpy_template, numpy_labels, numpy_images), (opencv_template, opencv_labels, opencv_images) = images
+    assert (numpy_template == opencv_template).all()
+    assert (numpy_labels == opencv_labels).all()
+    for ours, theirs in zip(numpy_images, opencv_images):
+        assert (ours == theirs).all()
@@ -0,0 +1,37 @@
+import json
+import os
+
+import pytest
+
+from planner import batch_render, data_store
+
+
+def write_workouts(path, workouts):
+    with open(path, "w") as f:
+        for name, exercises in workouts.items():
+            f.write(json.dumps({"name": name, "exercises": exercises}) + "\n")
+
+
+def test_file_names_do_not_collide():
+    files = batch_render.file_names(["Leg Day!", "Leg Day?", "Leg_Day-2", "leg day", "Push"], "PNG")
+    assert files == {"Leg Day!": "Leg_Day.png", "Leg Day?": "Leg_Day-2.png", "Leg_Day-2": "Leg_Day-2-2.png",
+                     "leg day": "leg_day-3.png", "Push": "Push.png"}
+
+
+def test_every_workout_gets_its_own_file(tmp_path):
+    names = list(data_store.get_exercise_index().names)
+    workouts_path = str(tmp_path / "workouts.jsonl")
+    write_workouts(workouts_path, {"Leg Day!": names[:2], "Leg Day?": names[2:4], "Leg Day": names[4:6]})
+    batch_render.main([workouts_path, "-o", str(tmp_path / "out"), "--workers", "1"])
+    assert sorted(os.listdir(tmp_path / "out")) == ["Leg_Day-2.png", "Leg_Day-3.png", "Leg_Day.png"]
+
+
+def test_workouts_with_unknown_exercises_are_skipped(tmp_path, capsys):
+    names = list(data_store.get_exercise_index().names)
+    workouts_path = str(tmp_path / "workouts.jsonl")
+    write_workouts(workouts_path, {"Typos": ["Leg Pres", "Pushup"], "Good": names[:3]})
+    with pytest.raises(SystemExit) as exit:
+        batch_render.main([workouts_path, "-o", str(tmp_path / "out"), "--workers", "1"])
+    assert exit.value.code == 1
+    assert "Skipped 'Typos', unknown exercises: Leg Pres, Pushup" in capsys.readouterr().err
+    assert os.listdir(tmp_path / "out") == ["Good.png"]
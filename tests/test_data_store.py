@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from planner import data_store
+
+
+def test_muscle_data_follows_catalog_and_template(monkeypatch):
+    muscle_data = data_store.get_muscle_data()
+    assert data_store.get_muscle_data() is muscle_data
+    assert muscle_data.shape == data_store.get_template_image().shape[:2]
+    assert set(muscle_data.labels) <= data_store.catalog_muscles(data_store.get_exercise_data())
+
+    # A new catalog object (the file changed) rebuilds the annotations from
+    # the muscles of that catalog, without reading the CSV again
+    exercise_data = data_store.get_exercise_data().copy()
+    monkeypatch.setattr(data_store.exercise_asset, "get", lambda: exercise_data)
+    monkeypatch.setattr(data_store, "read_exercise_data", lambda *args: pytest.fail("catalog read again"))
+    rebuilt = data_store.get_muscle_data()
+    assert rebuilt is not muscle_data
+    assert rebuilt.labels == muscle_data.labels
+
+
+def test_compiled_annotations_are_checked_against_catalog_muscles():
+    muscle_data = data_store.get_muscle_data()
+    muscles = set(muscle_data.labels)
+    assert data_store.read_annotations(shape=muscle_data.shape, muscles=muscles).labels == muscle_data.labels
+    # Even when the compiled file is current, a label missing from the
+    # catalog is reported
+    with pytest.raises(ValueError, match=muscle_data.labels[0]):
+        data_store.read_annotations(shape=muscle_data.shape, muscles=muscles - {muscle_data.labels[0]})
+
+
+def test_shared_catalog_cannot_be_written_in_place():
+    exercise_data = data_store.get_exercise_data()
+    rating = exercise_data["Rating"].iloc[0]
+    with pytest.raises(ValueError):
+        exercise_data.loc[0, "Rating"] = rating + 1
+    with pytest.raises(ValueError):
+        exercise_data.iloc[0, exercise_data.columns.get_loc("muscle_gp")] = exercise_data["muscle_gp"].iloc[1]
+    with pytest.raises(ValueError):
+        exercise_data["Rating"].to_numpy()[0] = rating + 1
+    assert exercise_data["Rating"].iloc[0] == rating
+
+    copy = exercise_data.copy()
+    copy.loc[0, "Rating"] = rating + 1
+    assert copy["Rating"].iloc[0] == rating + 1
+
+
+def test_premade_workouts_with_unknown_exercises_are_reported(tmp_path):
+    exercise_index = data_store.get_exercise_index()
+    name = next(name for name in exercise_index.names if name.lower() != name)
+    path = str(tmp_path / "premade_workouts.json")
+    with open(path, "w") as f:
+        json.dump({"Legs": [name, name.lower()], "Typos": ["Leg Pres"], "Fine": [name]}, f)
+    workouts = data_store.read_premade_workouts(path)
+    with pytest.raises(ValueError) as error:
+        data_store.validate_workouts(workouts, exercise_index, path)
+    assert str(error.value) == (f"Unknown exercises in {path}:\n"
+                                f"  Legs: {name.lower()!r} (did you mean {name!r}?)\n"
+                                "  Typos: 'Leg Pres'")
@@ -0,0 +1,168 @@
+import hashlib
+import io
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image
+
+from planner import exercise_images
+from planner.exercise_images import ThumbnailCache, make_thumbnail, read_url
+
+
+def jpeg(color, size=(64, 48)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+# Local stand-in for the image host: /image/<n> is a JPEG of its own color,
+# /missing a 404 and /large a body of 1 MB. Counts requests per path and the
+# most requests in flight at once.
+class StandInHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests[self.path] = server.requests.get(self.path, 0) + 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            time.sleep(server.latency)
+            if self.path.startswith("/image/"):
+                n = int(self.path.rsplit("/", 1)[1])
+                body = jpeg((n * 37 % 256, n * 91 % 256, n * 53 % 256))
+            elif self.path == "/large":
+                body = bytes(2**20)
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            if not server.chunked:
+                self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.lock = threading.Lock()
+    server.requests = {}
+    server.in_flight = 0
+    server.max_in_flight = 0
+    server.latency = 0
+    server.chunked = False
+    server.url = lambda path: f"http://127.0.0.1:{server.server_address[1]}{path}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_put_and_get_are_keyed_by_content(tmp_path):
+    cache = ThumbnailCache(str(tmp_path))
+    red = jpeg("red")
+    cache.put("http://a/1.jpg", red)
+    cache.put("http://b/1.jpg", red)
+    assert cache.get("http://a/1.jpg") == red
+    assert cache.get("http://b/1.jpg") == red
+    assert cache.get("http://c/1.jpg") is None
+    assert cache.stats()["entries"] == 1
+    assert [path.name for path in tmp_path.glob("*.jpg")] == [hashlib.sha256(red).hexdigest() + ".jpg"]
+
+    # The URL map is read back from the log
+    reopened = ThumbnailCache(str(tmp_path))
+    assert reopened.get("http://b/1.jpg") == red
+    assert reopened.status("http://a/1.jpg") == "cached"
+
+
+def test_eviction_removes_least_recently_read(tmp_path):
+    images = [jpeg(color) for color in ("red", "green", "blue", "white")]
+    cache = ThumbnailCache(str(tmp_path), max_bytes=sum(map(len, images[:3])))
+    for n, image in enumerate(images[:3]):
+        cache.put(f"http://host/{n}.jpg", image)
+        time.sleep(0.01)
+    assert cache.get("http://host/0.jpg") == images[0]
+
+    cache.put("http://host/3.jpg", images[3])
+    assert cache.stats()["evictions"] >= 1
+    assert cache.stats()["bytes"] <= cache.max_bytes
+    assert cache.status("http://host/1.jpg") == "missing"
+    assert cache.get("http://host/0.jpg") == images[0]
+    assert cache.get("http://host/3.jpg") == images[3]
+    assert len(list(tmp_path.glob("*.jpg"))) == cache.stats()["entries"]
+
+    # The order survives a restart: 2 was read least recently
+    reopened = ThumbnailCache(str(tmp_path), max_bytes=cache.max_bytes)
+    reopened.put("http://host/4.jpg", jpeg("black"))
+    assert reopened.status("http://host/2.jpg") == "missing"
+    assert reopened.status("http://host/3.jpg") == "cached"
+
+
+def test_prefetch_fetches_and_resizes(tmp_path, server):
+    cache = ThumbnailCache(str(tmp_path), size=(16, 16))
+    urls = [server.url(f"/image/{n}") for n in range(5)]
+    cache.prefetch(urls + urls).result(timeout=10)
+    assert cache.stats()["fetched"] == 5
+    for url in urls:
+        with Image.open(io.BytesIO(cache.get(url))) as image:
+            assert max(image.size) == 16
+    assert cache.prefetch(urls) is None
+    assert all(count == 1 for count in server.requests.values())
+
+
+def test_failed_urls_wait_for_retry_after(tmp_path, server, monkeypatch):
+    cache = ThumbnailCache(str(tmp_path))
+    url = server.url("/missing")
+    cache.prefetch([url]).result(timeout=10)
+    assert cache.status(url) == "failed"
+    assert cache.prefetch([url]) is None
+    assert server.requests["/missing"] == 1
+
+    monkeypatch.setattr(exercise_images, "RETRY_AFTER", 0)
+    assert cache.status(url) == "missing"
+    cache.prefetch([url]).result(timeout=10)
+    assert server.requests["/missing"] == 2
+
+
+def test_concurrency_is_capped(tmp_path, server):
+    server.latency = 0.05
+    cache = ThumbnailCache(str(tmp_path), concurrency=3)
+    urls = [server.url(f"/image/{n}") for n in range(12)]
+    first = cache.prefetch(urls[:6])
+    second = cache.prefetch(urls[6:])
+    first.result(timeout=10)
+    second.result(timeout=10)
+    assert cache.stats()["fetched"] == 12
+    assert server.max_in_flight == 3
+
+
+@pytest.mark.parametrize("chunked", [False, True])
+def test_read_url_rejects_large_bodies(server, chunked):
+    server.chunked = chunked
+    assert len(read_url(server.url("/large"), max_bytes=2**20)) == 2**20
+    with pytest.raises(ValueError):
+        read_url(server.url("/large"), max_bytes=2**20 - 1)
+
+
+def test_oversized_download_is_a_failed_fetch(tmp_path, server, monkeypatch):
+    monkeypatch.setattr(exercise_images, "MAX_IMAGE_BYTES", 1024)
+    cache = ThumbnailCache(str(tmp_path))
+    url = server.url("/large")
+    cache.prefetch([url]).result(timeout=10)
+    assert cache.status(url) == "failed"
+    assert cache.stats()["entries"] == 0
+
+
+def test_make_thumbnail_rejects_huge_images(monkeypatch):
+    monkeypatch.setattr(exercise_images, "MAX_IMAGE_PIXELS", 100)
+    with pytest.raises(ValueError):
+        make_thumbnail(jpeg("red", (20, 20)))
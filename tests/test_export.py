@@ -0,0 +1,16 @@
+import numpy as np
+import pandas as pd
+
+from planner import data_store
+from planner.export import encode_sheet, sheet_pages
+
+
+def test_sheet_pages_with_repeated_catalog_names():
+    exercise_data = data_store.get_exercise_data()
+    # A raw catalog can list a name on several rows
+    catalog = pd.concat([exercise_data, exercise_data.iloc[:40]], ignore_index=True)
+    exercises = list(exercise_data["Exercise_Name"][:30]) + ["Not An Exercise"]
+    heatmap = np.zeros((400, 300, 3), dtype=np.uint8)
+    pages = sheet_pages(exercises, catalog, heatmap)
+    assert len(pages) == 2
+    assert encode_sheet(pages, "PDF").startswith(b"%PDF")
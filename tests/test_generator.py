@@ -0,0 +1,40 @@
+import pandas as pd
+import pytest
+
+from planner.exercise_index import ExerciseIndex
+from planner.generator import WorkoutGenerator
+
+CATALOG = pd.DataFrame({
+    "Exercise_Name": ["Bench Press", "Push-up", "Dips", "Pushdown", "Kickback", "Squat"],
+    "muscle_gp": ["Chest", "Chest", "Chest", "Triceps", "Triceps", "Quadriceps"],
+    "Equipment": ["Barbell", "Bodyweight", "Bodyweight", "Cable", "Dumbbell", "Barbell"],
+    "Rating": [9.0, 8.0, 7.0, 6.0, 5.0, 9.5],
+})
+
+
+def generator(activations=None):
+    if activations is not None:
+        activations = pd.DataFrame(activations, columns=["Exercise_Name", "muscle_gp", "weight"])
+    return WorkoutGenerator(CATALOG, ExerciseIndex(CATALOG, activations))
+
+
+def test_targets_are_covered_evenly_by_rating():
+    assert generator().generate(["Chest", "Triceps"], budget=4) == ["Bench Press", "Pushdown", "Push-up", "Kickback"]
+
+
+def test_secondary_activations_count_towards_coverage():
+    # Dips work the triceps as much as the chest: they cover both targets at once
+    assert generator([("Dips", "Triceps", 1.0)]).generate(["Chest", "Triceps"], budget=2) == [
+        "Dips", "Bench Press"]
+    # The bench press covers half of the triceps, so the triceps come next
+    assert generator([("Bench Press", "Triceps", 0.5)]).generate(["Chest", "Triceps"], budget=2) == [
+        "Bench Press", "Pushdown"]
+    # A secondary activation makes an exercise a candidate for that muscle
+    assert generator([("Squat", "Triceps", 0.5)]).generate(["Triceps"], ["Barbell"]) == ["Squat"]
+
+
+def test_equipment_exclude_and_unknown_names():
+    assert generator().generate(["Chest"], ["Bodyweight"], exclude=["Push-up"]) == ["Dips"]
+    assert generator().generate(["Chest"], ["Cable"]) == []
+    with pytest.raises(ValueError, match="Calves"):
+        generator().generate(["Calves"])
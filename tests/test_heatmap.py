@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+from planner import data_store
+from planner.heatmap_cache import HeatmapCache, IncrementalHeatmap, encode_image, render_heatmap
+
+
+@pytest.fixture(scope="module")
+def shared():
+    return data_store.get_exercise_index(), data_store.get_region_map(), data_store.get_template_image()
+
+
+# Add or remove one exercise per step, as a session does
+def interactions(names, steps, seed=0):
+    rng = random.Random(seed)
+    selection = rng.sample(names, 10)
+    for _ in range(steps):
+        if len(selection) > 25 or (len(selection) > 5 and rng.random() < 0.5):
+            selection = [name for name in selection if name != rng.choice(selection)]
+        else:
+            selection = selection + [rng.choice(names)]
+        yield selection
+
+
+def test_incremental_matches_full_render(shared):
+    exercise_index, region_map, template_image = shared
+    incremental = IncrementalHeatmap(exercise_index, region_map, template_image, cache=HeatmapCache(max_bytes=0))
+    for selection in interactions(list(exercise_index.names), 60):
+        levels = region_map.levels(exercise_index.muscle_intensity(selection))
+        expected = encode_image(region_map.paint(levels, template_image))
+        assert incremental.render(selection) == expected
+        assert (incremental.levels() == levels).all()
+
+
+def test_incremental_returns_to_empty(shared):
+    exercise_index, region_map, template_image = shared
+    cache = HeatmapCache(max_bytes=0)
+    incremental = IncrementalHeatmap(exercise_index, region_map, template_image, cache=cache)
+    for selection in interactions(list(exercise_index.names), 30, seed=1):
+        incremental.render(selection)
+    assert incremental.render([]) == render_heatmap([], exercise_index, region_map, template_image, cache=cache)
+    assert not incremental.levels().any()
+
+
+def test_cache_evicts_least_recently_used_first():
+    cache = HeatmapCache(max_bytes=10)
+    cache.put("a", b"aaaa")
+    cache.put("b", b"bbb")
+    cache.put("c", b"cc")
+    assert cache.get("a") == b"aaaa"
+    cache.put("d", b"ddd")
+    assert list(cache.entries) == ["c", "a", "d"]
+    assert cache.get("b") is None
+    cache.put("e", b"eeeeeeeeee")
+    assert list(cache.entries) == ["e"]
+    stats = cache.stats()
+    assert (stats["bytes"], stats["evictions"], stats["hits"], stats["misses"]) == (10, 4, 1, 1)
+
+
+def test_cache_rejects_items_over_the_whole_budget():
+    cache = HeatmapCache(max_bytes=10)
+    cache.put("a", b"aaaa")
+    cache.put("big", b"x" * 11)
+    assert cache.get("big") is None
+    assert list(cache.entries) == ["a"]
+    assert cache.current_bytes == 4
+
+
+def test_cache_replacing_a_key_counts_its_bytes_once():
+    cache = HeatmapCache(max_bytes=10)
+    cache.put("a", b"aaaa")
+    cache.put("b", b"bb")
+    cache.put("a", b"aaaaaaa")
+    assert cache.current_bytes == 9
+    assert list(cache.entries) == ["b", "a"]
+    cache.put("a", b"a")
+    assert cache.current_bytes == 3
+    assert cache.stats()["evictions"] == 0
+    cache.put("c", b"ccccccc")
+    assert cache.current_bytes == sum(len(data) for data in cache.entries.values()) == 10
+
+
+def test_cache_bind_clears_when_a_source_changes():
+    region_map, template_image = object(), object()
+    cache = HeatmapCache(max_bytes=10)
+    cache.bind(region_map, template_image)
+    cache.put("a", b"aaaa")
+    cache.bind(region_map, template_image)
+    assert cache.get("a") == b"aaaa"
+
+    cache.bind(region_map, object())
+    assert cache.get("a") is None
+    assert cache.current_bytes == 0
+    cache.put("a", b"aaaa")
+    cache.bind(object(), cache.sources[1])
+    assert not cache.entries and cache.current_bytes == 0
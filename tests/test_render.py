@@ -0,0 +1,59 @@
+import itertools
+
+import numpy as np
+
+from planner.annotations import compile_annotations
+from planner.backends import fill_poly
+from planner.render import PALETTE, RegionMap
+
+SHAPE = (60, 80)
+
+# Overlapping regions of three labels, "a" drawn twice so that it is both
+# under and over "b"
+REGIONS = [
+    ("a", [(5, 5), (40, 5), (40, 40), (5, 40)]),
+    ("b", [(20, 10), (60, 10), (60, 50), (20, 50)]),
+    ("c", [(30, 0), (75, 30), (30, 55)]),
+    ("a", [(45, 20), (70, 20), (70, 45), (45, 45)]),
+    ("b", [(0, 30), (25, 30), (25, 59)]),
+]
+
+
+def annotations():
+    regions = {}
+    for i, (label, points) in enumerate(REGIONS):
+        xs, ys = [x for x, _ in points], [y for _, y in points]
+        regions[str(i)] = {"shape_attributes": {"name": "polygon", "all_points_x": xs + xs[:1],
+                                                "all_points_y": ys + ys[:1]},
+                           "region_attributes": {"label": label}}
+    return compile_annotations(regions, SHAPE)
+
+
+# Every highlighted region filled in drawing order, the last one wins
+def draw_regions(annotations, levels, template_image):
+    image = template_image.copy()
+    for label_id, points in annotations.polygons():
+        if levels[label_id]:
+            mask = fill_poly(np.zeros(SHAPE, dtype=np.uint8), points).view(bool)
+            image[mask] = PALETTE[levels[label_id]]
+    return image
+
+
+def test_overlapping_regions_paint_in_drawing_order():
+    compiled = annotations()
+    region_map = RegionMap(compiled, SHAPE)
+    assert len(region_map.overlap_pixels)
+    template_image = np.random.default_rng(0).integers(0, 256, (*SHAPE, 3), dtype=np.uint8)
+    label_ids = list(compiled.label_ids.values())
+    for count in range(len(label_ids) + 1):
+        for highlighted in itertools.combinations(label_ids, count):
+            levels = np.zeros(len(label_ids) + 1, dtype=np.uint16)
+            for i, label_id in enumerate(highlighted):
+                levels[label_id] = 1 + 50 * i
+            expected = draw_regions(compiled, levels, template_image)
+            assert (region_map.paint(levels, template_image) == expected).all(), highlighted
+
+            rows, cols = np.arange(0, SHAPE[0], 3), np.arange(1, SHAPE[1], 2)
+            sampled = region_map.sampled(rows, cols)
+            sampled_template = template_image[np.ix_(rows, cols)]
+            assert (sampled.paint(levels, sampled_template) == expected[np.ix_(rows, cols)]).all(), highlighted
@@ -0,0 +1,34 @@
+import asyncio
+
+import pytest
+
+from planner import data_store
+from planner.render_server import RenderServer
+
+
+@pytest.fixture
+def server():
+    server = RenderServer(workers=1)
+    yield server
+    server.pool.shutdown(cancel_futures=True)
+
+
+def get(server, target, headers=None):
+    return asyncio.run(server.handle("GET", target, headers or {}))
+
+
+def test_unknown_exercises_are_not_found(server):
+    name = data_store.get_exercise_index().names[0]
+    status, headers, body = get(server, f"/render?exercises={name},Leg Pres,Nope&exercise=Nope")
+    assert status == 404
+    assert "Cache-Control" not in headers
+    assert body.decode() == "Unknown exercises: Nope, Leg Pres"
+
+
+def test_known_exercises_render_and_revalidate(server):
+    names = list(data_store.get_exercise_index().names[:3])
+    status, headers, body = get(server, "/render?exercises=" + ",".join(names))
+    assert status == 200
+    assert headers["Content-Type"] == "image/png" and body.startswith(b"\x89PNG")
+    status, _, body = get(server, "/render?exercises=" + ",".join(names), {"if-none-match": headers["ETag"]})
+    assert (status, body) == (304, b"")
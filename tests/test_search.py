@@ -0,0 +1,78 @@
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from planner.data_store import read_exercise_data
+from planner.exercise_index import ExerciseIndex
+from planner.search import SearchIndex
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return read_exercise_data()
+
+
+# The per-exercise DataFrame scan the index replaced
+def scan_muscle_counts(selected_exercises, exercise_data):
+    muscle_counts = {}
+    for exercise in selected_exercises:
+        for muscle in exercise_data[exercise_data["Exercise_Name"] == exercise]["muscle_gp"].values:
+            muscle_counts[muscle] = muscle_counts.get(muscle, 0) + 1
+    return muscle_counts
+
+
+# Every name matching a search, found with pandas string matching
+def scan_search(exercise_data, query, muscles, equipment):
+    exercise_data = exercise_data.drop_duplicates("Exercise_Name")
+    names = exercise_data["Exercise_Name"].str.lower()
+    mask = names.notna()
+    for term in query.lower().split():
+        if len(term) < 3:
+            mask &= names.str.contains(r"(?<![^\W_])" + re.escape(term))
+        else:
+            mask &= names.str.contains(term, regex=False)
+    if muscles:
+        mask &= exercise_data["muscle_gp"].isin(muscles)
+    if equipment:
+        mask &= exercise_data["Equipment"].isin(equipment)
+    return set(exercise_data["Exercise_Name"][mask])
+
+
+@pytest.mark.parametrize("repeated", [False, True])
+def test_muscle_counts_match_scan(catalog, repeated):
+    if repeated:
+        # A raw catalog can list a name more than once
+        catalog = pd.concat([catalog, catalog.iloc[::7]], ignore_index=True)
+    index = ExerciseIndex(catalog)
+    rng = np.random.default_rng(0)
+    names = catalog["Exercise_Name"].to_numpy()
+    for size in (0, 1, 5, 20, 50):
+        selection = list(rng.choice(names, size)) + ["Not An Exercise"]
+        assert index.muscle_counts(selection) == scan_muscle_counts(selection, catalog)
+
+
+@pytest.mark.parametrize("query, muscles, equipment", [
+    ("", (), ()),
+    ("pr", (), ()),
+    ("press", (), ()),
+    ("dumbbell curl", (), ()),
+    ("bar", ("Chest", "Shoulders"), ()),
+    ("", ("Quadriceps",), ("Machine",)),
+    ("zzzz", (), ()),
+])
+def test_search_matches_scan(catalog, query, muscles, equipment):
+    results = SearchIndex(catalog).search(query, muscles, equipment, page_size=len(catalog))
+    expected = scan_search(catalog, query, muscles, equipment)
+    assert results["total"] == len(expected)
+    assert set(results["names"]) == expected
+
+
+def test_search_pages_in_rank_order(catalog):
+    index = SearchIndex(catalog)
+    first, second = index.search("", page=0), index.search("", page=1)
+    ratings = [index.ratings[index.name_to_id[name]] for name in first["names"] + second["names"]]
+    ratings = np.nan_to_num(ratings, nan=-np.inf)
+    assert (np.diff(ratings) <= 0).all()
+    assert not set(first["names"]) & set(second["names"])
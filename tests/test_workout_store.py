@@ -0,0 +1,60 @@
+import pytest
+
+from planner.workout_store import WorkoutStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = WorkoutStore(str(tmp_path / "workouts.db"))
+    yield store
+    store.close()
+
+
+def test_save_and_load(store):
+    store.save("bob", "Legs", ["Leg Press", "Squat", "Lunge"])
+    assert store.list("bob") == ["Legs"]
+    assert store.load("bob", "Legs") == ["Leg Press", "Squat", "Lunge"]
+    assert store.load("bob", "Arms") is None
+
+
+def test_save_replaces_the_workout_of_the_same_name(store):
+    store.save("bob", "Legs", ["Leg Press", "Squat"])
+    store.save("bob", "Arms", ["Curl"])
+    store.save("bob", "Legs", ["Lunge", "Leg Press"])
+    assert store.list("bob") == ["Legs", "Arms"]
+    assert store.load("bob", "Legs") == ["Lunge", "Leg Press"]
+
+
+def test_delete(store):
+    store.save("bob", "Legs", ["Leg Press"])
+    store.save("bob", "Arms", ["Curl"])
+    store.delete("bob", "Legs")
+    store.delete("bob", "Nope")
+    assert store.list("bob") == ["Arms"]
+    assert store.load("bob", "Legs") is None
+
+
+def test_users_only_see_their_workouts(store):
+    store.save("bob", "Legs", ["Leg Press"])
+    store.save("alice", "Legs", ["Squat"])
+    store.delete("alice", "Legs")
+    assert store.list("alice") == []
+    assert store.list("bob") == ["Legs"]
+    assert store.load("bob", "Legs") == ["Leg Press"]
+    assert store.load("alice", "Legs") is None
+
+
+def test_popularity_counts_workouts_not_repeats(store):
+    store.save("bob", "Legs", ["Leg Press", "Squat", "Leg Press"])
+    store.save("alice", "Legs", ["Squat"])
+    assert store.popular_exercises() == [("Squat", 2), ("Leg Press", 1)]
+
+    # Replacing a workout moves its counts to the new exercises
+    store.save("bob", "Legs", ["Lunge", "Squat"])
+    assert store.popular_exercises() == [("Squat", 2), ("Lunge", 1)]
+    assert store.popular_exercises(1) == [("Squat", 2)]
+
+    store.delete("alice", "Legs")
+    assert store.popular_exercises() == [("Lunge", 1), ("Squat", 1)]
+    store.delete("bob", "Legs")
+    assert store.popular_exercises() == []